@@ -1,15 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
 from jose import jwt, JWTError
 from google.oauth2 import id_token
 from google.auth.transport import requests
 
-from ..database import get_db
+from ..database import get_async_db
 from ..config import get_settings
-from ..models import User
-from ..services.user_service import get_or_create_user
+from ..services import auth_cache
+from ..services.user_service import get_or_create_user, get_user_by_email
 
 router = APIRouter()
 settings = get_settings()
@@ -22,7 +23,13 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm="HS256")
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> auth_cache.Principal:
+    """
+    Resolve the bearer token to the authenticated user
+    
+    Principals are cached, so most requests are authenticated without a
+    database round trip (the session opens no connection until used).
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -37,14 +44,21 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
     except JWTError:
         raise credentials_exception
         
-    user = db.query(User).filter(User.email == email).first()
+    principal = await auth_cache.get(email)
+    if principal is not None:
+        return principal
+    
+    user = await get_user_by_email(db, email)
     if user is None:
         raise credentials_exception
+    
+    principal = auth_cache.Principal.from_user(user)
+    await auth_cache.put(principal)
         
-    return user
+    return principal
 
 @router.post("/google")
-async def google_auth(request: Request, db: Session = Depends(get_db)):
+async def google_auth(request: Request, db: AsyncSession = Depends(get_async_db)):
     try:
         # Get request body
         body = await request.json()
@@ -56,8 +70,10 @@ async def google_auth(request: Request, db: Session = Depends(get_db)):
                 detail="Token is required"
             )
 
-        # Verify the token
-        idinfo = id_token.verify_oauth2_token(
+        # Verify the token (fetches Google's certificates over blocking HTTP,
+        # so keep it off the event loop)
+        idinfo = await run_in_threadpool(
+            id_token.verify_oauth2_token,
             id_token_str, 
             requests.Request(), 
             settings.GOOGLE_CLIENT_ID
@@ -76,7 +92,7 @@ async def google_auth(request: Request, db: Session = Depends(get_db)):
         last_name = idinfo.get('family_name')
         
         # Create or update user in the database
-        user = get_or_create_user(
+        user = await get_or_create_user(
             db=db, 
             email=email, 
             first_name=first_name,
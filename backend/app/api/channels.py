@@ -1,15 +1,21 @@
+import asyncio
 import logging
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile, status
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, List, Optional
 import re
 from datetime import datetime
-import httpx
 import uuid
 
-from ..database import get_db
+from ..database import get_async_db
 from ..config import get_settings
-from ..models import Channel, User
+from ..models import Channel, Video
+from ..services import channel_cache, channel_import, feed_cache, feed_version, rate_limiter, youtube_service
+from ..services.http_client import get_http_client
+from ..services.auth_cache import Principal
+from ..utils.tracing import external_call
+from ..workers.tasks import subscribe_websub_channel
 from .auth import get_current_user
 
 router = APIRouter()
@@ -17,7 +23,9 @@ settings = get_settings()
 logger = logging.getLogger(__name__)
 
 # Pydantic schemas for request/response
-from pydantic import BaseModel, HttpUrl, validator
+from pydantic import BaseModel, HttpUrl, TypeAdapter, ValidationError, validator
+
+CHANNEL_ID_PATTERN = r'^UC[\w-]{22}$'
 
 class ChannelCreate(BaseModel):
     channel_url: str
@@ -25,10 +33,9 @@ class ChannelCreate(BaseModel):
     @validator('channel_url')
     def validate_channel_url(cls, v):
         # Check if it's a valid YouTube URL or channel ID
-        channel_id_pattern = r'^UC[\w-]{22}$'
         youtube_url_pattern = r'youtube\.com\/(?:c\/|channel\/|user\/|@)([\w-]+)'
         
-        if re.match(channel_id_pattern, v):
+        if re.match(CHANNEL_ID_PATTERN, v):
             return v
         
         match = re.search(youtube_url_pattern, v)
@@ -51,11 +58,22 @@ class ChannelResponse(BaseModel):
         }
     }
 
+ChannelList = TypeAdapter(List[ChannelResponse])
+
+class ChannelImportItem(BaseModel):
+    input: str
+    status: str  # subscribed, already_subscribed, not_found, invalid, rate_limited or failed
+    channel: Optional[ChannelResponse] = None
+
+class ChannelImportResponse(BaseModel):
+    subscribed: int
+    items: List[ChannelImportItem]
+
 @router.post("/", response_model=ChannelResponse, status_code=status.HTTP_201_CREATED)
 async def subscribe_to_channel(
     channel: ChannelCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Subscribe to a YouTube channel
@@ -70,10 +88,11 @@ async def subscribe_to_channel(
         )
     
     # Check if user is already subscribed to this channel
-    existing_subscription = db.query(Channel).filter(
+    result = await db.execute(select(Channel).where(
         Channel.user_id == current_user.id,
         Channel.yt_channel_id == channel_info["id"]
-    ).first()
+    ))
+    existing_subscription = result.scalars().first()
     
     if existing_subscription:
         raise HTTPException(
@@ -90,46 +109,153 @@ async def subscribe_to_channel(
     )
     
     db.add(new_channel)
-    db.commit()
-    db.refresh(new_channel)
+    await db.commit()
+    await db.refresh(new_channel)
+    await feed_version.bump([current_user.id])
+    
+    # Push notifications for the channel, if nobody subscribed to them yet
+    if settings.WEBSUB_ENABLED:
+        subscribe_websub_channel.delay(channel_info["id"])
     
     # Manual conversion for UUID
     new_channel.id = str(new_channel.id)
     
     return new_channel
 
+@router.post("/bulk", response_model=ChannelImportResponse)
+async def import_channels(
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Subscribe to every channel of a subscription export
+    
+    Takes a Google Takeout subscriptions.csv, an OPML file, or a CSV with a
+    channel URL or ID per row. Channel IDs are looked up 50 per YouTube call
+    and other URLs resolved concurrently; the new subscriptions are stored
+    with a single insert. Returns the outcome for every channel of the file;
+    those that were rate_limited or failed can be imported again later.
+    """
+    content = await file.read(settings.CHANNEL_IMPORT_MAX_BYTES + 1)
+    if len(content) > settings.CHANNEL_IMPORT_MAX_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File is larger than {settings.CHANNEL_IMPORT_MAX_BYTES} bytes"
+        )
+    
+    try:
+        identifiers = channel_import.parse_subscriptions(content)
+    except channel_import.ImportFormatError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    if len(identifiers) > settings.CHANNEL_IMPORT_MAX_CHANNELS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.CHANNEL_IMPORT_MAX_CHANNELS} channels can be imported at once"
+        )
+    
+    resolved = await _resolve_channels(identifiers)
+    
+    # One query for the user's existing subscriptions among the channels
+    found_ids = {info["id"] for info in resolved.values() if isinstance(info, dict)}
+    result = await db.execute(select(Channel.yt_channel_id).where(
+        Channel.user_id == current_user.id,
+        Channel.yt_channel_id.in_(found_ids)
+    ))
+    subscribed = set(result.scalars().all())
+    
+    now = datetime.utcnow()
+    rows = []
+    items = []
+    
+    for identifier in identifiers:
+        info = resolved[identifier]
+        
+        if not isinstance(info, dict):
+            items.append(ChannelImportItem(input=identifier, status=info))
+            continue
+        
+        # Also catches the same channel listed by ID and by URL
+        if info["id"] in subscribed:
+            items.append(ChannelImportItem(input=identifier, status="already_subscribed"))
+            continue
+        subscribed.add(info["id"])
+        
+        row = {
+            "id": uuid.uuid4(),
+            "yt_channel_id": info["id"],
+            "user_id": current_user.id,
+            "channel_title": info["title"],
+            "last_published_at": None,
+            "created_at": now,
+            "updated_at": now
+        }
+        rows.append(row)
+        items.append(ChannelImportItem(
+            input=identifier,
+            status="subscribed",
+            channel=ChannelResponse(**{**row, "id": str(row["id"])})
+        ))
+    
+    if rows:
+        # A single multi-row INSERT for the whole file
+        await db.execute(insert(Channel).values(rows))
+        await db.commit()
+        await feed_version.bump([current_user.id])
+        
+        if settings.WEBSUB_ENABLED:
+            for row in rows:
+                subscribe_websub_channel.delay(row["yt_channel_id"])
+    
+    logger.info(f"Imported {len(rows)} of {len(identifiers)} channels for user {current_user.id}")
+    
+    return ChannelImportResponse(subscribed=len(rows), items=items)
+
 @router.get("/", response_model=List[ChannelResponse])
 async def get_subscribed_channels(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Get all channels that the user is subscribed to
-    """
-    channels = db.query(Channel).filter(Channel.user_id == current_user.id).all()
     
-    # Manually convert UUID to string for list responses
-    for channel in channels:
-        channel.id = str(channel.id)
+    Responses carry an ETag; send it back in If-None-Match to get a 304
+    while the subscriptions are unchanged.
+    """
+    async def render():
+        result = await db.execute(select(Channel).where(Channel.user_id == current_user.id))
+        channels = result.scalars().all()
+        
+        # Manually convert UUID to string for list responses
+        for channel in channels:
+            channel.id = str(channel.id)
+        
+        return ChannelList.dump_json(ChannelList.validate_python(channels)).decode()
     
-    return channels
+    return await feed_cache.respond(request, current_user.id, render)
 
 @router.delete("/{channel_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def unsubscribe_from_channel(
     channel_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """
-    Unsubscribe from a channel
+    Unsubscribe from a channel, dropping its videos from the user's feed
     """
     try:
         # Convert string ID to UUID for database query
         channel_uuid = uuid.UUID(channel_id)
-        channel = db.query(Channel).filter(
+        result = await db.execute(select(Channel).where(
             Channel.id == channel_uuid,
             Channel.user_id == current_user.id
-        ).first()
+        ))
+        channel = result.scalars().first()
     except ValueError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -142,16 +268,20 @@ async def unsubscribe_from_channel(
             detail="Channel subscription not found"
         )
     
-    db.delete(channel)
-    db.commit()
+    # Video rows belong to this subscription; the feed reads them by
+    # user_id, so they go with it
+    await db.execute(delete(Video).where(Video.channel_id == channel.id))
+    await db.delete(channel)
+    await db.commit()
+    await feed_version.bump([current_user.id])
     
     return None
 
 @router.get("/{channel_id}", response_model=ChannelResponse)
 async def get_channel(
     channel_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Get a specific channel by ID
@@ -159,10 +289,11 @@ async def get_channel(
     try:
         # Convert string ID to UUID for database query
         channel_uuid = uuid.UUID(channel_id)
-        channel = db.query(Channel).filter(
+        result = await db.execute(select(Channel).where(
             Channel.id == channel_uuid,
             Channel.user_id == current_user.id
-        ).first()
+        ))
+        channel = result.scalars().first()
     except ValueError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -219,20 +350,34 @@ async def get_youtube_channel_info(channel_identifier):
     else:
         param_name = 'forUsername'
     
+    # Popular channels and recently mistyped ones are cached
+    try:
+        return await channel_cache.resolve(
+            channel_cache.cache_key(param_name, channel_id),
+            lambda: _fetch_channel_info(param_name, channel_id)
+        )
+    except channel_cache.LookupFailed:
+        return None
+
+async def _fetch_channel_info(param_name, channel_id):
     # Make request to YouTube API
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            'https://www.googleapis.com/youtube/v3/channels',
+    await rate_limiter.acquire("youtube", "channels.list")
+    with external_call("youtube", "channels.list") as call:
+        response = await get_http_client().get(
+            f'{settings.YOUTUBE_API_URL}/youtube/v3/channels',
             params={
                 'part': 'snippet',
                 param_name: channel_id,
                 'key': settings.YOUTUBE_API_KEY
             }
         )
+        if response.status_code != 200:
+            call.failed(str(response.status_code))
     
     if response.status_code != 200:
         logger.error(f"err calling youtube api {response}")
-        return None
+        await youtube_service.check_rate_limited(response)
+        raise channel_cache.LookupFailed(f"YouTube API error: {response.status_code}")
     
     data = response.json()
     
@@ -245,4 +390,80 @@ async def get_youtube_channel_info(channel_identifier):
     return {
         'id': channel['id'],
         'title': channel['snippet']['title']
-    }
\ No newline at end of file
+    }
+
+async def _resolve_channels(identifiers: List[str]) -> Dict[str, Any]:
+    """
+    Resolve the channels of an import, batching channel IDs 50 per call
+    
+    Args:
+        identifiers: Channel IDs, URLs or handles
+    
+    Returns:
+        dict: Channel information (id, title) per identifier, or its import
+        status when it couldn't be resolved
+    """
+    resolved = {}
+    channel_ids = {}
+    others = {}
+    
+    for identifier in identifiers:
+        try:
+            value = ChannelCreate(channel_url=identifier).channel_url
+        except ValidationError:
+            resolved[identifier] = "invalid"
+            continue
+        
+        if re.match(CHANNEL_ID_PATTERN, value):
+            channel_ids[identifier] = value
+        else:
+            others[identifier] = value
+    
+    semaphore = asyncio.Semaphore(settings.CHANNEL_IMPORT_CONCURRENCY)
+    
+    async def lookup_batch(batch):
+        async with semaphore:
+            try:
+                return await youtube_service.get_channels_info(batch)
+            except rate_limiter.RateLimitExceeded:
+                return {channel_id: "rate_limited" for channel_id in batch}
+    
+    async def lookup(value):
+        async with semaphore:
+            try:
+                return await get_youtube_channel_info(value) or "not_found"
+            except rate_limiter.RateLimitExceeded:
+                return "rate_limited"
+    
+    # Only channel IDs that aren't cached are looked up
+    keys = {channel_id: channel_cache.cache_key("id", channel_id) for channel_id in channel_ids.values()}
+    cached = await channel_cache.get_many(list(keys.values()))
+    by_id = {channel_id: cached[key] for channel_id, key in keys.items() if key in cached}
+    
+    missing_ids = [channel_id for channel_id in keys if channel_id not in by_id]
+    batches = [
+        missing_ids[start:start + youtube_service.MAX_IDS_PER_REQUEST]
+        for start in range(0, len(missing_ids), youtube_service.MAX_IDS_PER_REQUEST)
+    ]
+    batch_results, lookups = await asyncio.gather(
+        asyncio.gather(*(lookup_batch(batch) for batch in batches)),
+        asyncio.gather(*(lookup(value) for value in others.values()))
+    )
+    
+    fetched = {}
+    for batch_result in batch_results:
+        fetched.update(batch_result)
+    by_id.update(fetched)
+    # Statuses of failed batches aren't cached
+    await channel_cache.put_many({
+        keys[channel_id]: info
+        for channel_id, info in fetched.items()
+        if info is None or isinstance(info, dict)
+    })
+    
+    for identifier, channel_id in channel_ids.items():
+        # Left out when the call failed; None when there is no such channel
+        resolved[identifier] = by_id.get(channel_id, "failed") or "not_found"
+    resolved.update(zip(others, lookups))
+    
+    return resolved
@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, EmailStr
 from typing import Optional
 
-from ..database import get_db
+from ..database import get_async_db
 from ..models import User
+from ..services import auth_cache
+from ..services.auth_cache import Principal
 from .auth import get_current_user
 
 router = APIRouter()
@@ -18,7 +20,7 @@ class UserResponse(BaseModel):
     #     orm_mode = True
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
+async def get_current_user_info(current_user: Principal = Depends(get_current_user)):
     """
     Get the current logged-in user's information
     """
@@ -27,20 +29,23 @@ async def get_current_user_info(current_user: User = Depends(get_current_user)):
 @router.put("/me", response_model=UserResponse)
 async def update_user_info(
     user_update: UserResponse,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Update the current user's information
     """
+    user = await db.get(User, current_user.id)
+    
     # Update user fields if provided
     if user_update.first_name is not None:
-        current_user.first_name = user_update.first_name
+        user.first_name = user_update.first_name
     
     if user_update.last_name is not None:
-        current_user.last_name = user_update.last_name
+        user.last_name = user_update.last_name
     
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(user)
+    await auth_cache.invalidate(user.email)
     
-    return current_user
\ No newline at end of file
+    return user
\ No newline at end of file
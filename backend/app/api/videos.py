@@ -1,72 +1,164 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
 from typing import List, Optional
 from datetime import datetime
-import httpx
+import base64
+import binascii
+import json
+import uuid
 from pydantic import BaseModel, UUID4
 
-from ..database import get_db
+from ..database import get_async_db
 from ..config import get_settings
-from ..models import Video, Channel, User
+from ..models import Video, Channel
+from ..services.auth_cache import Principal
 from .auth import get_current_user
-from ..services import youtube_service, ai_service
+from ..services import feed_cache, feed_version, processing_lock, youtube_service, job_service
+from ..workers.tasks import start_processing
 
 router = APIRouter()
 settings = get_settings()
 
+# Columns behind VideoListItem; the feed never loads summaries or transcripts
+LIST_COLUMNS = (
+    Video.id,
+    Video.video_id,
+    Video.channel_id,
+    Video.title,
+    Video.description,
+    Video.published_at,
+    Video.processed_at,
+    Video.mp3_url,
+    Video.mindmap_url
+)
+
 class VideoBase(BaseModel):
     video_id: str
     title: str
     description: Optional[str] = None
     published_at: datetime
     
-class VideoResponse(VideoBase):
+class VideoListItem(VideoBase):
     id: UUID4
     channel_id: UUID4
     processed_at: Optional[datetime] = None
     mp3_url: Optional[str] = None
     mindmap_url: Optional[str] = None
+    
+    model_config = {"from_attributes": True}
+
+class VideoResponse(VideoListItem):
     summary_json: Optional[dict] = None
+    stage_timings: Optional[dict] = None
     
     # class Config:
     #     orm_mode = True
 
-@router.get("/", response_model=List[VideoResponse])
+class VideoPage(BaseModel):
+    items: List[VideoListItem]
+    next_cursor: Optional[str] = None
+
+class JobResponse(BaseModel):
+    id: UUID4
+    video_id: str
+    status: str
+    stages: Optional[dict] = None
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+@router.get("/", response_model=VideoPage)
 async def get_videos(
+    request: Request,
     channel_id: Optional[str] = None,
-    skip: int = 0, 
-    limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Get all videos from user's subscribed channels or from a specific channel
+    
+    Videos are returned newest first. Pass the returned next_cursor to get
+    the following page; it is None on the last page. Items leave out the
+    summary, get it from GET /videos/{video_id}. Responses carry an ETag;
+    send it back in If-None-Match to get a 304 while the feed is unchanged.
     """
-    # Base query to get videos from channels the user has subscribed to
-    query = db.query(Video).join(Channel).filter(Channel.user_id == current_user.id)
+    # Base query to get videos from channels the user has subscribed to;
+    # every video row carries its channel's user
+    query = (
+        select(Video)
+        .options(load_only(*LIST_COLUMNS, raiseload=True))
+        .where(Video.user_id == current_user.id)
+    )
     
     # Filter by channel if specified
     if channel_id:
-        query = query.filter(Channel.id == channel_id)
+        query = query.where(Video.channel_id == _parse_uuid(channel_id, "Channel not found"))
+    
+    # Continue after the last video of the previous page; unlike an offset,
+    # this seeks straight to the position in the (published_at, id) index
+    if cursor:
+        query = query.where(tuple_(Video.published_at, Video.id) < _decode_cursor(cursor))
     
-    # Order by published date (newest first) and paginate
-    videos = query.order_by(Video.published_at.desc()).offset(skip).limit(limit).all()
+    async def render():
+        # Fetch one extra row to know whether there is a next page
+        result = await db.execute(
+            query.order_by(Video.published_at.desc(), Video.id.desc()).limit(limit + 1)
+        )
+        videos = result.scalars().all()
+        
+        next_cursor = _encode_cursor(videos[limit - 1]) if len(videos) > limit else None
+        
+        return VideoPage(items=videos[:limit], next_cursor=next_cursor).model_dump_json()
+    
+    return await feed_cache.respond(request, current_user.id, render)
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: UUID4,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Get the status and per-stage timings of a processing job
+    """
+    job = await db.run_sync(job_service.get_job, job_id)
+    
+    # Jobs are shared by everyone processing the video, so any user with
+    # the video in their feed may follow it
+    if job:
+        result = await db.execute(select(Video.id).join(Channel).where(
+            Video.video_id == job.video_id,
+            Channel.user_id == current_user.id
+        ).limit(1))
+        if not result.first():
+            job = None
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
     
-    return videos
+    return job
 
 @router.get("/{video_id}", response_model=VideoResponse)
 async def get_video(
     video_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Get a specific video by ID
     """
-    video = db.query(Video).join(Channel).filter(
-        Video.id == video_id,
+    result = await db.execute(select(Video).join(Channel).where(
+        Video.id == _parse_uuid(video_id, "Video not found"),
         Channel.user_id == current_user.id
-    ).first()
+    ))
+    video = result.scalars().first()
     
     if not video:
         raise HTTPException(
@@ -76,14 +168,17 @@ async def get_video(
     
     return video
 
-@router.post("/process/{youtube_video_id}", response_model=VideoResponse)
+@router.post("/process/{youtube_video_id}", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
 async def process_video(
     youtube_video_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """
-    Process a YouTube video to generate summary, audio, and mindmap
+    Queue a YouTube video for summary, audio, and mindmap generation
+    
+    Returns the processing job right away; poll GET /videos/jobs/{job_id}
+    for its progress.
     """
     # Get video information from YouTube
     video_info = await youtube_service.get_video_info(youtube_video_id)
@@ -94,84 +189,103 @@ async def process_video(
             detail="Video not found on YouTube"
         )
     
-    # Check if the user is subscribed to the video's channel
-    channel = db.query(Channel).filter(
-        Channel.user_id == current_user.id,
-        Channel.yt_channel_id == video_info['channel_id']
-    ).first()
-    
-    if not channel:
-        # User is not subscribed to this channel, so create a subscription
-        channel = Channel(
-            yt_channel_id=video_info['channel_id'],
-            user_id=current_user.id,
-            channel_title=video_info['channel_title'],
-            last_published_at=video_info['published_at']
-        )
-        db.add(channel)
-        db.commit()
-        db.refresh(channel)
-    
-    # Check if the video is already processed
-    existing_video = db.query(Video).filter(
-        Video.video_id == youtube_video_id,
-        Video.channel_id == channel.id
-    ).first()
-    
-    if existing_video and existing_video.processed_at:
-        return existing_video
-    
-    # If video exists but not processed, update it
-    if existing_video:
-        video = existing_video
-    else:
-        # Create a new video record
-        video = Video(
-            video_id=youtube_video_id,
-            channel_id=channel.id,
-            title=video_info['title'],
-            description=video_info.get('description'),
-            published_at=video_info['published_at']
-        )
-        db.add(video)
-        db.commit()
-        db.refresh(video)
-    
-    # Start async processing of the video (this would typically use Celery in production)
-    # For the MVP, we'll process synchronously
-    try:
-        # Download and process the video
-        transcript = await youtube_service.get_video_transcript(youtube_video_id)
+    # Concurrent requests for the video (and the poller) go through one at a
+    # time, so only the first creates rows and a job; the others wait and
+    # then find its job
+    async with processing_lock.hold(youtube_video_id) as fence_token:
+        # Check if the user is subscribed to the video's channel
+        result = await db.execute(select(Channel).where(
+            Channel.user_id == current_user.id,
+            Channel.yt_channel_id == video_info['channel_id']
+        ))
+        channel = result.scalars().first()
         
-        if not transcript:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Could not get video transcript"
+        if not channel:
+            # User is not subscribed to this channel, so create a subscription
+            channel = Channel(
+                yt_channel_id=video_info['channel_id'],
+                user_id=current_user.id,
+                channel_title=video_info['channel_title'],
+                last_published_at=video_info['published_at']
             )
+            db.add(channel)
+            await db.commit()
+            await db.refresh(channel)
+            await feed_version.bump([current_user.id])
         
-        # Generate summary using AI
-        summary = await ai_service.generate_summary(transcript, video.title)
-        
-        # Generate mindmap
-        mindmap_url = await ai_service.generate_mindmap(summary)
+        # Check if the video is already processed
+        result = await db.execute(select(Video.id, Video.processed_at).where(
+            Video.video_id == youtube_video_id,
+            Video.channel_id == channel.id
+        ))
+        existing_video = result.first()
         
-        # Generate audio from summary
-        mp3_url = await ai_service.generate_audio(summary)
+        # Jobs are shared with the Celery workers, so job_service stays
+        # synchronous and runs on this session's connection via run_sync
+        if existing_video and existing_video.processed_at:
+            # Nothing to queue: answer with the video's latest job, failed
+            # ones included (e.g. at the email stage, after persisting)
+            job = await db.run_sync(job_service.get_latest_job, youtube_video_id)
+            if job:
+                return job
+            # Processed before jobs were recorded; recorded once from now on
+            return await db.run_sync(job_service.create_job, youtube_video_id, current_user.id, "skipped")
         
-        # Update video with results
-        video.summary_json = summary
-        video.transcript = transcript
-        video.mp3_url = mp3_url
-        video.mindmap_url = mindmap_url
-        video.processed_at = datetime.utcnow()
+        if not existing_video:
+            # Create a new video record
+            video = Video(
+                video_id=youtube_video_id,
+                channel_id=channel.id,
+                user_id=current_user.id,
+                title=video_info['title'],
+                description=video_info.get('description'),
+                published_at=video_info['published_at']
+            )
+            db.add(video)
+            await db.commit()
+            await feed_version.bump([current_user.id])
         
-        db.commit()
-        db.refresh(video)
+        # Another request may already be processing this video; its results are
+        # stored on every unprocessed row of the video, including this user's
+        job = await db.run_sync(job_service.get_active_job, youtube_video_id)
+        if job:
+            return job
         
-        return video
+        try:
+            job = await db.run_sync(
+                job_service.create_job, youtube_video_id, current_user.id, fence_token=fence_token, lane="interactive"
+            )
+        except processing_lock.LeaseLost:
+            # This request stalled past its lease and a later holder took over
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Video is being queued by another request, please retry"
+            )
+        start_processing(str(job.id), job.priority)
         
-    except Exception as e:
+        return job
+
+def _encode_cursor(video: Video) -> str:
+    # Opaque to clients: the sort key of the last video on the page
+    key = json.dumps([video.published_at.isoformat(), str(video.id)])
+    return base64.urlsafe_b64encode(key.encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: str) -> tuple:
+    try:
+        published_at, video_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(published_at), uuid.UUID(video_id)
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+def _parse_uuid(value: str, not_found_detail: str) -> uuid.UUID:
+    # A malformed ID can't match any row
+    try:
+        return uuid.UUID(value)
+    except ValueError:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error processing video: {str(e)}"
-        )
\ No newline at end of file
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=not_found_detail
+        )
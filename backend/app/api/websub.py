@@ -0,0 +1,81 @@
+import logging
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from xml.etree.ElementTree import ParseError
+
+from defusedxml import DefusedXmlException
+
+from ..database import get_async_db
+from ..config import get_settings
+from ..services import websub_service
+from ..utils import metrics
+from ..workers.tasks import ingest_pushed_videos
+
+router = APIRouter()
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Called by the WebSub hub, not by users: no authentication. Verification
+# only confirms subscriptions we requested, and notifications are checked
+# against the hub.secret signature.
+
+@router.get("/callback", response_class=PlainTextResponse)
+async def verify_subscription(
+    mode: str = Query(..., alias="hub.mode"),
+    topic: str = Query(..., alias="hub.topic"),
+    challenge: str = Query(..., alias="hub.challenge"),
+    lease_seconds: Optional[int] = Query(None, alias="hub.lease_seconds"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Confirm a (un)subscription request by echoing the hub's challenge
+    """
+    channel_id = websub_service.channel_id_from_topic(topic)
+
+    if not channel_id or not await db.run_sync(
+        websub_service.confirm_subscription, mode, channel_id, lease_seconds
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Unknown subscription"
+        )
+
+    logger.info(f"WebSub {mode} of channel {channel_id} verified")
+    return challenge
+
+@router.post("/callback", status_code=status.HTTP_204_NO_CONTENT)
+async def receive_notification(
+    request: Request,
+    x_hub_signature: Optional[str] = Header(None)
+):
+    """
+    Receive a pushed Atom feed and queue its videos for processing
+    """
+    parser = websub_service.NotificationParser(x_hub_signature)
+
+    try:
+        async for chunk in request.stream():
+            parser.feed(chunk)
+        entries = parser.close()
+    except websub_service.NotificationTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    except (ParseError, DefusedXmlException):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid Atom feed")
+
+    metrics.increment("websub.notifications")
+
+    # Per the WebSub spec a bad signature is acknowledged but ignored, so the
+    # sender can't probe for the secret
+    if not parser.signature_valid():
+        metrics.increment("websub.invalid_signatures")
+        logger.warning("Ignoring WebSub notification with an invalid signature")
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+    video_ids = list(dict.fromkeys(entry["video_id"] for entry in entries))
+    if video_ids:
+        ingest_pushed_videos.delay(video_ids)
+        metrics.increment("websub.videos_pushed", len(video_ids))
+
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
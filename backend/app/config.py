@@ -10,38 +10,130 @@ class Settings(BaseSettings):
     APP_NAME: str = "YouTube Summarizer"
     API_V1_PREFIX: str = "/api/v1"
     DEBUG: bool = os.getenv("DEBUG", "False").lower() == "true"
+    ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")  # "production" calls the paid AI APIs
     
     # JWT settings
     SECRET_KEY: str = "your-secret-key-here"  # In production, use a proper secret
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
     
+    # Authentication cache settings
+    AUTH_CACHE_SIZE: int = 10000
+    AUTH_CACHE_TTL_SECONDS: int = 30  # In-process tier; bounds cross-worker staleness
+    AUTH_CACHE_REDIS_ENABLED: bool = False  # Shared tier across workers
+    AUTH_CACHE_REDIS_TTL_SECONDS: int = 300
+    
+    # Feed cache settings (GET /videos/ and GET /channels/)
+    FEED_VERSION_TTL_SECONDS: int = 7 * 24 * 3600  # Idle feeds start a new version afterwards
+    FEED_CACHE_ENABLED: bool = False  # Serve unchanged feeds from Redis, not just 304s
+    FEED_CACHE_TTL_SECONDS: int = 600
+    
     # Database settings
     DATABASE_URL: str = ""
+    DB_POOL_SIZE: int = 10  # Connections kept open per process; bursts overflow up to CELERY_IO_CONCURRENCY
     
     # Google OAuth settings
     GOOGLE_CLIENT_ID: str = os.getenv("GOOGLE_CLIENT_ID", "")
     GOOGLE_CLIENT_SECRET: str = os.getenv("GOOGLE_CLIENT_SECRET", "")
     
+    # Outbound HTTP client settings
+    HTTP_HTTP2: bool = True
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0  # Seconds an idle connection is kept
+    HTTP_TIMEOUT: float = 10.0
+    HTTP_CONNECT_TIMEOUT: float = 5.0
+    
     # YouTube API settings
     YOUTUBE_API_KEY: str = os.getenv("YOUTUBE_API_KEY", "")
+    YOUTUBE_API_URL: str = os.getenv("YOUTUBE_API_URL", "https://www.googleapis.com")  # Or the local fake
+    
+    # Rate limits, shared by every process through Redis
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_MAX_WAIT_SECONDS: float = 30.0  # Calls that would wait longer are deferred
+    YOUTUBE_QUOTA_UNITS_PER_DAY: int = 10000  # Default YouTube Data API quota
+    YOUTUBE_QUOTA_BURST_UNITS: int = 500
+    OPENAI_TOKENS_PER_MINUTE: int = 90000
+    ELEVENLABS_CHARACTERS_PER_MINUTE: int = 50000
+    
+    # YouTube poller settings
+    YOUTUBE_POLL_INTERVAL_SECONDS: int = 120  # PRD: every 2 minutes per channel
+    YOUTUBE_POLL_CONCURRENCY: int = 20  # Uploads playlists fetched in parallel
+    YOUTUBE_POLL_MAX_RESULTS: int = 10  # Newest uploads checked per channel and cycle
+    
+    # Channel resolution cache settings (handle, username or ID -> channel)
+    CHANNEL_CACHE_SIZE: int = 10000
+    CHANNEL_CACHE_TTL_SECONDS: int = 3600  # In-process tier
+    CHANNEL_CACHE_REDIS_TTL_SECONDS: int = 7 * 24 * 3600
+    CHANNEL_CACHE_NEGATIVE_TTL_SECONDS: int = 300  # Channels not found, in both tiers
+    
+    # Video processing settings
+    PROCESSING_LEASE_TTL_SECONDS: float = 30.0  # Per-video lease; waiters take over after a holder died
+    PROCESSING_FRESH_WINDOW_SECONDS: int = 300  # PRD delivery SLO; older uploads are processed as backfill
+    PROCESSING_JOB_STALE_SECONDS: int = 3 * 3600  # Active jobs without progress for longer were lost with their worker
+    PROCESSING_REAP_INTERVAL_SECONDS: int = 600
+    
+    # Bulk channel import settings (POST /channels/bulk)
+    CHANNEL_IMPORT_MAX_CHANNELS: int = 1000
+    CHANNEL_IMPORT_MAX_BYTES: int = 1024 * 1024
+    CHANNEL_IMPORT_CONCURRENCY: int = 10  # Handles and URLs resolved in parallel
+    
+    # Transcript storage settings
+    TRANSCRIPT_RETENTION_DAYS: int = 30  # PRD: transcripts are deleted after 30 days
+    TRANSCRIPT_PURGE_INTERVAL_SECONDS: int = 3600
+    TRANSCRIPT_PURGE_BATCH_SIZE: int = 1000  # Rows deleted per transaction
+    TRANSCRIPT_ZSTD_LEVEL: int = 9
+    
+    # WebSub (push notifications of new uploads) settings
+    WEBSUB_ENABLED: bool = False  # Needs a callback URL the hub can reach
+    WEBSUB_HUB_URL: str = os.getenv("WEBSUB_HUB_URL", "https://pubsubhubbub.appspot.com/subscribe")
+    WEBSUB_CALLBACK_URL: str = os.getenv("WEBSUB_CALLBACK_URL", "")  # Public URL of /api/v1/websub/callback
+    WEBSUB_SECRET: str = os.getenv("WEBSUB_SECRET", "")  # Signs notifications (X-Hub-Signature)
+    WEBSUB_LEASE_SECONDS: int = 432000  # 5 days
+    WEBSUB_RENEW_INTERVAL_SECONDS: int = 3600
+    WEBSUB_RENEW_BEFORE_SECONDS: int = 86400  # Leases expiring sooner are renewed
+    WEBSUB_RECONCILE_INTERVAL_SECONDS: int = 3600  # Polling fallback while push is on
+    WEBSUB_MAX_NOTIFICATION_BYTES: int = 1024 * 1024
     
     # SendGrid settings
     SENDGRID_API_KEY: str = os.getenv("SENDGRID_API_KEY", "")
+    SENDGRID_API_URL: str = os.getenv("SENDGRID_API_URL", "https://api.sendgrid.com")  # Or the local fake
+    SENDGRID_REQUESTS_PER_MINUTE: int = 600  # mail/send rate limit
     EMAIL_SENDER: str = os.getenv("EMAIL_SENDER", "notifications@youtubesummarizer.com")
     
     # OpenAI settings
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
+    OPENAI_MODEL: str = os.getenv("OPENAI_MODEL", "gpt-4")
+    OPENAI_API_URL: str = os.getenv("OPENAI_API_URL", "")  # Local fake, e.g. http://localhost:3032/v1
+    SUMMARY_PROMPT_VERSION: str = "v2"  # Bump whenever the summary prompt changes
+    SUMMARY_CHUNK_TOKENS: int = 3000  # Transcript tokens per map step / merge input
+    SUMMARY_MAX_CONCURRENCY: int = 16  # Concurrent LLM calls per summary
     
     # ElevenLabs settings
     ELEVENLABS_API_KEY: str = os.getenv("ELEVENLABS_API_KEY", "")
     ELEVENLABS_VOICE_ID: str = os.getenv("ELEVENLABS_VOICE_ID", "")
+    ELEVENLABS_MODEL_ID: str = os.getenv("ELEVENLABS_MODEL_ID", "eleven_multilingual_v2")
+    ELEVENLABS_API_URL: str = os.getenv("ELEVENLABS_API_URL", "")  # Local fake, e.g. http://localhost:3033
+    
+    # Mind map settings
+    MINDMAP_VERSION: str = "v2"  # Bump whenever the mind map layout changes
+    MINDMAP_RENDER_WORKERS: int = 1  # Long-lived headless browsers per process; cpu worker children render one at a time
+    MINDMAP_RENDER_QUEUE_SIZE: int = 32  # Renders waiting beyond this block their caller
+    MINDMAP_RENDER_TIMEOUT_SECONDS: float = 30.0
     
     # S3 settings
     AWS_ACCESS_KEY_ID: str = os.getenv("AWS_ACCESS_KEY_ID", "")
     AWS_SECRET_ACCESS_KEY: str = os.getenv("AWS_SECRET_ACCESS_KEY", "")
     AWS_BUCKET_NAME: str = os.getenv("AWS_BUCKET_NAME", "")
     AWS_REGION: str = os.getenv("AWS_REGION", "us-east-1")
+    AWS_S3_ENDPOINT_URL: str = os.getenv("AWS_S3_ENDPOINT_URL", "")  # Local S3 stand-in, e.g. MinIO
+    S3_MULTIPART_PART_SIZE: int = 5 * 1024 * 1024  # S3 minimum for all but the last part
+    
+    # Observability settings
+    TRACING_ENABLED: bool = False  # Exports to the OTLP endpoint of OTEL_EXPORTER_OTLP_ENDPOINT
+    TRACING_SERVICE_NAME: str = "summarizer"  # Spans come from "<name>-api" and "<name>-worker"
+    TRACING_SAMPLE_RATIO: float = 1.0
+    WORKER_METRICS_PORT: int = 9808  # Celery worker /metrics; 0 disables it
     
     # Redis settings
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
@@ -49,6 +141,12 @@ class Settings(BaseSettings):
     # Celery settings
     CELERY_BROKER_URL: str = os.getenv("CELERY_BROKER_URL", REDIS_URL)
     CELERY_RESULT_BACKEND: str = os.getenv("CELERY_RESULT_BACKEND", REDIS_URL)
+    # Pool and concurrency of the workers serving each queue
+    # (python -m app.workers.worker <queue>)
+    CELERY_IO_POOL: str = os.getenv("CELERY_IO_POOL", "threads")  # Waiting on external APIs
+    CELERY_IO_CONCURRENCY: int = 200
+    CELERY_CPU_POOL: str = os.getenv("CELERY_CPU_POOL", "prefork")  # Mind map rendering
+    CELERY_CPU_CONCURRENCY: int = os.cpu_count() or 1
     
     class Config:
         env_file = ".env"
@@ -1,18 +1,23 @@
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.asyncio import AsyncEngine
 
 from .config import get_settings
 
 settings = get_settings()
 
-# Create an engine instance
+# Create an engine instance. Every thread of an I/O worker can get a
+# connection; tasks only hold one around their queries (never through an
+# external call), so most of the overflow stays unopened. Past Postgres's
+# max_connections, put a pooler such as PgBouncer in front.
 engine = create_engine(
     settings.DATABASE_URL.replace("postgresql+asyncpg", "postgresql"),
     echo=settings.DEBUG,
-    pool_pre_ping=True
+    pool_pre_ping=True,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=max(0, settings.CELERY_IO_CONCURRENCY - settings.DB_POOL_SIZE)
 )
 
 # Create async engine instance
@@ -24,11 +29,13 @@ async_engine = create_async_engine(
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-AsyncSessionLocal = sessionmaker(
-    autocommit=False,
+# Objects stay usable after commit: lazy refreshes can't run implicitly
+# under asyncio
+AsyncSessionLocal = async_sessionmaker(
     autoflush=False,
     bind=async_engine,
-    class_=AsyncSession
+    class_=AsyncSession,
+    expire_on_commit=False
 )
 
 # Create a Base class
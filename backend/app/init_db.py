@@ -0,0 +1,78 @@
+"""
+Create the database tables and upgrade existing ones
+
+Run once per deploy, before the API and workers start, instead of on every
+API boot:
+    python -m app.init_db
+"""
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import inspect, text
+
+from .config import get_settings
+from .database import Base, SessionLocal, engine
+from . import models  # noqa: F401 - registers the tables on Base.metadata
+from .services import transcript_service
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Changes to tables that already existed, which create_all() leaves alone.
+# Every statement is idempotent (Postgres), so they run on every deploy; add
+# new ones at the end.
+UPGRADES = [
+    # Channel and video feed indexes
+    "CREATE INDEX IF NOT EXISTS ix_channels_user_id_id ON channels (user_id, id)",
+    "CREATE INDEX IF NOT EXISTS ix_videos_channel_id_published_at_id ON videos (channel_id, published_at DESC, id DESC)",
+    # Stage timings of the job that processed a video
+    "ALTER TABLE videos ADD COLUMN IF NOT EXISTS stage_timings JSON",
+    # Transcripts moved to video_transcripts (see _move_transcripts)
+    "ALTER TABLE videos DROP COLUMN IF EXISTS transcript",
+    # Processing lease fencing and scheduling lanes
+    "ALTER TABLE processing_jobs ADD COLUMN IF NOT EXISTS fence_token BIGINT",
+    "ALTER TABLE processing_jobs ADD COLUMN IF NOT EXISTS lane VARCHAR",
+    "ALTER TABLE processing_jobs ADD COLUMN IF NOT EXISTS tenant VARCHAR",
+    "ALTER TABLE processing_jobs ADD COLUMN IF NOT EXISTS priority INTEGER",
+    "CREATE INDEX IF NOT EXISTS ix_processing_jobs_tenant ON processing_jobs (tenant)",
+    # The feed is read per user, from a denormalized videos.user_id
+    "ALTER TABLE videos ADD COLUMN IF NOT EXISTS user_id UUID REFERENCES users (id)",
+    "UPDATE videos SET user_id = channels.user_id FROM channels WHERE videos.channel_id = channels.id AND videos.user_id IS NULL",
+    "CREATE INDEX IF NOT EXISTS ix_videos_user_id_published_at_id ON videos (user_id, published_at DESC, id DESC)",
+]
+
+def init_db() -> None:
+    """
+    Create every table that doesn't exist yet, then apply UPGRADES
+    """
+    Base.metadata.create_all(bind=engine)
+    _move_transcripts()
+
+    with engine.begin() as connection:
+        for statement in UPGRADES:
+            connection.execute(text(statement))
+
+    logger.info("Database tables are up to date")
+
+def _move_transcripts() -> None:
+    # Raw transcripts still on videos rows are stored compressed, once per
+    # video, unless they are past retention anyway; UPGRADES drops the column
+    if "transcript" not in {column["name"] for column in inspect(engine).get_columns("videos")}:
+        return
+
+    since = datetime.utcnow() - timedelta(days=settings.TRANSCRIPT_RETENTION_DAYS)
+
+    with SessionLocal() as db:
+        rows = db.execute(text(
+            "SELECT DISTINCT ON (video_id) video_id, transcript FROM videos "
+            "WHERE transcript IS NOT NULL AND created_at >= :since ORDER BY video_id, created_at DESC"
+        ), {"since": since}).all()
+
+        for row in rows:
+            transcript_service.store(db, row.video_id, row.transcript)
+
+    logger.info(f"Moved {len(rows)} transcripts to video_transcripts")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    init_db()
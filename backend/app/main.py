@@ -1,23 +1,38 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+import asyncio
+import logging
+import time
+from fastapi import FastAPI, Depends, HTTPException, Request, Response, status
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from .config import get_settings
-from .api import auth, users, channels, videos
-from .database import Base, engine
+from .api import auth, users, channels, videos, websub
+from .services.http_client import get_http_client, close_http_client
+from .services import rate_limiter
+from .services.rate_limiter import RateLimitExceeded
+from .services.redis_client import close_redis
+from .database import async_engine
+from .utils import metrics
+from .utils.tracing import setup_tracing, shutdown_tracing
+from .workers.celery_app import queue_lengths
 
 # Create instance of settings
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
 # Create the FastAPI app
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup code (runs before serving requests)
-    # Create database tables
-    Base.metadata.create_all(bind=engine)
+    # Tables are created by `python -m app.init_db` before deploys, not here
+    # Open the shared outbound HTTP connection pool
+    get_http_client()
     yield
     # Shutdown code (runs when shutting down)
-    pass
+    await close_http_client()
+    await close_redis()
+    shutdown_tracing()
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -27,6 +42,25 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+setup_tracing("api", app)
+
+@app.middleware("http")
+async def record_request_duration(request: Request, call_next):
+    started = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        # Labeled by route template, so /videos/{video_id} is one series
+        route = request.scope.get("route")
+        metrics.observe("http.request_duration_seconds", time.perf_counter() - started, {
+            "method": request.method,
+            "route": route.path if route else "unmatched",
+            "status": status_code
+        })
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -36,6 +70,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(RateLimitExceeded)
+async def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded):
+    # Out of upstream API budget: tell the client when to come back
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Upstream API quota exhausted, please retry later"},
+        headers={"Retry-After": str(max(1, round(exc.retry_after)))}
+    )
+
 # Include API routers
 app.include_router(
     auth.router,
@@ -57,6 +100,11 @@ app.include_router(
     prefix=f"{settings.API_V1_PREFIX}/videos",
     tags=["Videos"]
 )
+app.include_router(
+    websub.router,
+    prefix=f"{settings.API_V1_PREFIX}/websub",
+    tags=["WebSub"]
+)
 
 @app.get("/", tags=["Root"])
 async def root():
@@ -64,4 +112,20 @@ async def root():
 
 @app.get("/healthcheck", tags=["Health"])
 async def healthcheck():
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok"}
+
+@app.get("/metrics", tags=["Health"])
+async def get_metrics():
+    # Refresh the values that change without any call: provider budgets,
+    # queue depths and the DB pool
+    for provider in rate_limiter.limits():
+        await rate_limiter.remaining(provider)
+    try:
+        for queue, length in (await asyncio.to_thread(queue_lengths)).items():
+            metrics.set_gauge("celery.queue_length", length, {"queue": queue})
+    except Exception as e:
+        logger.warning(f"Could not read queue lengths: {str(e)}")
+    metrics.record_pool("async", async_engine.pool)
+
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
\ No newline at end of file
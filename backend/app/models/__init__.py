@@ -1 +1 @@
-from .models import User, Channel, Video
\ No newline at end of file
+from .models import User, Channel, Video, ProcessingFence, ProcessingJob, VideoArtifact, VideoTranscript, WebSubSubscription
\ No newline at end of file
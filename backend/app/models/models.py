@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime, ForeignKey, Text, JSON, Boolean
+from sqlalchemy import BigInteger, Column, String, DateTime, ForeignKey, Text, JSON, Boolean, Index, Integer, LargeBinary
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -34,12 +34,18 @@ class Channel(Base):
     user = relationship("User", back_populates="channels")
     videos = relationship("Video", back_populates="channel")
     
+    # A user's channels are found by user_id
+    __table_args__ = (
+        Index("ix_channels_user_id_id", user_id, id),
+    )
+    
 class Video(Base):
     __tablename__ = "videos"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     video_id = Column(String, index=True)
     channel_id = Column(UUID(as_uuid=True), ForeignKey("channels.id"))
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"))  # The channel's user, copied for the feed index
     title = Column(String)
     description = Column(Text, nullable=True)
     published_at = Column(DateTime)
@@ -47,9 +53,73 @@ class Video(Base):
     summary_json = Column(JSON, nullable=True)
     mp3_url = Column(String, nullable=True)
     mindmap_url = Column(String, nullable=True)
-    transcript = Column(Text, nullable=True)
+    stage_timings = Column(JSON, nullable=True)  # Per-stage durations, outcomes and critical path
     sent_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    channel = relationship("Channel", back_populates="videos")
\ No newline at end of file
+    channel = relationship("Channel", back_populates="videos")
+    
+    # Keyset pagination of the video feed walks (published_at, id) per user,
+    # or per channel when filtered by channel; either index returns the rows
+    # in feed order, so a page reads only its own rows
+    __table_args__ = (
+        Index("ix_videos_user_id_published_at_id", user_id, published_at.desc(), id.desc()),
+        Index("ix_videos_channel_id_published_at_id", channel_id, published_at.desc(), id.desc()),
+    )
+
+class ProcessingJob(Base):
+    __tablename__ = "processing_jobs"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    video_id = Column(String, index=True)  # YouTube video ID
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)  # None for background jobs
+    status = Column(String, default="queued")  # queued, running, succeeded, failed or skipped (processed before jobs were recorded)
+    stages = Column(JSON, nullable=True)  # Per-stage state and timings
+    error = Column(Text, nullable=True)
+    fence_token = Column(BigInteger, nullable=True)  # Processing lease token of the job's creator, see ProcessingFence
+    lane = Column(String, nullable=True)  # Scheduling lane: interactive, fresh or backfill
+    tenant = Column(String, nullable=True, index=True)  # "user:<id>" or "channel:<id>", shared fairly within a lane
+    priority = Column(Integer, nullable=True)  # Broker priority of the pipeline's messages, 0 first
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+class ProcessingFence(Base):
+    __tablename__ = "processing_fences"
+    
+    video_id = Column(String, primary_key=True)  # YouTube video ID
+    fence_token = Column(BigInteger, nullable=False)  # Newest processing lease token that created a job
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class VideoArtifact(Base):
+    __tablename__ = "video_artifacts"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    cache_key = Column(String, unique=True, index=True)
+    kind = Column(String)  # summary, mindmap or audio
+    video_id = Column(String, index=True)  # YouTube video ID, shared by all users
+    payload = Column(JSON)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class VideoTranscript(Base):
+    __tablename__ = "video_transcripts"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    video_id = Column(String, unique=True, index=True)  # YouTube video ID, shared by all users
+    data = Column(LargeBinary)  # Compressed transcript text
+    codec = Column(String, default="zstd")
+    size = Column(Integer)  # Uncompressed size in bytes
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+class WebSubSubscription(Base):
+    __tablename__ = "websub_subscriptions"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    yt_channel_id = Column(String, unique=True, index=True)  # One hub subscription per channel, shared by all users
+    status = Column(String, default="pending")  # pending until the hub verifies it, then active; unsubscribing until the hub verifies that
+    requested_at = Column(DateTime, nullable=True)
+    verified_at = Column(DateTime, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,40 +1,95 @@
+import asyncio
 import logging
 import json
-import os
-import io
+import re
 import uuid
 from typing import Dict, Optional, Any, List
-import openai
-import boto3
-import httpx
-import subprocess
-import pymermaid
-from elevenlabs import ElevenLabs
 
 from ..config import get_settings
+from ..utils.tracing import external_call
+from . import mindmap_renderer, rate_limiter, storage_service
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
-# Configure API keys
-openai.api_key = settings.OPENAI_API_KEY
+# API clients, created on first use: the openai and elevenlabs packages
+# take most of this module's import time and only production workers call them
+_openai_client = None
+_eleven_labs = None
 
-# Initialize ElevenLabs client with API key
-eleven_labs = ElevenLabs(api_key=settings.ELEVENLABS_API_KEY)
+def get_openai_client():
+    """
+    Get the OpenAI client of this process, creating it on first use
+    """
+    global _openai_client
+    
+    if _openai_client is None:
+        import openai
+        
+        _openai_client = openai.AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            base_url=settings.OPENAI_API_URL or None
+        )
+    
+    return _openai_client
+
+def get_eleven_labs_client():
+    """
+    Get the ElevenLabs client of this process, creating it on first use
+    """
+    global _eleven_labs
+    
+    if _eleven_labs is None:
+        from elevenlabs import AsyncElevenLabs
+        from elevenlabs.environment import ElevenLabsEnvironment
+        
+        environment = ElevenLabsEnvironment.PRODUCTION
+        if settings.ELEVENLABS_API_URL:
+            environment = ElevenLabsEnvironment(base=settings.ELEVENLABS_API_URL, wss=settings.ELEVENLABS_API_URL)
+        
+        _eleven_labs = AsyncElevenLabs(api_key=settings.ELEVENLABS_API_KEY, environment=environment)
+    
+    return _eleven_labs
 
-# Configure S3 client for file storage
-s3_client = boto3.client(
-    's3',
-    aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-    region_name=settings.AWS_REGION
-)
+def reset_clients() -> None:
+    """
+    Forget clients inherited from a parent process without closing them
+    
+    Call this right after fork: their connection pools belong to the parent.
+    """
+    global _openai_client, _eleven_labs
+    _openai_client = None
+    _eleven_labs = None
+
+# Tokens reserved for each completion, on top of its prompt
+SUMMARY_OUTPUT_TOKENS = 1000
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+
+SUMMARY_FORMAT = """
+        Format the response as a JSON object with the following structure:
+        {
+            "main_points": [
+                { "point": "First main point", "explanation": "Brief explanation" },
+                ...
+            ],
+            "summary": "Full summary text with multiple paragraphs",
+            "key_concepts": [
+                { "concept": "Concept name", "explanation": "Concept explanation" },
+                ...
+            ]
+        }
+"""
 
 async def generate_summary(transcript: str, title: str) -> Dict[str, Any]:
     """
     Generate a structured summary of the video transcript using OpenAI
     
-    For MVP, we'll keep this simple with a few key sections
+    The full transcript is summarized map-reduce style: it is split into
+    chunks on sentence boundaries, the chunks are summarized concurrently
+    (at most SUMMARY_MAX_CONCURRENCY at a time), and the partial summaries
+    are merged level by level into one. Latency is roughly the slowest chunk
+    plus the merge levels instead of the sum of all chunks.
     
     Args:
         transcript: Full transcript of the video
@@ -44,72 +99,190 @@ async def generate_summary(transcript: str, title: str) -> Dict[str, Any]:
         dict: Structured summary with key sections
     """
     try:
-        # For MVP, we'll use a simpler version that will be enhanced later
-        prompt = f"""
-        Video Title: {title}
+        semaphore = asyncio.Semaphore(settings.SUMMARY_MAX_CONCURRENCY)
+        chunks = chunk_transcript(transcript, settings.SUMMARY_CHUNK_TOKENS)
         
-        Transcript: 
-        {transcript[:4000]}...
+        # A transcript that fits in one chunk needs no merge step
+        if len(chunks) <= 1:
+            return await _summarize_chunk(semaphore, title, transcript, 1, 1)
         
-        Please provide a comprehensive summary of this video with the following sections:
-        1. Main Points (list the 3-5 key takeaways)
-        2. Summary (2-3 paragraphs summarizing the content)
-        3. Key Concepts (list and briefly explain 3-5 important concepts from the video)
-        
-        Format the response as a JSON object with the following structure:
-        {{
-            "main_points": [
-                {{ "point": "First main point", "explanation": "Brief explanation" }},
-                ...
-            ],
-            "summary": "Full summary text with multiple paragraphs",
-            "key_concepts": [
-                {{ "concept": "Concept name", "explanation": "Concept explanation" }},
-                ...
-            ]
-        }}
-        """
-        
-        # For MVP, we'll use a mock response to avoid OpenAI costs
-        # In production, use this instead:
-        """
-        response = await openai.ChatCompletion.acreate(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant that summarizes YouTube videos."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.5,
-        )
-        summary = json.loads(response.choices[0].message.content)
-        """
+        # Map: summarize every chunk concurrently
+        partials = await asyncio.gather(*(
+            _summarize_chunk(semaphore, title, chunk, index + 1, len(chunks))
+            for index, chunk in enumerate(chunks)
+        ))
         
-        # Mock response for MVP
-        summary = {
-            "main_points": [
-                {"point": "First main point", "explanation": "Brief explanation of the first point"},
-                {"point": "Second main point", "explanation": "Brief explanation of the second point"},
-                {"point": "Third main point", "explanation": "Brief explanation of the third point"}
-            ],
-            "summary": f"This is a summary of the video titled '{title}'. The video discusses important topics and provides valuable insights. This is the first paragraph of the summary.\n\nThis is the second paragraph of the summary, adding more details and context about the video content.",
-            "key_concepts": [
-                {"concept": "First concept", "explanation": "Explanation of the first concept"},
-                {"concept": "Second concept", "explanation": "Explanation of the second concept"},
-                {"concept": "Third concept", "explanation": "Explanation of the third concept"}
-            ]
-        }
+        # Reduce: merge groups of partial summaries until one remains
+        while len(partials) > 1:
+            groups = _group_summaries(partials, settings.SUMMARY_CHUNK_TOKENS)
+            partials = await asyncio.gather(*(
+                _merge_summaries(semaphore, title, group) for group in groups
+            ))
         
-        return summary
+        return partials[0]
         
+    except rate_limiter.RateLimitExceeded:
+        # Deferred, not failed: the caller retries once budget is back
+        raise
     except Exception as e:
         logger.error(f"Error generating summary: {str(e)}")
-        # Return a basic structure in case of error
+        # Return a basic structure in case of error, flagged so it is not cached
         return {
+            "error": True,
             "main_points": [{"point": "Error generating summary", "explanation": "Please try again later"}],
             "summary": "There was an error generating the summary for this video.",
             "key_concepts": [{"concept": "Error", "explanation": "Please try again later"}]
         }
 
+def chunk_transcript(transcript: str, max_tokens: int) -> List[str]:
+    """
+    Split a transcript into chunks of at most max_tokens
+    
+    Chunks break between caption segments (lines) and sentences; only a
+    single sentence longer than max_tokens is split between words.
+    
+    Args:
+        transcript: Full transcript
+        max_tokens: Token budget per chunk
+        
+    Returns:
+        list: Transcript chunks, in order
+    """
+    sentences = [
+        sentence
+        for segment in transcript.splitlines()
+        for sentence in SENTENCE_BOUNDARY.split(segment.strip())
+        if sentence
+    ]
+    
+    chunks = []
+    current = []
+    current_tokens = 0
+    
+    for sentence in sentences:
+        for piece in _split_long(sentence, max_tokens):
+            tokens = estimate_tokens(piece)
+            if current and current_tokens + tokens > max_tokens:
+                chunks.append(" ".join(current))
+                current = []
+                current_tokens = 0
+            current.append(piece)
+            current_tokens += tokens
+    
+    if current:
+        chunks.append(" ".join(current))
+    
+    return chunks
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of LLM tokens of a text (about 4 characters per
+    token for English)
+    """
+    return len(text) // 4 + 1
+
+def _split_long(sentence: str, max_tokens: int) -> List[str]:
+    if estimate_tokens(sentence) <= max_tokens:
+        return [sentence]
+    
+    words = sentence.split()
+    words_per_piece = max(1, max_tokens * 4 // 6)  # ~6 characters per word with its space
+    return [" ".join(words[i:i + words_per_piece]) for i in range(0, len(words), words_per_piece)]
+
+def _group_summaries(summaries: List[Dict[str, Any]], max_tokens: int) -> List[List[Dict[str, Any]]]:
+    # Pack consecutive summaries into merge groups within the token budget,
+    # at least two per group so every level shrinks
+    groups = []
+    current = []
+    current_tokens = 0
+    
+    for summary in summaries:
+        tokens = estimate_tokens(json.dumps(summary))
+        if len(current) >= 2 and current_tokens + tokens > max_tokens:
+            groups.append(current)
+            current = []
+            current_tokens = 0
+        current.append(summary)
+        current_tokens += tokens
+    
+    if current:
+        # A trailing single summary joins the previous group
+        if len(current) == 1 and groups:
+            groups[-1].extend(current)
+        else:
+            groups.append(current)
+    
+    return groups
+
+async def _summarize_chunk(semaphore: asyncio.Semaphore, title: str, chunk: str, part: int, parts: int) -> Dict[str, Any]:
+    scope = "this video" if parts == 1 else f"part {part} of {parts} of this video"
+    prompt = f"""
+        Video Title: {title}
+        
+        Transcript{'' if parts == 1 else f' (part {part} of {parts})'}: 
+        {chunk}
+        
+        Please provide a comprehensive summary of {scope} with the following sections:
+        1. Main Points (list the 3-5 key takeaways)
+        2. Summary (2-3 paragraphs summarizing the content)
+        3. Key Concepts (list and briefly explain 3-5 important concepts from the video)
+        {SUMMARY_FORMAT}
+        """
+    
+    async with semaphore:
+        return await _complete_json(prompt, title)
+
+async def _merge_summaries(semaphore: asyncio.Semaphore, title: str, summaries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    partials = "\n\n".join(
+        f"Part {index + 1}:\n{json.dumps(summary)}" for index, summary in enumerate(summaries)
+    )
+    prompt = f"""
+        Video Title: {title}
+        
+        Below are summaries of consecutive parts of this video, in order:
+        {partials}
+        
+        Combine them into a single summary of the whole video with the following sections:
+        1. Main Points (the 3-5 most important takeaways across all parts)
+        2. Summary (2-3 paragraphs covering the whole video)
+        3. Key Concepts (the 3-5 most important concepts across all parts)
+        {SUMMARY_FORMAT}
+        """
+    
+    async with semaphore:
+        return await _complete_json(prompt, title)
+
+async def _complete_json(prompt: str, title: str) -> Dict[str, Any]:
+    if settings.ENVIRONMENT == "production":
+        # Budget for the prompt plus a full-size answer
+        await rate_limiter.acquire("openai", cost=estimate_tokens(prompt) + SUMMARY_OUTPUT_TOKENS)
+        with external_call("openai", "chat.completions", {"app.model": settings.OPENAI_MODEL}):
+            response = await get_openai_client().chat.completions.create(
+                model=settings.OPENAI_MODEL,
+                messages=[
+                    {"role": "system", "content": "You are a helpful assistant that summarizes YouTube videos."},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.5,
+                response_format={"type": "json_object"},
+            )
+        return json.loads(response.choices[0].message.content)
+    
+    # Mock response for MVP or development environment, to avoid OpenAI costs
+    return {
+        "main_points": [
+            {"point": "First main point", "explanation": "Brief explanation of the first point"},
+            {"point": "Second main point", "explanation": "Brief explanation of the second point"},
+            {"point": "Third main point", "explanation": "Brief explanation of the third point"}
+        ],
+        "summary": f"This is a summary of the video titled '{title}'. The video discusses important topics and provides valuable insights. This is the first paragraph of the summary.\n\nThis is the second paragraph of the summary, adding more details and context about the video content.",
+        "key_concepts": [
+            {"concept": "First concept", "explanation": "Explanation of the first concept"},
+            {"concept": "Second concept", "explanation": "Explanation of the second concept"},
+            {"concept": "Third concept", "explanation": "Explanation of the third concept"}
+        ]
+    }
+
 async def generate_mindmap(summary: Dict[str, Any]) -> Optional[str]:
     """
     Generate a mind map from the summary and upload it to S3
@@ -121,51 +294,16 @@ async def generate_mindmap(summary: Dict[str, Any]) -> Optional[str]:
         str: URL to the generated mind map image
     """
     try:
-        # Create mermaid markdown for the mindmap
-        mindmap_md = "mindmap\n"
-        mindmap_md += f"  root({summary.get('main_points', [])[0].get('point', 'Video Summary')})\n"
-        
-        # Add main points
-        for i, point in enumerate(summary.get('main_points', [])):
-            indent = "    "
-            point_text = point.get('point', f"Point {i+1}")
-            mindmap_md += f"{indent}{i+1}[{point_text}]\n"
-            
-            # Add key concepts under each point (simplified for MVP)
-            if i < len(summary.get('key_concepts', [])):
-                concept = summary.get('key_concepts', [])[i]
-                concept_text = concept.get('concept', f"Concept {i+1}")
-                mindmap_md += f"{indent}  {i+1}.1({concept_text})\n"
+        mindmap_md = build_mindmap_source(summary)
         
         # For production use:
         if settings.ENVIRONMENT == "production":
-            # Generate the mind map using pymermaid
-            # Create a temp file for the mermaid diagram
-            temp_file = f"/tmp/mindmap_{uuid.uuid4()}.mmd"
-            with open(temp_file, "w") as f:
-                f.write(mindmap_md)
-            
-            # Generate image using pymermaid
-            output_file = f"/tmp/mindmap_{uuid.uuid4()}.png"
-            pymermaid.render(temp_file, output_file)
+            # Render in memory on the process's pool of warm renderers
+            png = await mindmap_renderer.get_render_pool().render(mindmap_md)
             
             # Upload to S3
             file_key = f"mindmaps/{uuid.uuid4()}.png"
-            with open(output_file, 'rb') as f:
-                s3_client.upload_fileobj(
-                    f,
-                    settings.AWS_BUCKET_NAME,
-                    file_key,
-                    ExtraArgs={'ContentType': 'image/png'}
-                )
-            
-            # Clean up temp files
-            os.remove(temp_file)
-            os.remove(output_file)
-            
-            # Generate URL
-            url = f"https://{settings.AWS_BUCKET_NAME}.s3.{settings.AWS_REGION}.amazonaws.com/{file_key}"
-            return url
+            return await storage_service.upload_bytes(png, file_key, "image/png")
         
         # Mock URL for MVP or development environment
         url = f"https://example.com/mindmap-{hash(json.dumps(summary))}.png"
@@ -175,6 +313,42 @@ async def generate_mindmap(summary: Dict[str, Any]) -> Optional[str]:
         logger.error(f"Error generating mindmap: {str(e)}")
         return None
 
+def build_mindmap_source(summary: Dict[str, Any]) -> str:
+    """
+    Build the Mermaid source of a summary's mind map
+    
+    The map is drawn as a left-to-right flowchart: the mermaid.js bundled
+    with pymermaid (8.x) predates the dedicated mindmap diagram type.
+    
+    Args:
+        summary: Structured summary from generate_summary()
+        
+    Returns:
+        str: Mermaid diagram source
+    """
+    main_points = summary.get('main_points', [])
+    key_concepts = summary.get('key_concepts', [])
+    
+    root_text = main_points[0].get('point', 'Video Summary') if main_points else 'Video Summary'
+    mindmap_md = "graph LR\n"
+    mindmap_md += f"  root((\"{_mermaid_label(root_text)}\"))\n"
+    
+    # Add main points
+    for i, point in enumerate(main_points):
+        point_text = point.get('point', f"Point {i+1}")
+        mindmap_md += f"  root --> p{i+1}[\"{_mermaid_label(point_text)}\"]\n"
+        
+        # Add key concepts under each point (simplified for MVP)
+        if i < len(key_concepts):
+            concept_text = key_concepts[i].get('concept', f"Concept {i+1}")
+            mindmap_md += f"  p{i+1} --> c{i+1}(\"{_mermaid_label(concept_text)}\")\n"
+    
+    return mindmap_md
+
+def _mermaid_label(text: str) -> str:
+    # Quotes would end a quoted Mermaid label early
+    return text.replace('"', '#quot;')
+
 async def generate_audio(summary: Dict[str, Any]) -> Optional[str]:
     """
     Generate audio narration from the summary and upload it to S3
@@ -198,34 +372,30 @@ async def generate_audio(summary: Dict[str, Any]) -> Optional[str]:
         # Add summary text
         narration_text += f"Summary: {summary.get('summary', '')}. "
         
-        # For MVP, we'll simulate generating audio and return a mock URL
-        # In production, you'd use:
-        """
-        # Generate audio using ElevenLabs
-        audio = eleven_labs.generate(
-            text=narration_text,
-            voice=settings.ELEVENLABS_VOICE_ID,
-            model="eleven_multilingual_v2"
-        )
-        
-        # Upload to S3
-        file_key = f"audio/{uuid.uuid4()}.mp3"
-        s3_client.upload_fileobj(
-            io.BytesIO(b''.join(audio)),
-            settings.AWS_BUCKET_NAME,
-            file_key,
-            ExtraArgs={'ContentType': 'audio/mpeg'}
-        )
-        
-        # Generate URL (adjust based on your S3 configuration)
-        url = f"https://{settings.AWS_BUCKET_NAME}.s3.{settings.AWS_REGION}.amazonaws.com/{file_key}"
-        """
+        # For production use:
+        if settings.ENVIRONMENT == "production":
+            await rate_limiter.acquire("elevenlabs", cost=len(narration_text))
+            
+            # Stream the synthesized MP3 into S3 as it is generated instead
+            # of buffering the whole file in memory
+            # Spans the whole synthesis, which the upload consumes as it streams
+            with external_call("elevenlabs", "text_to_speech.stream", {"app.characters": len(narration_text)}):
+                audio_stream = get_eleven_labs_client().text_to_speech.convert_as_stream(
+                    voice_id=settings.ELEVENLABS_VOICE_ID,
+                    text=narration_text,
+                    model_id=settings.ELEVENLABS_MODEL_ID
+                )
+                
+                file_key = f"audio/{uuid.uuid4()}.mp3"
+                return await storage_service.upload_stream(audio_stream, file_key, "audio/mpeg")
         
         # Mock URL for MVP
         url = f"https://example.com/audio-{hash(json.dumps(summary))}.mp3"
         
         return url
         
+    except rate_limiter.RateLimitExceeded:
+        raise
     except Exception as e:
         logger.error(f"Error generating audio: {str(e)}")
         return None
\ No newline at end of file
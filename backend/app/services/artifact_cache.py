@@ -0,0 +1,118 @@
+import hashlib
+import logging
+from typing import Any, Awaitable, Callable, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..config import get_settings
+from ..models import VideoArtifact
+from ..utils import metrics
+from ..utils.event_loop import run_async
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Artifacts are shared across users: the key covers everything that changes
+# the output, so identical inputs always resolve to the same entry and a
+# prompt, model or voice change only misses for the artifacts it affects.
+
+def summary_key(video_id: str, transcript: str) -> str:
+    """
+    Cache key of a video summary
+    
+    Args:
+        video_id: YouTube video ID
+        transcript: Transcript the summary is generated from
+        
+    Returns:
+        str: Content-addressed key
+    """
+    transcript_hash = hashlib.sha256(transcript.encode("utf-8")).hexdigest()
+    return _hash("summary", video_id, transcript_hash, settings.SUMMARY_PROMPT_VERSION, settings.OPENAI_MODEL)
+
+def mindmap_key(summary_cache_key: str) -> str:
+    """
+    Cache key of the mind map rendered from a cached summary
+    """
+    return _hash("mindmap", summary_cache_key, settings.MINDMAP_VERSION)
+
+def audio_key(summary_cache_key: str) -> str:
+    """
+    Cache key of the audio narration of a cached summary
+    """
+    return _hash("audio", summary_cache_key, settings.ELEVENLABS_VOICE_ID, settings.ELEVENLABS_MODEL_ID)
+
+def get(db: Session, cache_key: str, kind: str) -> Optional[Any]:
+    """
+    Look up a cached artifact and count the hit or miss
+    
+    Args:
+        db: Database session
+        cache_key: Key from summary_key(), mindmap_key() or audio_key()
+        kind: Artifact kind (summary, mindmap or audio)
+        
+    Returns:
+        The cached payload or None
+    """
+    artifact = db.query(VideoArtifact.payload).filter(VideoArtifact.cache_key == cache_key).first()
+    
+    metrics.increment(f"artifact_cache.{kind}.{'hits' if artifact else 'misses'}")
+    
+    return artifact.payload if artifact else None
+
+def put(db: Session, cache_key: str, kind: str, video_id: str, payload: Any) -> None:
+    """
+    Store an artifact; a concurrent writer of the same key wins silently
+    """
+    db.add(VideoArtifact(cache_key=cache_key, kind=kind, video_id=video_id, payload=payload))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+
+def get_or_create(
+    db: Session,
+    cache_key: str,
+    kind: str,
+    video_id: str,
+    factory: Callable[[], Awaitable[Any]]
+) -> Any:
+    """
+    Return a cached artifact, generating and storing it on a miss
+    
+    Failed generations (None or a payload flagged with "error") are returned
+    but not cached, so the next request retries them. The session's
+    transaction is ended before generating: its connection goes back to the
+    pool instead of idling in transaction through the provider calls, and
+    the payload is stored on a fresh one.
+    
+    Called from a worker thread: the lookups and the insert block that
+    thread only, and just the factory runs on the shared event loop.
+    
+    Args:
+        db: Database session
+        cache_key: Artifact cache key
+        kind: Artifact kind (summary, mindmap or audio)
+        video_id: YouTube video ID the artifact belongs to
+        factory: Coroutine function generating the artifact, run with run_async()
+        
+    Returns:
+        The artifact payload
+    """
+    payload = get(db, cache_key, kind)
+    if payload is not None:
+        return payload
+    
+    db.commit()
+    payload = run_async(factory())
+    
+    if payload is None or (isinstance(payload, dict) and payload.get("error")):
+        logger.error(f"Not caching failed {kind} artifact for video {video_id}")
+        return payload
+    
+    put(db, cache_key, kind, video_id, payload)
+    return payload
+
+def _hash(*parts: str) -> str:
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
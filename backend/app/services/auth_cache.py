@@ -0,0 +1,103 @@
+import json
+import logging
+import uuid
+from dataclasses import dataclass, asdict
+from typing import Optional
+
+from cachetools import TTLCache
+from redis.exceptions import RedisError
+
+from ..config import get_settings
+from ..models import User
+from ..utils import metrics
+from .redis_client import get_redis
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    The authenticated user as seen by request handlers
+    
+    A plain value rather than an ORM object, so it can be cached across
+    requests and database sessions. Load the User row to modify it.
+    """
+    id: uuid.UUID
+    email: str
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    is_active: bool = True
+    
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            first_name=user.first_name,
+            last_name=user.last_name,
+            is_active=user.is_active
+        )
+
+# Per-process tier. Other processes only see an invalidation once their
+# entry expires, so keep the TTL short.
+_local: TTLCache = TTLCache(maxsize=settings.AUTH_CACHE_SIZE, ttl=settings.AUTH_CACHE_TTL_SECONDS)
+
+def _redis_key(email: str) -> str:
+    return f"auth:user:{email}"
+
+async def get(email: str) -> Optional[Principal]:
+    """
+    Look up the principal of an email, first in process then in Redis
+    
+    Args:
+        email: Email from the token subject
+        
+    Returns:
+        Principal: The cached principal, or None on a miss
+    """
+    principal = _local.get(email)
+    
+    if principal is None and settings.AUTH_CACHE_REDIS_ENABLED:
+        try:
+            cached = await get_redis().get(_redis_key(email))
+        except RedisError as e:
+            logger.warning(f"Auth cache unavailable: {str(e)}")
+            cached = None
+        
+        if cached:
+            data = json.loads(cached)
+            principal = Principal(**{**data, "id": uuid.UUID(data["id"])})
+            _local[email] = principal
+    
+    metrics.increment(f"auth_cache.{'hits' if principal else 'misses'}")
+    
+    return principal
+
+async def put(principal: Principal) -> None:
+    """
+    Cache a principal in both tiers
+    """
+    _local[principal.email] = principal
+    
+    if settings.AUTH_CACHE_REDIS_ENABLED:
+        try:
+            await get_redis().set(
+                _redis_key(principal.email),
+                json.dumps({**asdict(principal), "id": str(principal.id)}),
+                ex=settings.AUTH_CACHE_REDIS_TTL_SECONDS
+            )
+        except RedisError as e:
+            logger.warning(f"Auth cache unavailable: {str(e)}")
+
+async def invalidate(email: str) -> None:
+    """
+    Drop a user from both tiers after their row changed
+    """
+    _local.pop(email, None)
+    
+    if settings.AUTH_CACHE_REDIS_ENABLED:
+        try:
+            await get_redis().delete(_redis_key(email))
+        except RedisError as e:
+            logger.warning(f"Auth cache unavailable: {str(e)}")
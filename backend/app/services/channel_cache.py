@@ -0,0 +1,164 @@
+import asyncio
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from cachetools import TTLCache
+from redis.exceptions import RedisError
+
+from ..config import get_settings
+from ..utils import metrics
+from .redis_client import get_redis
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Resolved channel identifiers: handle, username or ID -> channel information
+# (id, title), or None for identifiers YouTube doesn't know. Popular channels
+# are added by many users, and a mistyped handle tends to be retried, so
+# both outcomes are cached; missing channels only briefly, in case they are
+# created in the meantime.
+_local: TTLCache = TTLCache(maxsize=settings.CHANNEL_CACHE_SIZE, ttl=settings.CHANNEL_CACHE_TTL_SECONDS)
+_local_missing: TTLCache = TTLCache(maxsize=settings.CHANNEL_CACHE_SIZE, ttl=settings.CHANNEL_CACHE_NEGATIVE_TTL_SECONDS)
+
+# Lookups in progress in this process, awaited by concurrent requests for
+# the same key instead of calling YouTube again
+_inflight: Dict[str, asyncio.Future] = {}
+
+class LookupFailed(Exception):
+    """
+    The lookup failed, e.g. on an API error; unlike a missing channel, the
+    outcome isn't cached
+    """
+
+def cache_key(param_name: str, value: str) -> str:
+    """
+    Get the cache key of a channels.list lookup
+
+    Args:
+        param_name: channels.list parameter: id, forHandle or forUsername
+        value: The parameter value
+    """
+    # Handles and usernames are case-insensitive, channel IDs are not
+    return f"{param_name}:{value if param_name == 'id' else value.lower()}"
+
+def _redis_key(key: str) -> str:
+    return f"channel:resolve:{key}"
+
+async def get_many(keys: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    Look up resolved identifiers, first in process then in Redis
+
+    Args:
+        keys: Keys from cache_key()
+
+    Returns:
+        dict: Channel information, or None for a channel known to be
+        missing, per cached key; keys that aren't cached are left out
+    """
+    cached = {}
+    remote = []
+
+    for key in keys:
+        if key in _local:
+            cached[key] = _local[key]
+        elif key in _local_missing:
+            cached[key] = None
+        else:
+            remote.append(key)
+
+    if remote:
+        try:
+            values = await get_redis().mget([_redis_key(key) for key in remote])
+        except RedisError as e:
+            logger.warning(f"Channel cache unavailable: {str(e)}")
+            values = [None] * len(remote)
+
+        for key, value in zip(remote, values):
+            if value is not None:
+                cached[key] = json.loads(value)
+                _put_local(key, cached[key])
+
+    metrics.increment("channel_cache.hits", len(cached))
+    metrics.increment("channel_cache.misses", len(keys) - len(cached))
+
+    return cached
+
+async def put_many(resolved: Dict[str, Optional[Dict[str, Any]]]) -> None:
+    """
+    Cache resolved identifiers in both tiers
+
+    Args:
+        resolved: Channel information, or None for a missing channel, per key
+    """
+    if not resolved:
+        return
+
+    for key, info in resolved.items():
+        _put_local(key, info)
+
+    try:
+        async with get_redis().pipeline(transaction=False) as pipe:
+            for key, info in resolved.items():
+                pipe.set(
+                    _redis_key(key),
+                    json.dumps(info),
+                    ex=settings.CHANNEL_CACHE_REDIS_TTL_SECONDS if info else settings.CHANNEL_CACHE_NEGATIVE_TTL_SECONDS
+                )
+            await pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Channel cache unavailable: {str(e)}")
+
+async def resolve(key: str, fetch: Callable[[], Awaitable[Optional[Dict[str, Any]]]]) -> Optional[Dict[str, Any]]:
+    """
+    Resolve an identifier from the cache, or fetch it once per process
+
+    Args:
+        key: Key from cache_key()
+        fetch: Looks the identifier up on YouTube; returns None for a missing
+            channel and raises LookupFailed when it can't tell
+
+    Returns:
+        dict: Channel information (id, title), or None if there is no such
+        channel
+
+    Raises:
+        LookupFailed: The lookup failed
+        RateLimitExceeded: The YouTube quota doesn't allow the lookup right now
+    """
+    cached = await get_many([key])
+    if key in cached:
+        return cached[key]
+
+    future = _inflight.get(key)
+    if future is not None:
+        metrics.increment("channel_cache.coalesced")
+        # Shielded: a cancelled waiter mustn't cancel the lookup of the others
+        return await asyncio.shield(future)
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        info = await fetch()
+    except Exception as e:
+        future.set_exception(e)
+        # Retrieved, so there is no warning when nobody else was waiting
+        future.exception()
+        raise
+    else:
+        future.set_result(info)
+    finally:
+        _inflight.pop(key, None)
+        # The lookup itself was cancelled
+        if not future.done():
+            future.cancel()
+
+    await put_many({key: info})
+
+    return info
+
+def _put_local(key: str, info: Optional[Dict[str, Any]]) -> None:
+    if info is None:
+        _local_missing[key] = None
+    else:
+        _local[key] = info
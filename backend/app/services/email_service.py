@@ -0,0 +1,220 @@
+import html
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List
+
+from sqlalchemy.orm import Session
+
+from ..config import get_settings
+from ..models import Channel, User, Video
+from ..utils import metrics
+from ..utils.event_loop import run_async
+from ..utils.tracing import external_call
+from . import rate_limiter
+from .http_client import get_http_client
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# SendGrid accepts at most 1000 personalizations per mail/send request
+MAX_PERSONALIZATIONS = 1000
+
+# Replaced per recipient by SendGrid, so the digest is rendered once per video
+FIRST_NAME_TAG = "-first_name-"
+
+@dataclass(frozen=True)
+class Digest:
+    subject: str
+    html: str
+    text: str
+
+class EmailDeliveryError(Exception):
+    pass
+
+def send_video_digest(db: Session, video_id: str) -> Dict[str, Any]:
+    """
+    Email the digest of a processed video to every subscriber not sent it yet
+
+    The digest is rendered once and sent in SendGrid requests of up to
+    MAX_PERSONALIZATIONS recipients, so a channel with 10,000 subscribers
+    takes 10 API calls. sent_at is set in bulk after each accepted batch; a
+    failure leaves the remaining subscribers for the next attempt.
+
+    Args:
+        db: Database session
+        video_id: YouTube video ID
+
+    Returns:
+        dict: Number of recipients and SendGrid API calls
+
+    Raises:
+        EmailDeliveryError: SendGrid rejected a batch
+    """
+    if not settings.SENDGRID_API_KEY:
+        logger.warning(f"SENDGRID_API_KEY is not set; not emailing the digest of video {video_id}")
+        return {"recipients": 0, "api_calls": 0}
+
+    video = db.query(
+        Video.title,
+        Video.summary_json,
+        Video.mindmap_url,
+        Video.mp3_url
+    ).filter(
+        Video.video_id == video_id,
+        Video.processed_at.isnot(None)
+    ).first()
+
+    if not video:
+        return {"recipients": 0, "api_calls": 0}
+
+    # Stored by runs from before failed summaries failed their job
+    if (video.summary_json or {}).get("error"):
+        logger.error(f"Not emailing the digest of video {video_id}: its summary failed")
+        metrics.increment("email.digests_skipped")
+        return {"recipients": 0, "api_calls": 0, "skipped": "summary_error"}
+
+    recipients = _pending_recipients(db, video_id)
+    digest = render_digest(video_id, video.title, video.summary_json or {}, video.mindmap_url, video.mp3_url)
+    # No connection is held while SendGrid is called; each batch's UPDATE
+    # gets one from the pool
+    db.commit()
+
+    api_calls = 0
+    emails = list(recipients)
+    for start in range(0, len(emails), MAX_PERSONALIZATIONS):
+        batch = emails[start:start + MAX_PERSONALIZATIONS]
+        run_async(send_batch(digest, [recipients[email] for email in batch]))
+        api_calls += 1
+
+        # Mark every row of the batch's recipients in a single UPDATE
+        row_ids = [row_id for email in batch for row_id in recipients[email]["row_ids"]]
+        db.query(Video).filter(Video.id.in_(row_ids)).update(
+            {"sent_at": datetime.utcnow()},
+            synchronize_session=False
+        )
+        db.commit()
+
+    metrics.increment("email.digests_sent", len(emails))
+    metrics.increment("email.api_calls", api_calls)
+    logger.info(f"Emailed the digest of video {video_id} to {len(emails)} subscribers in {api_calls} API calls")
+
+    return {"recipients": len(emails), "api_calls": api_calls}
+
+def render_digest(video_id: str, title: str, summary: Dict[str, Any], mindmap_url: str = None, mp3_url: str = None) -> Digest:
+    """
+    Render the email digest of a video
+
+    Args:
+        video_id: YouTube video ID
+        title: Video title
+        summary: Structured summary from ai_service.generate_summary()
+        mindmap_url: URL of the mind map image
+        mp3_url: URL of the audio narration
+
+    Returns:
+        Digest: Subject, HTML and plain text bodies, greeting FIRST_NAME_TAG
+
+    Raises:
+        ValueError: The summary is the placeholder of a failed generation
+    """
+    if summary.get("error"):
+        raise ValueError(f"Summary of video {video_id} failed; not rendering its digest")
+
+    video_url = f"https://www.youtube.com/watch?v={video_id}"
+    main_points = summary.get("main_points", [])
+    key_concepts = summary.get("key_concepts", [])
+
+    text = [f"Hi {FIRST_NAME_TAG},", "", f"Here's the summary of \"{title}\" ({video_url}).", ""]
+    text += ["Main points:"] + [f"- {p.get('point', '')}: {p.get('explanation', '')}" for p in main_points]
+    text += ["", summary.get("summary", ""), ""]
+    text += ["Key concepts:"] + [f"- {c.get('concept', '')}: {c.get('explanation', '')}" for c in key_concepts]
+    if mindmap_url:
+        text += ["", f"Mind map: {mindmap_url}"]
+    if mp3_url:
+        text += [f"Listen: {mp3_url}"]
+
+    e = html.escape
+    body = [
+        f"<p>Hi {FIRST_NAME_TAG},</p>",
+        f"<p>Here's the summary of <a href=\"{e(video_url)}\">{e(title)}</a>.</p>",
+        "<h3>Main points</h3><ul>",
+        *(f"<li><strong>{e(p.get('point', ''))}</strong>: {e(p.get('explanation', ''))}</li>" for p in main_points),
+        "</ul>",
+        "".join(f"<p>{e(paragraph)}</p>" for paragraph in summary.get("summary", "").split("\n\n") if paragraph),
+        "<h3>Key concepts</h3><ul>",
+        *(f"<li><strong>{e(c.get('concept', ''))}</strong>: {e(c.get('explanation', ''))}</li>" for c in key_concepts),
+        "</ul>"
+    ]
+    if mindmap_url:
+        body.append(f"<p><img src=\"{e(mindmap_url)}\" alt=\"Mind map\" style=\"max-width: 100%\"></p>")
+    if mp3_url:
+        body.append(f"<p><a href=\"{e(mp3_url)}\">Listen to the summary</a></p>")
+
+    return Digest(subject=f"Summary: {title}", html="\n".join(body), text="\n".join(text))
+
+async def send_batch(digest: Digest, recipients: List[Dict[str, Any]]) -> None:
+    """
+    Send a digest to up to MAX_PERSONALIZATIONS recipients in one request
+
+    Every recipient gets a personalization of their own, so nobody sees the
+    other addresses.
+
+    Args:
+        digest: Rendered digest
+        recipients: Dicts with email and first_name
+
+    Raises:
+        EmailDeliveryError: SendGrid rejected the request
+    """
+    await rate_limiter.acquire("sendgrid", "mail.send")
+
+    with external_call("sendgrid", "mail.send", {"app.recipients": len(recipients)}) as call:
+        response = await get_http_client().post(
+            f"{settings.SENDGRID_API_URL.rstrip('/')}/v3/mail/send",
+            headers={"Authorization": f"Bearer {settings.SENDGRID_API_KEY}"},
+            json={
+                "personalizations": [
+                    {
+                        "to": [{"email": recipient["email"]}],
+                        # Substituted into the HTML body as well
+                        "substitutions": {FIRST_NAME_TAG: html.escape(recipient["first_name"] or "there")}
+                    }
+                    for recipient in recipients
+                ],
+                "from": {"email": settings.EMAIL_SENDER},
+                "subject": digest.subject,
+                "content": [
+                    {"type": "text/plain", "value": digest.text},
+                    {"type": "text/html", "value": digest.html}
+                ]
+            }
+        )
+        if response.status_code != 202:
+            call.failed(str(response.status_code))
+
+    if response.status_code == 429:
+        await rate_limiter.drain("sendgrid")
+    if response.status_code != 202:
+        raise EmailDeliveryError(f"SendGrid error: {response.status_code}, {response.text}")
+
+def _pending_recipients(db: Session, video_id: str) -> Dict[str, Dict[str, Any]]:
+    rows = db.query(Video.id, User.email, User.first_name).join(
+        Channel, Video.channel_id == Channel.id
+    ).join(
+        User, Channel.user_id == User.id
+    ).filter(
+        Video.video_id == video_id,
+        Video.processed_at.isnot(None),
+        Video.sent_at.is_(None),
+        User.email.isnot(None),
+        User.is_active.is_(True)
+    ).all()
+
+    # One email per address, even if it somehow has several rows of the video
+    recipients = {}
+    for row in rows:
+        recipient = recipients.setdefault(row.email, {"email": row.email, "first_name": row.first_name, "row_ids": []})
+        recipient["row_ids"].append(row.id)
+
+    return recipients
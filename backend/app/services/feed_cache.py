@@ -0,0 +1,88 @@
+import hashlib
+import logging
+import uuid
+from typing import Awaitable, Callable
+
+from fastapi import Request, Response, status
+from redis.exceptions import RedisError
+
+from ..config import get_settings
+from ..utils import metrics
+from .feed_version import get_version
+from .redis_client import get_redis
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Feed responses carry an ETag derived from the user's feed version (see
+# feed_version), so a client polling an unchanged feed gets a 304 after a
+# single Redis lookup, and (with FEED_CACHE_ENABLED) a new client gets the
+# cached body without a database query.
+
+def _response_key(etag: str) -> str:
+    return f"feed:response:{etag}"
+
+async def respond(request: Request, user_id: uuid.UUID, render: Callable[[], Awaitable[str]]) -> Response:
+    """
+    Answer a feed request from its version: 304, cached body, or rendered
+
+    The version is read before rendering, so a body is never cached under a
+    version newer than its data.
+
+    Args:
+        request: The feed request; its path and query are part of the ETag
+        user_id: ID of the requesting user
+        render: Builds the JSON body when it is neither fresh nor cached
+
+    Returns:
+        Response: JSON response with an ETag, or a 304 without body
+    """
+    version = await get_version(user_id)
+    if version is None:
+        return _json(await render())
+
+    etag = _etag(request, user_id, version)
+    if etag in _if_none_match(request):
+        metrics.increment("feed_cache.not_modified")
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=_headers(etag))
+
+    if settings.FEED_CACHE_ENABLED:
+        try:
+            body = await get_redis().get(_response_key(etag))
+        except RedisError as e:
+            logger.warning(f"Feed cache unavailable: {str(e)}")
+            body = None
+
+        if body is not None:
+            metrics.increment("feed_cache.hits")
+            return _json(body, etag)
+
+    metrics.increment("feed_cache.misses")
+    body = await render()
+
+    if settings.FEED_CACHE_ENABLED:
+        try:
+            await get_redis().set(_response_key(etag), body, ex=settings.FEED_CACHE_TTL_SECONDS)
+        except RedisError as e:
+            logger.warning(f"Feed cache unavailable: {str(e)}")
+
+    return _json(body, etag)
+
+def _etag(request: Request, user_id: uuid.UUID, version: str) -> str:
+    # Strong: the body is fully determined by the user, version and query
+    key = f"{user_id}:{version}:{request.url.path}?{request.url.query}"
+    return f"\"{hashlib.sha256(key.encode()).hexdigest()[:32]}\""
+
+def _if_none_match(request: Request) -> set:
+    header = request.headers.get("if-none-match", "")
+    return {tag.strip() for tag in header.split(",")}
+
+def _headers(etag: str = None) -> dict:
+    # Always revalidate, but from the client's copy
+    headers = {"Cache-Control": "private, no-cache"}
+    if etag:
+        headers["ETag"] = etag
+    return headers
+
+def _json(body: str, etag: str = None) -> Response:
+    return Response(content=body, media_type="application/json", headers=_headers(etag))
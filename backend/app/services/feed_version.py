@@ -0,0 +1,72 @@
+import logging
+import time
+import uuid
+from typing import Iterable, Optional
+
+from redis.exceptions import RedisError
+
+from ..config import get_settings
+from ..utils import metrics
+from .redis_client import get_redis
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Every user has a feed version, changed whenever anything their feeds show
+# changes: a channel subscribed or unsubscribed, a new video fanned out to
+# them, a video processed. The API derives feed ETags and cached responses
+# from it (see feed_cache); workers only bump it, so this module stays free
+# of web framework imports.
+#
+# Versions are nanosecond timestamps rather than counters: a version lost
+# with Redis restarts at the current time, never at a value an old ETag
+# could still carry.
+
+def _version_key(user_id) -> str:
+    return f"feed:version:{user_id}"
+
+async def get_version(user_id: uuid.UUID) -> Optional[str]:
+    """
+    Get the current feed version of a user, starting one if there is none
+
+    Returns:
+        str: The version, or None if Redis is unavailable
+    """
+    try:
+        redis = get_redis()
+        version = await redis.get(_version_key(user_id))
+
+        if version is None:
+            version = str(time.time_ns())
+            # Another request may have started it first
+            if not await redis.set(_version_key(user_id), version, nx=True, ex=settings.FEED_VERSION_TTL_SECONDS):
+                version = await redis.get(_version_key(user_id))
+    except RedisError as e:
+        logger.warning(f"Feed cache unavailable: {str(e)}")
+        return None
+
+    return version
+
+async def bump(user_ids: Iterable[uuid.UUID]) -> None:
+    """
+    Give users a new feed version, after committing a change to their feeds
+
+    Args:
+        user_ids: IDs of the users whose feeds changed
+    """
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+
+    version = str(time.time_ns())
+    try:
+        async with get_redis().pipeline(transaction=False) as pipe:
+            for user_id in user_ids:
+                pipe.set(_version_key(user_id), version, ex=settings.FEED_VERSION_TTL_SECONDS)
+            await pipe.execute()
+    except RedisError as e:
+        # Clients may see a 304 for a changed feed until the version expires
+        logger.error(f"Could not bump the feed version of {len(user_ids)} users: {str(e)}")
+        return
+
+    metrics.increment("feed_cache.bumps", len(user_ids))
@@ -0,0 +1,54 @@
+import httpx
+from typing import Optional
+
+from ..config import get_settings
+
+settings = get_settings()
+
+# One pooled client per process: reusing keep-alive (HTTP/2) connections
+# saves a TCP + TLS handshake on every outbound API call
+_client: Optional[httpx.AsyncClient] = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Get the shared HTTP client of this process, creating it on first use
+    
+    Returns:
+        httpx.AsyncClient: Pooled client for outbound API calls
+    """
+    global _client
+    
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=settings.HTTP_HTTP2,
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+            ),
+            timeout=httpx.Timeout(
+                settings.HTTP_TIMEOUT,
+                connect=settings.HTTP_CONNECT_TIMEOUT
+            )
+        )
+    
+    return _client
+
+async def close_http_client() -> None:
+    """
+    Close the shared HTTP client and its pooled connections
+    """
+    global _client
+    
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+def reset_http_client() -> None:
+    """
+    Forget a client inherited from a parent process without closing it
+    
+    Call this right after fork: the pooled sockets belong to the parent.
+    """
+    global _client
+    _client = None
@@ -0,0 +1,419 @@
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, or_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from ..config import get_settings
+from ..models import Channel, ProcessingFence, ProcessingJob, Video
+from ..utils import metrics
+from ..utils.tracing import tracer
+from .processing_lock import LeaseLost
+from .rate_limiter import RateLimitExceeded
+
+# The video processing pipeline as a DAG: each stage and the stages it
+# depends on. Stages whose dependencies are met run concurrently.
+PIPELINE_DAG = {
+    "transcript": [],
+    "summary": ["transcript"],
+    "mindmap": ["summary"],
+    "audio": ["summary"],
+    "persist": ["mindmap", "audio"],
+    "email": ["persist"]
+}
+
+PIPELINE_STAGES = list(PIPELINE_DAG)
+
+ACTIVE_STATUSES = ("queued", "running")
+
+# Scheduling lanes of processing jobs, most urgent first: a user waiting on
+# screen, then uploads still within the delivery SLO (PRD: summary email
+# within 5 minutes of publication), then older uploads (catching up after an
+# outage, videos found late).
+LANES = ("interactive", "fresh", "backfill")
+
+# Each lane spans a few broker priority levels, lower ones being served
+# first. A tenant's (user's or channel's) jobs already active in the lane
+# push its next one down a level, so one heavy user or channel can't get
+# ahead of everyone else's first job. Level 0 is what brokers give tasks
+# sent without a priority (polling, housekeeping): few and short, they go
+# first.
+PRIORITY_LEVELS_PER_LANE = 3
+PRIORITY_LEVELS = 1 + len(LANES) * PRIORITY_LEVELS_PER_LANE
+
+settings = get_settings()
+
+def create_job(
+    db: Session,
+    video_id: str,
+    user_id=None,
+    status: str = "queued",
+    fence_token: int = None,
+    lane: str = "interactive",
+    tenant: str = None
+) -> ProcessingJob:
+    """
+    Create a processing job for a YouTube video
+
+    A queued job gets the broker priority its pipeline is sent with, from
+    its lane and the tenant's other active jobs in that lane.
+
+    Args:
+        db: Database session
+        video_id: YouTube video ID
+        user_id: ID of the requesting user, None for background jobs
+        status: Initial job status; "skipped" records a video processed
+            before jobs existed, with every stage skipped
+        fence_token: Token of the caller's processing lease, see processing_lock
+        lane: Scheduling lane, from LANES
+        tenant: Who the job is shared fairly with, e.g. "channel:<id>";
+            defaults to the requesting user
+
+    Returns:
+        ProcessingJob: The new job
+
+    Raises:
+        LeaseLost: A later holder of the video's lease already created a job
+    """
+    if fence_token is not None:
+        _advance_fence(db, video_id, fence_token)
+
+    if tenant is None and user_id is not None:
+        tenant = f"user:{user_id}"
+
+    priority = None
+    if status == "queued":
+        active = _live(db.query(func.count(ProcessingJob.id)).filter(
+            ProcessingJob.lane == lane,
+            ProcessingJob.tenant == tenant
+        )).scalar() if tenant else 0
+        priority = 1 + LANES.index(lane) * PRIORITY_LEVELS_PER_LANE + min(active, PRIORITY_LEVELS_PER_LANE - 1)
+
+    now = datetime.utcnow()
+    job = ProcessingJob(
+        video_id=video_id,
+        user_id=user_id,
+        status=status,
+        stages={stage: {"state": "skipped" if status == "skipped" else "pending"} for stage in PIPELINE_STAGES},
+        fence_token=fence_token,
+        lane=lane,
+        tenant=tenant,
+        priority=priority,
+        finished_at=now if status not in ACTIVE_STATUSES else None
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+
+    return job
+
+def check_fence(db: Session, job_id: str) -> None:
+    """
+    Make sure no later holder of the video's processing lease created a job
+
+    Called before a job writes its results, in the transaction writing them:
+    the fence row stays locked until then, so the check can't go stale.
+
+    Raises:
+        LeaseLost: The job was superseded
+    """
+    job = get_job(db, job_id)
+    if job.fence_token is None:
+        return
+
+    current = db.query(ProcessingFence.fence_token).filter(
+        ProcessingFence.video_id == job.video_id
+    ).with_for_update().scalar()
+
+    if current is not None and current > job.fence_token:
+        raise LeaseLost(f"Job {job_id} was superseded by a later job for video {job.video_id}")
+
+def background_lanes(db: Session, video_ids: List[str]) -> Dict[str, Tuple[str, str]]:
+    """
+    Get the lane and tenant of background jobs for new uploads
+
+    Uploads published within PROCESSING_FRESH_WINDOW_SECONDS are fresh,
+    older ones backfill; jobs are shared fairly between channels.
+
+    Args:
+        db: Database session
+        video_ids: YouTube video IDs with Video rows
+
+    Returns:
+        dict: (lane, tenant) per video ID
+    """
+    fresh_since = datetime.utcnow() - timedelta(seconds=settings.PROCESSING_FRESH_WINDOW_SECONDS)
+
+    rows = db.query(Video.video_id, Video.published_at, Channel.yt_channel_id).join(
+        Channel, Video.channel_id == Channel.id
+    ).filter(Video.video_id.in_(video_ids)).all()
+
+    # One row per subscriber, all alike
+    return {
+        row.video_id: (
+            "fresh" if row.published_at and row.published_at >= fresh_since else "backfill",
+            f"channel:{row.yt_channel_id}"
+        )
+        for row in rows
+    }
+
+def lane_of(priority: Optional[int]) -> Optional[str]:
+    """
+    Get the lane a broker priority belongs to, None for tasks outside the
+    pipeline (sent without a priority)
+    """
+    if not priority:
+        return None
+    return LANES[min((priority - 1) // PRIORITY_LEVELS_PER_LANE, len(LANES) - 1)]
+
+def stage_levels(dag: Dict[str, List[str]] = PIPELINE_DAG) -> List[List[str]]:
+    """
+    Group the stages of a DAG into levels that can run concurrently
+
+    A stage is placed in the level after its latest dependency, so every
+    stage of a level only depends on stages of earlier levels.
+
+    Args:
+        dag: Stage name -> names of the stages it depends on
+
+    Returns:
+        list: Levels of stage names, in execution order
+    """
+    depth = {}
+
+    def visit(stage, path=()):
+        if stage in path:
+            raise ValueError(f"Pipeline has a cycle through stage '{stage}'")
+        if stage not in depth:
+            depth[stage] = 1 + max((visit(dep, path + (stage,)) for dep in dag[stage]), default=-1)
+        return depth[stage]
+
+    for stage in dag:
+        visit(stage)
+
+    levels = [[] for _ in range(max(depth.values(), default=-1) + 1)]
+    for stage in dag:
+        levels[depth[stage]].append(stage)
+
+    return levels
+
+def critical_path(stages: dict, dag: Dict[str, List[str]] = PIPELINE_DAG) -> List[str]:
+    """
+    Find the chain of dependent stages with the longest total duration
+
+    Args:
+        stages: Stage name -> recorded stage state (see track_stage)
+        dag: Stage name -> names of the stages it depends on
+
+    Returns:
+        list: Stage names on the critical path, in execution order
+    """
+    longest = {}
+
+    for level in stage_levels(dag):
+        for stage in level:
+            duration = (stages.get(stage) or {}).get("duration_ms") or 0
+            before = max((longest[dep] for dep in dag[stage]), key=lambda path: path[0], default=(0, []))
+            longest[stage] = (before[0] + duration, before[1] + [stage])
+
+    if not longest:
+        return []
+
+    return max(longest.values(), key=lambda path: path[0])[1]
+
+def get_job(db: Session, job_id: str) -> Optional[ProcessingJob]:
+    """
+    Get a processing job by ID
+    """
+    return db.query(ProcessingJob).filter(ProcessingJob.id == uuid.UUID(str(job_id))).first()
+
+def get_active_job(db: Session, video_id: str) -> Optional[ProcessingJob]:
+    """
+    Get the queued or running job for a YouTube video, if any; jobs without
+    progress for PROCESSING_JOB_STALE_SECONDS don't count
+    """
+    return _live(db.query(ProcessingJob).filter(
+        ProcessingJob.video_id == video_id
+    )).order_by(ProcessingJob.created_at.desc()).first()
+
+def expire_stale_jobs(db: Session) -> int:
+    """
+    Fail the queued or running jobs without progress for
+    PROCESSING_JOB_STALE_SECONDS
+
+    Their worker died with them (a crash or an OOM kill): the job would
+    otherwise stay active for good. Messages of a lost worker are delivered
+    again (acks_late), so this only catches what never came back.
+
+    Returns:
+        int: Number of jobs failed
+    """
+    now = datetime.utcnow()
+    expired = db.query(ProcessingJob).filter(
+        ProcessingJob.status.in_(ACTIVE_STATUSES),
+        ProcessingJob.updated_at < now - timedelta(seconds=settings.PROCESSING_JOB_STALE_SECONDS)
+    ).update({
+        "status": "failed",
+        "error": f"No progress for {settings.PROCESSING_JOB_STALE_SECONDS} seconds; abandoned",
+        "finished_at": now
+    }, synchronize_session=False)
+    db.commit()
+
+    metrics.increment("pipeline.jobs_expired", expired)
+    return expired
+
+def get_latest_job(db: Session, video_id: str, status: str = None) -> Optional[ProcessingJob]:
+    """
+    Get the most recent job for a YouTube video, optionally with a given status
+    """
+    query = db.query(ProcessingJob).filter(ProcessingJob.video_id == video_id)
+    if status:
+        query = query.filter(ProcessingJob.status == status)
+    return query.order_by(ProcessingJob.created_at.desc()).first()
+
+def finish_job(db: Session, job_id: str) -> None:
+    """
+    Mark a job as succeeded
+    """
+    job = _lock_job(db, job_id)
+    job.status = "succeeded"
+    job.finished_at = datetime.utcnow()
+    db.commit()
+
+    record_timings(db, job)
+
+def record_timings(db: Session, job: ProcessingJob) -> None:
+    """
+    Store the stage durations and outcomes of a job on its video records
+
+    Written to every row of the video that is still unprocessed or was
+    processed by this job, so each subscriber sees where the time went.
+    """
+    stages = job.stages or {}
+    path = critical_path(stages)
+
+    timings = {
+        "job_id": str(job.id),
+        "status": job.status,
+        "stages": {
+            stage: {
+                key: value for key, value in state.items()
+                if key in ("state", "duration_ms", "error")
+            }
+            for stage, state in stages.items()
+        },
+        "critical_path": path,
+        "critical_path_ms": sum(stages[stage].get("duration_ms") or 0 for stage in path),
+        "total_ms": int(((job.finished_at or datetime.utcnow()) - job.created_at).total_seconds() * 1000)
+    }
+
+    db.query(Video).filter(
+        Video.video_id == job.video_id,
+        or_(Video.processed_at.is_(None), Video.processed_at >= job.created_at)
+    ).update({"stage_timings": timings}, synchronize_session=False)
+    db.commit()
+
+@contextmanager
+def track_stage(db: Session, job_id: str, stage: str):
+    """
+    Record the state and timing of a pipeline stage on its job
+
+    The stage is marked running on entry and succeeded on exit. An exception
+    marks both the stage and the job as failed and is re-raised; running out
+    of provider budget (RateLimitExceeded) only marks the stage deferred:
+    the stage's task must retry it (tasks.deferred_when_rate_limited).
+
+    Args:
+        db: Database session
+        job_id: Processing job ID
+        stage: Stage name from PIPELINE_STAGES
+    """
+    started_at = datetime.utcnow()
+    _update_stage(db, job_id, stage, {"state": "running", "started_at": started_at.isoformat()})
+
+    with tracer.start_as_current_span(f"stage {stage}", attributes={"app.job_id": str(job_id), "app.stage": stage}):
+        try:
+            yield
+        except RateLimitExceeded as e:
+            db.rollback()
+            _update_stage(db, job_id, stage, {
+                "state": "deferred",
+                "started_at": started_at.isoformat(),
+                "retry_after": round(e.retry_after, 1)
+            })
+            _observe_stage(stage, "deferred", started_at)
+            raise
+        except Exception as e:
+            db.rollback()
+            job = _update_stage(db, job_id, stage, _finished("failed", started_at, error=str(e)), error=str(e))
+            record_timings(db, job)
+            _observe_stage(stage, "failed", started_at)
+            raise
+
+    _update_stage(db, job_id, stage, _finished("succeeded", started_at))
+    _observe_stage(stage, "succeeded", started_at)
+
+def _advance_fence(db: Session, video_id: str, fence_token: int) -> None:
+    # Compare-and-set on the video's fence row, in the transaction creating
+    # the job: the upsert locks the row, so concurrent holders go through
+    # one at a time and a token older than the stored one never passes
+    statement = insert(ProcessingFence).values(video_id=video_id, fence_token=fence_token)
+    statement = statement.on_conflict_do_update(
+        index_elements=[ProcessingFence.video_id],
+        set_={"fence_token": statement.excluded.fence_token, "updated_at": datetime.utcnow()},
+        where=ProcessingFence.fence_token <= statement.excluded.fence_token
+    ).returning(ProcessingFence.video_id)
+
+    if db.execute(statement).first() is None:
+        db.rollback()
+        raise LeaseLost(f"Processing lease of video {video_id} was taken over")
+
+def _live(query):
+    # Queued or running, and not abandoned (see expire_stale_jobs)
+    return query.filter(
+        ProcessingJob.status.in_(ACTIVE_STATUSES),
+        ProcessingJob.updated_at >= datetime.utcnow() - timedelta(seconds=settings.PROCESSING_JOB_STALE_SECONDS)
+    )
+
+def _observe_stage(stage: str, state: str, started_at: datetime) -> None:
+    metrics.observe(
+        "pipeline.stage_duration_seconds",
+        (datetime.utcnow() - started_at).total_seconds(),
+        {"stage": stage, "state": state}
+    )
+
+def _finished(state: str, started_at: datetime, error: str = None) -> dict:
+    finished_at = datetime.utcnow()
+    result = {
+        "state": state,
+        "started_at": started_at.isoformat(),
+        "finished_at": finished_at.isoformat(),
+        "duration_ms": int((finished_at - started_at).total_seconds() * 1000)
+    }
+    if error:
+        result["error"] = error
+    return result
+
+def _update_stage(db: Session, job_id: str, stage: str, values: dict, error: str = None) -> ProcessingJob:
+    # Parallel stages update the same JSON document, so serialize on the row
+    job = _lock_job(db, job_id)
+
+    job.stages = {**(job.stages or {}), stage: values}
+    if error:
+        job.status = "failed"
+        job.error = error
+        job.finished_at = datetime.utcnow()
+    elif job.status == "queued":
+        job.status = "running"
+
+    db.commit()
+
+    return job
+
+def _lock_job(db: Session, job_id: str) -> ProcessingJob:
+    return db.query(ProcessingJob).filter(
+        ProcessingJob.id == uuid.UUID(str(job_id))
+    ).with_for_update().one()
@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Optional
+
+from ..config import get_settings
+from ..utils import metrics
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+RENDER_PAGE = "data:text/html,<html><head></head><body><div id='out'></div></body></html>"
+
+LOAD_MERMAID_SCRIPT = """
+var script = document.createElement('script');
+script.text = arguments[0];
+document.head.appendChild(script);
+mermaid.initialize({startOnLoad: false});
+"""
+
+RENDER_SCRIPT = """
+var source = arguments[0];
+var done = arguments[arguments.length - 1];
+try {
+    mermaid.mermaidAPI.render('mindmap' + Date.now(), source, function(svg) {
+        document.getElementById('out').innerHTML = svg;
+        done(null);
+    });
+} catch (e) {
+    done(String(e));
+}
+"""
+
+class RenderError(Exception):
+    pass
+
+class MindmapRenderPool:
+    """
+    A fixed set of long-lived headless browsers rendering Mermaid diagrams
+
+    Each worker thread owns a browser with mermaid.js loaded once, so a
+    render only pays for layout and a screenshot, not for browser startup.
+    Sources are rendered and captured in memory; nothing touches disk.
+    Requests queue up to MINDMAP_RENDER_QUEUE_SIZE; beyond that callers wait
+    for a free slot (backpressure) instead of piling up work.
+    """
+
+    def __init__(self, workers: int, queue_size: int, timeout: float):
+        self.timeout = timeout
+        self._queue: queue.Queue = queue.Queue()
+        self._slots = asyncio.Semaphore(workers + queue_size)
+        self._completed = deque(maxlen=1000)
+        self._threads = [
+            threading.Thread(target=self._run, name=f"mindmap-render-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    async def render(self, source: str) -> bytes:
+        """
+        Render a Mermaid diagram to PNG
+
+        Args:
+            source: Mermaid diagram source
+
+        Returns:
+            bytes: PNG image
+
+        Raises:
+            RenderError: The diagram could not be rendered
+            asyncio.TimeoutError: The render took longer than the timeout
+        """
+        async with self._slots:
+            started: Future = Future()
+            result: Future = Future()
+            self._queue.put((source, started, result))
+            metrics.set_gauge("mindmap_renderer.queue_depth", self._queue.qsize())
+            
+            # Time spent queued doesn't count against the render timeout
+            await asyncio.wrap_future(started)
+            try:
+                return await asyncio.wait_for(asyncio.wrap_future(result), self.timeout)
+            except asyncio.TimeoutError:
+                metrics.increment("mindmap_renderer.timeouts")
+                raise
+
+    def renders_per_second(self, window: float = 60.0) -> float:
+        """
+        Completed renders per second over the last window seconds
+        """
+        cutoff = time.monotonic() - window
+        return sum(1 for completed in list(self._completed) if completed >= cutoff) / window
+
+    def close(self) -> None:
+        """
+        Stop the workers and their browsers once queued renders are done
+        """
+        for _ in self._threads:
+            self._queue.put(None)
+
+    def _run(self):
+        driver = None
+
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+
+            source, started, future = item
+            started.set_result(None)
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            try:
+                driver = driver or self._start_browser()
+                future.set_result(self._render(driver, source))
+                self._completed.append(time.monotonic())
+                metrics.increment("mindmap_renderer.renders")
+                metrics.set_gauge("mindmap_renderer.renders_per_second", self.renders_per_second())
+            except Exception as e:
+                metrics.increment("mindmap_renderer.failures")
+                future.set_exception(e if isinstance(e, RenderError) else RenderError(str(e)))
+                # The browser may be wedged (e.g. a script timeout); replace it
+                self._quit(driver)
+                driver = None
+
+        self._quit(driver)
+
+    def _start_browser(self):
+        # Selenium and the mermaid bundle are only needed once a render runs
+        from pymermaid import mermaid_js
+        from selenium import webdriver
+
+        options = webdriver.FirefoxOptions()
+        options.add_argument("-headless")
+
+        driver = webdriver.Firefox(options=options)
+        driver.set_script_timeout(self.timeout)
+        driver.set_window_size(1600, 1200)
+        driver.get(RENDER_PAGE)
+        driver.execute_script(LOAD_MERMAID_SCRIPT, mermaid_js.mermaid_js)
+
+        return driver
+
+    def _render(self, driver, source: str) -> bytes:
+        from selenium.webdriver.common.by import By
+
+        error = driver.execute_async_script(RENDER_SCRIPT, source)
+        if error:
+            raise RenderError(error)
+
+        return driver.find_element(By.CSS_SELECTOR, "#out svg").screenshot_as_png
+
+    def _quit(self, driver):
+        if driver is None:
+            return
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.error(f"Error closing mindmap renderer: {str(e)}")
+
+_pool: Optional[MindmapRenderPool] = None
+
+def get_render_pool() -> MindmapRenderPool:
+    """
+    Get this process's render pool, starting it on first use
+    """
+    global _pool
+
+    if _pool is None:
+        _pool = MindmapRenderPool(
+            workers=settings.MINDMAP_RENDER_WORKERS,
+            queue_size=settings.MINDMAP_RENDER_QUEUE_SIZE,
+            timeout=settings.MINDMAP_RENDER_TIMEOUT_SECONDS
+        )
+
+    return _pool
+
+def close_render_pool() -> None:
+    """
+    Stop this process's render pool, if it was started
+    """
+    global _pool
+
+    if _pool is not None:
+        _pool.close()
+        _pool = None
@@ -0,0 +1,239 @@
+import asyncio
+import logging
+import random
+import time
+from collections import defaultdict
+from typing import Dict, List, Any, Tuple
+
+from sqlalchemy.orm import Session
+
+from ..config import get_settings
+from ..models import Channel, Video
+from ..utils.event_loop import run_async
+from . import feed_version, rate_limiter, youtube_service
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+def poll_channels(db: Session) -> Dict[str, Any]:
+    """
+    Run one polling cycle over every subscribed YouTube channel
+
+    Subscriptions are collapsed to the distinct set of YouTube channel IDs, so
+    a channel is polled once per cycle no matter how many users follow it.
+    New uploads are then fanned out into a Video row for every subscriber.
+
+    Args:
+        db: Database session
+
+    Returns:
+        dict: Cycle statistics and the IDs of the newly detected videos
+    """
+    started = time.perf_counter()
+
+    subscriptions = _load_subscriptions(db)
+
+    # Poll each channel from its oldest subscriber watermark
+    watermarks = {
+        yt_channel_id: min(_watermark(sub) for sub in subs)
+        for yt_channel_id, subs in subscriptions.items()
+    }
+
+    videos, calls = run_async(_fetch_new_uploads(watermarks))
+    video_ids = _fan_out(db, subscriptions, videos)
+
+    stats = {
+        "channels": len(subscriptions),
+        "subscriptions": sum(len(subs) for subs in subscriptions.values()),
+        "api_calls": calls["succeeded"],
+        "failed_api_calls": calls["failed"],
+        "deferred_channels": calls["deferred_channels"],
+        "new_videos": len(video_ids),
+        "duration_seconds": round(time.perf_counter() - started, 3),
+        "video_ids": video_ids
+    }
+
+    logger.info(
+        f"Poll cycle: {stats['channels']} channels, {stats['subscriptions']} subscriptions, "
+        f"{stats['api_calls']} API calls ({stats['failed_api_calls']} failed), "
+        f"{stats['deferred_channels']} deferred, {stats['new_videos']} new videos "
+        f"in {stats['duration_seconds']}s"
+    )
+
+    return stats
+
+def ingest_videos(db: Session, video_ids: List[str]) -> List[str]:
+    """
+    Fan out videos announced by a push notification, as a poll cycle would
+
+    Videos already known, not published yet, or older than a subscription's
+    watermark (e.g. an old video whose title changed) are skipped.
+
+    Args:
+        db: Database session
+        video_ids: YouTube video IDs
+
+    Returns:
+        list: IDs of the newly detected videos
+
+    Raises:
+        RateLimitExceeded: The YouTube quota doesn't allow fetching the videos now
+    """
+    videos = _ready(run_async(youtube_service.get_videos_info(video_ids)))
+    if not videos:
+        return []
+
+    subscriptions = _load_subscriptions(db, {video['channel_id'] for video in videos.values()})
+    return _fan_out(db, subscriptions, videos)
+
+def _load_subscriptions(db: Session, yt_channel_ids=None) -> Dict[str, List[Any]]:
+    query = db.query(
+        Channel.id,
+        Channel.user_id,
+        Channel.yt_channel_id,
+        Channel.last_published_at,
+        Channel.created_at
+    )
+    if yt_channel_ids is not None:
+        query = query.filter(Channel.yt_channel_id.in_(list(yt_channel_ids)))
+    rows = query.all()
+
+    subscriptions = defaultdict(list)
+    for row in rows:
+        subscriptions[row.yt_channel_id].append(row)
+
+    return subscriptions
+
+def _watermark(subscription):
+    # A new subscription only gets videos uploaded after it was created
+    return subscription.last_published_at or subscription.created_at
+
+async def _fetch_new_uploads(watermarks: Dict[str, Any]) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, int]]:
+    semaphore = asyncio.Semaphore(settings.YOUTUBE_POLL_CONCURRENCY)
+    calls = {"succeeded": 0, "failed": 0, "deferred_channels": 0}
+
+    async def fetch(channel_id):
+        async with semaphore:
+            try:
+                uploads = await youtube_service.get_recent_uploads(
+                    channel_id,
+                    max_results=settings.YOUTUBE_POLL_MAX_RESULTS
+                )
+            except rate_limiter.RateLimitExceeded:
+                # Out of quota: the channel waits for the next cycle, its
+                # watermark untouched
+                calls["deferred_channels"] += 1
+                return channel_id, []
+
+            calls["succeeded" if uploads is not None else "failed"] += 1
+            return channel_id, uploads or []
+
+    # Channels that don't fit in the quota are deferred; a random order keeps
+    # the same ones from being deferred every cycle
+    channel_ids = list(watermarks)
+    random.shuffle(channel_ids)
+    results = await asyncio.gather(*(fetch(channel_id) for channel_id in channel_ids))
+
+    channel_of = {
+        upload['video_id']: channel_id
+        for channel_id, uploads in results
+        for upload in uploads
+        if upload['published_at'] > watermarks[channel_id]
+    }
+    new_video_ids = list(channel_of)
+
+    # Details for all new uploads, 50 videos per call; batches fetched before
+    # the quota ran out are kept
+    videos = {}
+    missed = []
+    for start in range(0, len(new_video_ids), youtube_service.MAX_IDS_PER_REQUEST):
+        batch = new_video_ids[start:start + youtube_service.MAX_IDS_PER_REQUEST]
+        try:
+            fetched = await youtube_service.get_videos_batch(batch)
+        except rate_limiter.RateLimitExceeded:
+            missed += new_video_ids[start:]
+            logger.warning(f"YouTube quota exhausted; deferring {len(new_video_ids) - start} new videos")
+            break
+
+        if fetched is None:
+            calls["failed"] += 1
+            missed += batch
+            continue
+
+        calls["succeeded"] += 1
+        videos.update(fetched)
+
+    # A channel with uploads left unfetched is deferred whole: fanning out
+    # only some would move its watermark past the others. The next cycle
+    # finds them all again.
+    held_back = {channel_of[video_id] for video_id in missed}
+    calls["deferred_channels"] += len(held_back)
+    videos = {
+        video_id: video for video_id, video in videos.items()
+        if channel_of.get(video_id) not in held_back
+    }
+
+    return _ready(videos), calls
+
+def _ready(videos: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    # Upcoming premieres and running livestreams have no transcript yet
+    return {
+        video_id: video
+        for video_id, video in videos.items()
+        if video['live_broadcast_content'] == 'none'
+    }
+
+def _fan_out(db: Session, subscriptions: Dict[str, List[Any]], videos: Dict[str, Dict[str, Any]]) -> List[str]:
+    if not videos:
+        return []
+
+    uploads_by_channel = defaultdict(list)
+    for video in videos.values():
+        uploads_by_channel[video['channel_id']].append(video)
+
+    existing = set(
+        db.query(Video.channel_id, Video.video_id)
+        .filter(Video.video_id.in_(list(videos)))
+        .all()
+    )
+
+    new_rows = []
+    channel_updates = []
+    user_ids = set()
+
+    for yt_channel_id, uploads in uploads_by_channel.items():
+        for subscription in subscriptions.get(yt_channel_id, []):
+            fresh = [
+                video for video in uploads
+                if video['published_at'] > _watermark(subscription)
+                and (subscription.id, video['video_id']) not in existing
+            ]
+
+            if not fresh:
+                continue
+
+            for video in fresh:
+                new_rows.append({
+                    "video_id": video['video_id'],
+                    "channel_id": subscription.id,
+                    "user_id": subscription.user_id,
+                    "title": video['title'],
+                    "description": video.get('description'),
+                    "published_at": video['published_at']
+                })
+
+            channel_updates.append({
+                "id": subscription.id,
+                "last_published_at": max(video['published_at'] for video in fresh)
+            })
+            user_ids.add(subscription.user_id)
+
+    if not new_rows:
+        return []
+
+    db.bulk_insert_mappings(Video, new_rows)
+    db.bulk_update_mappings(Channel, channel_updates)
+    db.commit()
+    run_async(feed_version.bump(user_ids))
+
+    return sorted({row["video_id"] for row in new_rows})
@@ -0,0 +1,173 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from redis.exceptions import RedisError
+
+from ..config import get_settings
+from ..utils import metrics
+from .redis_client import get_redis
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# A lease per YouTube video serializes everything that decides whether the
+# video needs a processing run (checking its rows and jobs, creating them,
+# queueing the pipeline), whether an API request or the poller does it. One
+# holder at a time goes through; the others wait for its release and then
+# find its job instead of starting their own.
+#
+# The lease protects that decision only, not the processing run: the run
+# takes minutes, and the pipeline is deduplicated by its single job.
+#
+# Each lease comes with a fencing token, greater than every token handed out
+# before, which the job records. A holder that stalled past its lease may
+# still write after the next holder did, so the token is checked where the
+# writes land, in the database: job_service.create_job() advances the
+# video's ProcessingFence row with a compare-and-set and refuses an older
+# token, and a job's results are only persisted while no later job fenced
+# it out (job_service.check_fence). Tokens are microsecond timestamps
+# (bumped when that wouldn't be greater), so they keep growing even if
+# Redis loses its data.
+
+# Last token handed out, for every video
+FENCE_KEY = "processing:fence"
+
+# KEYS: lease, last token; ARGV: lease TTL in ms. Returns the token, or nil
+# while someone else holds the lease.
+ACQUIRE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return nil
+end
+
+local time = redis.call('TIME')
+local token = tonumber(time[1]) * 1000000 + tonumber(time[2])
+local last = tonumber(redis.call('GET', KEYS[2]) or '0')
+if token <= last then
+    token = last + 1
+end
+
+local value = string.format('%.0f', token)
+redis.call('SET', KEYS[2], value)
+redis.call('SET', KEYS[1], value, 'PX', ARGV[1])
+
+return value
+"""
+
+# KEYS: lease, release channel; ARGV: token. Only the holder can release.
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+
+redis.call('DEL', KEYS[1])
+redis.call('PUBLISH', KEYS[2], ARGV[1])
+
+return 1
+"""
+
+class LeaseLost(Exception):
+    """
+    A holder with a newer fencing token wrote first: this lease expired
+    before its holder was done
+    """
+
+def _lease_key(video_id: str) -> str:
+    return f"processing:lease:{video_id}"
+
+def _channel(video_id: str) -> str:
+    return f"processing:released:{video_id}"
+
+async def acquire(video_id: str) -> Optional[int]:
+    """
+    Take the processing lease of a video, waiting for the current holder to
+    release it or for its lease to expire
+
+    Args:
+        video_id: YouTube video ID
+
+    Returns:
+        int: The fencing token, or None if Redis is unavailable (the caller
+        goes ahead without the lease)
+    """
+    waited = False
+
+    while True:
+        try:
+            token = await get_redis().eval(
+                ACQUIRE_SCRIPT, 2, _lease_key(video_id), FENCE_KEY, int(settings.PROCESSING_LEASE_TTL_SECONDS * 1000)
+            )
+        except RedisError as e:
+            logger.warning(f"Processing lock unavailable: {str(e)}")
+            return None
+
+        if token is not None:
+            metrics.increment("processing_lock.acquired", labels={"waited": waited})
+            return int(token)
+
+        waited = True
+        await _wait_for_release(video_id)
+
+async def release(video_id: str, token: Optional[int]) -> None:
+    """
+    Release the processing lease of a video and wake up its waiters
+
+    Args:
+        video_id: YouTube video ID
+        token: Fencing token from acquire()
+    """
+    if token is None:
+        return
+
+    try:
+        released = await get_redis().eval(RELEASE_SCRIPT, 2, _lease_key(video_id), _channel(video_id), str(token))
+    except RedisError as e:
+        # Waiters take over once the lease expires
+        logger.warning(f"Processing lock unavailable: {str(e)}")
+        return
+
+    if not released:
+        logger.warning(f"Processing lease of video {video_id} expired before its release")
+        metrics.increment("processing_lock.expired")
+
+@asynccontextmanager
+async def hold(video_id: str) -> AsyncIterator[Optional[int]]:
+    """
+    Hold the processing lease of a video for the duration of the block
+
+    Yields:
+        int: The fencing token, None without Redis
+    """
+    token = await acquire(video_id)
+    try:
+        yield token
+    finally:
+        await release(video_id, token)
+
+async def _wait_for_release(video_id: str) -> None:
+    redis = get_redis()
+    pubsub = redis.pubsub()
+
+    try:
+        await pubsub.subscribe(_channel(video_id))
+
+        # Released (or expired) before the subscription took effect
+        ttl_ms = await redis.pttl(_lease_key(video_id))
+        if ttl_ms <= 0:
+            return
+
+        async def released():
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    return
+
+        # A holder that died without releasing is waited out
+        await asyncio.wait_for(released(), ttl_ms / 1000)
+    except asyncio.TimeoutError:
+        pass
+    except RedisError as e:
+        logger.warning(f"Processing lock unavailable: {str(e)}")
+        await asyncio.sleep(0.1)
+    finally:
+        await pubsub.aclose()
@@ -0,0 +1,193 @@
+import asyncio
+import logging
+from typing import Dict, Optional, Tuple
+
+from redis.exceptions import RedisError
+
+from ..config import get_settings
+from ..utils import metrics
+from .redis_client import get_redis
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Cost of one call per provider and endpoint, in the provider's budget unit.
+# YouTube counts quota units (see its quota calculator) and SendGrid
+# requests; LLM and TTS calls pass their token or character count as the
+# cost instead.
+ENDPOINT_COSTS = {
+    "youtube": {
+        "videos.list": 1,
+        "playlistItems.list": 1,
+        "channels.list": 1,
+        "search.list": 100
+    },
+    "sendgrid": {
+        "mail.send": 1
+    }
+}
+
+# A shared token bucket per provider, refilled continuously. A caller that
+# finds too few tokens reserves them anyway (the bucket goes negative) and
+# waits until they would have refilled, so waiters are served in arrival
+# order without retry loops. Reservations longer than max_wait are refused.
+ACQUIRE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local max_wait = tonumber(ARGV[4])
+
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local wait = 0
+if tokens < cost then
+    wait = (cost - tokens) / rate
+end
+
+local granted = 0
+if wait <= max_wait then
+    tokens = tokens - cost
+    granted = 1
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 60)
+
+return {granted, tostring(tokens), tostring(wait)}
+"""
+
+# Empties a bucket (keeping earlier reservations) after the provider itself
+# rejected a call, so every process backs off instead of piling on 429s
+DRAIN_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(0, math.min(capacity, tokens + math.max(0, now - ts) * rate))
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 60)
+
+return tostring(tokens)
+"""
+
+class RateLimitExceeded(Exception):
+    """
+    The provider's budget won't allow the call within the allowed wait
+    """
+
+    def __init__(self, provider: str, retry_after: float):
+        super().__init__(f"{provider} rate limit exceeded, retry in {retry_after:.1f}s")
+        self.provider = provider
+        self.retry_after = retry_after
+
+def limits() -> Dict[str, Tuple[float, float]]:
+    """
+    Bucket size and refill rate (units per second) of every provider
+    """
+    return {
+        "youtube": (settings.YOUTUBE_QUOTA_BURST_UNITS, settings.YOUTUBE_QUOTA_UNITS_PER_DAY / 86400),
+        "openai": (settings.OPENAI_TOKENS_PER_MINUTE, settings.OPENAI_TOKENS_PER_MINUTE / 60),
+        "elevenlabs": (settings.ELEVENLABS_CHARACTERS_PER_MINUTE, settings.ELEVENLABS_CHARACTERS_PER_MINUTE / 60),
+        "sendgrid": (settings.SENDGRID_REQUESTS_PER_MINUTE, settings.SENDGRID_REQUESTS_PER_MINUTE / 60)
+    }
+
+async def acquire(provider: str, endpoint: str = None, cost: float = None, max_wait: float = None) -> None:
+    """
+    Take budget for one provider call, waiting until it is available
+
+    Args:
+        provider: Provider name from limits(), e.g. "youtube"
+        endpoint: Endpoint name from ENDPOINT_COSTS, e.g. "videos.list"
+        cost: Budget units of the call, instead of the endpoint's cost
+        max_wait: Longest wait in seconds, RATE_LIMIT_MAX_WAIT_SECONDS by default
+
+    Raises:
+        RateLimitExceeded: The call would have to wait longer than max_wait;
+            retry_after tells when to try again
+    """
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+
+    capacity, rate = limits()[provider]
+    if cost is None:
+        cost = ENDPOINT_COSTS[provider][endpoint]
+    # A call larger than the whole bucket could never be served
+    cost = min(cost, capacity)
+    if max_wait is None:
+        max_wait = settings.RATE_LIMIT_MAX_WAIT_SECONDS
+
+    try:
+        granted, tokens, wait = await get_redis().eval(
+            ACQUIRE_SCRIPT, 1, _key(provider), capacity, rate, cost, max_wait
+        )
+    except RedisError as e:
+        # Without Redis, calls go through unthrottled rather than failing
+        logger.warning(f"Rate limiter unavailable: {str(e)}")
+        return
+
+    wait = float(wait)
+    metrics.set_gauge(f"rate_limiter.{provider}.remaining", float(tokens))
+
+    if not int(granted):
+        metrics.increment(f"rate_limiter.{provider}.deferred")
+        raise RateLimitExceeded(provider, wait)
+
+    metrics.increment(f"rate_limiter.{provider}.units", cost)
+    if wait > 0:
+        metrics.increment(f"rate_limiter.{provider}.waits")
+        await asyncio.sleep(wait)
+
+async def drain(provider: str) -> None:
+    """
+    Empty a provider's bucket after it answered with a rate limit error
+    """
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+
+    capacity, rate = limits()[provider]
+    try:
+        tokens = await get_redis().eval(DRAIN_SCRIPT, 1, _key(provider), capacity, rate)
+    except RedisError as e:
+        logger.warning(f"Rate limiter unavailable: {str(e)}")
+        return
+
+    logger.warning(f"{provider} rejected a call for exceeding its rate limit; backing off")
+    metrics.increment(f"rate_limiter.{provider}.rejections")
+    metrics.set_gauge(f"rate_limiter.{provider}.remaining", float(tokens))
+
+async def remaining(provider: str) -> Optional[float]:
+    """
+    Current budget of a provider; negative while callers wait for reserved units
+
+    Returns:
+        float: Remaining units, or None if rate limiting is off or Redis is unavailable
+    """
+    if not settings.RATE_LIMIT_ENABLED:
+        return None
+
+    capacity, rate = limits()[provider]
+    try:
+        granted, tokens, wait = await get_redis().eval(
+            ACQUIRE_SCRIPT, 1, _key(provider), capacity, rate, 0, 0
+        )
+    except RedisError as e:
+        logger.warning(f"Rate limiter unavailable: {str(e)}")
+        return None
+
+    metrics.set_gauge(f"rate_limiter.{provider}.remaining", float(tokens))
+    return float(tokens)
+
+def _key(provider: str) -> str:
+    return f"ratelimit:{provider}"
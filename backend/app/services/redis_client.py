@@ -0,0 +1,42 @@
+from typing import Optional
+
+import redis.asyncio as redis
+
+from ..config import get_settings
+
+settings = get_settings()
+
+_client: Optional[redis.Redis] = None
+
+def get_redis() -> redis.Redis:
+    """
+    Get the shared async Redis client of this process, creating it on first use
+    
+    Returns:
+        redis.asyncio.Redis: Client with its own connection pool
+    """
+    global _client
+    
+    if _client is None:
+        _client = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    
+    return _client
+
+async def close_redis() -> None:
+    """
+    Close the shared Redis client and its pooled connections
+    """
+    global _client
+    
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+def reset_redis() -> None:
+    """
+    Forget a client inherited from a parent process without closing it
+    
+    Call this right after fork: the pooled sockets belong to the parent.
+    """
+    global _client
+    _client = None
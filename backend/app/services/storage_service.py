@@ -0,0 +1,168 @@
+import asyncio
+import logging
+from typing import AsyncIterator, Optional
+
+from ..config import get_settings
+from ..utils.tracing import external_call
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# S3 client for file storage, created on first upload: importing boto3 and
+# building a client costs every process that imports this module, while
+# only the audio and mind map stages ever upload
+_s3_client = None
+
+def get_s3_client():
+    """
+    Get the S3 client of this process, creating it on first use
+    
+    AWS_S3_ENDPOINT_URL points it at a local stand-in such as MinIO.
+    """
+    global _s3_client
+    
+    if _s3_client is None:
+        import boto3
+        
+        _s3_client = boto3.client(
+            's3',
+            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+            region_name=settings.AWS_REGION,
+            endpoint_url=settings.AWS_S3_ENDPOINT_URL or None
+        )
+    
+    return _s3_client
+
+def reset_s3_client() -> None:
+    """
+    Forget a client inherited from a parent process
+    
+    Call this right after fork: boto3 clients must not be shared across
+    processes.
+    """
+    global _s3_client
+    _s3_client = None
+
+def public_url(file_key: str) -> str:
+    """
+    Get the public URL of an uploaded object
+    
+    Args:
+        file_key: Object key in the bucket
+        
+    Returns:
+        str: URL of the object
+    """
+    if settings.AWS_S3_ENDPOINT_URL:
+        return f"{settings.AWS_S3_ENDPOINT_URL.rstrip('/')}/{settings.AWS_BUCKET_NAME}/{file_key}"
+    return f"https://{settings.AWS_BUCKET_NAME}.s3.{settings.AWS_REGION}.amazonaws.com/{file_key}"
+
+async def upload_bytes(data: bytes, file_key: str, content_type: str) -> str:
+    """
+    Upload an in-memory object to S3 without blocking the event loop
+    
+    Args:
+        data: Object content
+        file_key: Object key in the bucket
+        content_type: MIME type of the object
+        
+    Returns:
+        str: URL of the uploaded object
+    """
+    with external_call("s3", "PutObject"):
+        await asyncio.to_thread(
+            get_s3_client().put_object,
+            Bucket=settings.AWS_BUCKET_NAME,
+            Key=file_key,
+            Body=data,
+            ContentType=content_type
+        )
+    
+    return public_url(file_key)
+
+async def upload_stream(chunks: AsyncIterator[bytes], file_key: str, content_type: str) -> str:
+    """
+    Upload a byte stream to S3 as it is produced, using a multipart upload
+    
+    Chunks are buffered into parts of S3_MULTIPART_PART_SIZE; each full part
+    is uploaded while the next one fills. Memory stays around two parts
+    whatever the stream length, and the upload finishes right after the
+    last chunk arrives. On failure the multipart upload is aborted so no
+    orphaned parts are left behind.
+    
+    Args:
+        chunks: Async iterator of bytes, e.g. a TTS audio stream
+        file_key: Object key in the bucket
+        content_type: MIME type of the object
+        
+    Returns:
+        str: URL of the uploaded object
+    """
+    with external_call("s3", "CreateMultipartUpload"):
+        upload = await asyncio.to_thread(
+            get_s3_client().create_multipart_upload,
+            Bucket=settings.AWS_BUCKET_NAME,
+            Key=file_key,
+            ContentType=content_type
+        )
+    upload_id = upload["UploadId"]
+    
+    parts = []
+    buffer = bytearray()
+    in_flight: Optional[asyncio.Task] = None
+    
+    async def flush(data: bytes):
+        nonlocal in_flight
+        # Wait for the previous part so at most one upload is in flight
+        if in_flight is not None:
+            parts.append(await in_flight)
+        in_flight = asyncio.create_task(_upload_part(file_key, upload_id, len(parts) + 1, data))
+    
+    try:
+        async for chunk in chunks:
+            buffer.extend(chunk)
+            if len(buffer) >= settings.S3_MULTIPART_PART_SIZE:
+                await flush(bytes(buffer))
+                buffer.clear()
+        
+        # The last part may be smaller than the S3 minimum part size
+        if buffer:
+            await flush(bytes(buffer))
+        if in_flight is None:
+            raise ValueError(f"Empty stream for {file_key}")
+        parts.append(await in_flight)
+        
+        with external_call("s3", "CompleteMultipartUpload"):
+            await asyncio.to_thread(
+                get_s3_client().complete_multipart_upload,
+                Bucket=settings.AWS_BUCKET_NAME,
+                Key=file_key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": parts}
+            )
+    except BaseException:
+        if in_flight is not None and not in_flight.done():
+            in_flight.cancel()
+        with external_call("s3", "AbortMultipartUpload"):
+            await asyncio.to_thread(
+                get_s3_client().abort_multipart_upload,
+                Bucket=settings.AWS_BUCKET_NAME,
+                Key=file_key,
+                UploadId=upload_id
+            )
+        raise
+    
+    return public_url(file_key)
+
+async def _upload_part(file_key: str, upload_id: str, part_number: int, data: bytes) -> dict:
+    with external_call("s3", "UploadPart"):
+        response = await asyncio.to_thread(
+            get_s3_client().upload_part,
+            Bucket=settings.AWS_BUCKET_NAME,
+            Key=file_key,
+            UploadId=upload_id,
+            PartNumber=part_number,
+            Body=data
+        )
+    return {"ETag": response["ETag"], "PartNumber": part_number}
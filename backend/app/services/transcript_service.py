@@ -0,0 +1,113 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+import zstandard
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..config import get_settings
+from ..models import VideoTranscript
+from ..utils import metrics
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Transcripts live compressed in their own table, keyed by YouTube video ID,
+# so the hot videos rows stay small and every subscriber shares one copy.
+
+def compress(transcript: str) -> bytes:
+    """
+    Compress a transcript with zstd
+    """
+    return zstandard.ZstdCompressor(level=settings.TRANSCRIPT_ZSTD_LEVEL).compress(transcript.encode("utf-8"))
+
+def decompress(data: bytes) -> str:
+    """
+    Decompress a transcript stored with compress()
+    """
+    return zstandard.ZstdDecompressor().decompress(data).decode("utf-8")
+
+def store(db: Session, video_id: str, transcript: str) -> None:
+    """
+    Store the transcript of a video, replacing any previous one
+
+    Args:
+        db: Database session
+        video_id: YouTube video ID
+        transcript: Transcript text
+    """
+    raw = transcript.encode("utf-8")
+    data = compress(transcript)
+
+    existing = db.query(VideoTranscript).filter(VideoTranscript.video_id == video_id).first()
+    if existing:
+        existing.data = data
+        existing.size = len(raw)
+        existing.created_at = datetime.utcnow()
+    else:
+        db.add(VideoTranscript(video_id=video_id, data=data, codec="zstd", size=len(raw)))
+
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent writer stored the same video's transcript first
+        db.rollback()
+
+    metrics.increment("transcripts.bytes_raw", len(raw))
+    metrics.increment("transcripts.bytes_stored", len(data))
+
+def load(db: Session, video_id: str) -> Optional[str]:
+    """
+    Load the transcript of a video
+
+    Args:
+        db: Database session
+        video_id: YouTube video ID
+
+    Returns:
+        str: Transcript text or None if none is stored (or it expired)
+    """
+    data = db.query(VideoTranscript.data).filter(VideoTranscript.video_id == video_id).scalar()
+
+    return decompress(data) if data is not None else None
+
+def purge_expired(db: Session, retention_days: int = None, batch_size: int = None) -> int:
+    """
+    Delete transcripts older than the retention period
+
+    Rows are deleted in batches, each in its own short transaction, so the
+    purge never holds locks on a large part of the table.
+
+    Args:
+        db: Database session
+        retention_days: Days a transcript is kept, TRANSCRIPT_RETENTION_DAYS by default
+        batch_size: Rows deleted per transaction, TRANSCRIPT_PURGE_BATCH_SIZE by default
+
+    Returns:
+        int: Number of transcripts deleted
+    """
+    retention_days = retention_days or settings.TRANSCRIPT_RETENTION_DAYS
+    batch_size = batch_size or settings.TRANSCRIPT_PURGE_BATCH_SIZE
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+
+    purged = 0
+    while True:
+        ids = [
+            row.id for row in db.query(VideoTranscript.id)
+            .filter(VideoTranscript.created_at < cutoff)
+            .order_by(VideoTranscript.created_at)
+            .limit(batch_size)
+            .all()
+        ]
+        if not ids:
+            break
+
+        db.query(VideoTranscript).filter(VideoTranscript.id.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+        purged += len(ids)
+
+    metrics.increment("transcripts.purged", purged)
+    logger.info(f"Purged {purged} transcripts older than {retention_days} days")
+
+    return purged
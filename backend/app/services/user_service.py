@@ -1,19 +1,22 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 
 from ..models import User
+from . import auth_cache
 
-def get_user_by_email(db: Session, email: str) -> Optional[User]:
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
     """
     Get a user by email
     """
-    return db.query(User).filter(User.email == email).first()
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalars().first()
 
-def get_or_create_user(db: Session, email: str, first_name: str = None, last_name: str = None, oauth_refresh_token: str = None) -> User:
+async def get_or_create_user(db: AsyncSession, email: str, first_name: str = None, last_name: str = None, oauth_refresh_token: str = None) -> User:
     """
     Get a user by email or create a new one if it doesn't exist
     """
-    user = get_user_by_email(db, email)
+    user = await get_user_by_email(db, email)
     
     if not user:
         # Create new user
@@ -24,8 +27,8 @@ def get_or_create_user(db: Session, email: str, first_name: str = None, last_nam
             oauth_refresh_token=oauth_refresh_token
         )
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
     else:
         # Update existing user if needed
         update_needed = False
@@ -43,7 +46,8 @@ def get_or_create_user(db: Session, email: str, first_name: str = None, last_nam
             update_needed = True
             
         if update_needed:
-            db.commit()
-            db.refresh(user)
+            await db.commit()
+            await db.refresh(user)
+            await auth_cache.invalidate(user.email)
             
-    return user
\ No newline at end of file
+    return user
@@ -0,0 +1,334 @@
+import asyncio
+import hmac
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+from xml.etree.ElementTree import TreeBuilder
+
+from defusedxml.ElementTree import DefusedXMLParser
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..config import get_settings
+from ..models import Channel, WebSubSubscription
+from ..utils import metrics
+from ..utils.event_loop import run_async
+from ..utils.tracing import external_call
+from .http_client import get_http_client
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# YouTube publishes an Atom feed per channel through its WebSub hub; the hub
+# pushes the feed to our callback whenever a video is uploaded or changed.
+TOPIC_URL = "https://www.youtube.com/xml/feeds/videos.xml?channel_id={}"
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+YT = "{http://www.youtube.com/xml/schemas/2015}"
+
+# Hub requests to send at once while renewing leases
+RENEW_CONCURRENCY = 10
+
+class WebSubError(Exception):
+    pass
+
+class NotificationTooLarge(Exception):
+    pass
+
+def topic_url(channel_id: str) -> str:
+    """
+    Get the WebSub topic of a YouTube channel's upload feed
+    """
+    return TOPIC_URL.format(channel_id)
+
+def channel_id_from_topic(topic: str) -> Optional[str]:
+    """
+    Get the YouTube channel ID of a topic URL, None if it isn't a channel feed
+    """
+    parsed = urlparse(topic)
+    if parsed.netloc != "www.youtube.com" or parsed.path != "/xml/feeds/videos.xml":
+        return None
+    return parse_qs(parsed.query).get("channel_id", [None])[0]
+
+class NotificationParser:
+    """
+    Incremental parser of a pushed Atom feed
+
+    The request body is fed chunk by chunk: entries are extracted (and their
+    elements dropped) as soon as they are complete, and the signature is
+    computed along the way, so a notification is never buffered whole. The
+    body is unauthenticated until the signature is checked at the end, so
+    DTDs and entity declarations are refused outright.
+    """
+
+    def __init__(self, signature: Optional[str]):
+        self.entries: List[Dict[str, Any]] = []
+        self._size = 0
+        self._parser = DefusedXMLParser(target=_EntryCollector(self.entries), forbid_dtd=True)
+        self._signature = None
+        self._hmac = None
+
+        # The hub signs the body with the subscription secret:
+        # X-Hub-Signature: <algorithm>=<hex digest>
+        if settings.WEBSUB_SECRET and signature and "=" in signature:
+            algorithm, self._signature = signature.split("=", 1)
+            if algorithm in ("sha1", "sha256", "sha384", "sha512"):
+                self._hmac = hmac.new(settings.WEBSUB_SECRET.encode("utf-8"), digestmod=algorithm)
+
+    def feed(self, chunk: bytes) -> None:
+        """
+        Parse the next chunk of the body
+
+        Raises:
+            NotificationTooLarge: The body exceeds WEBSUB_MAX_NOTIFICATION_BYTES
+            xml.etree.ElementTree.ParseError: The body isn't well-formed XML
+            defusedxml.DefusedXmlException: The body declares a DTD or entities
+        """
+        self._size += len(chunk)
+        if self._size > settings.WEBSUB_MAX_NOTIFICATION_BYTES:
+            raise NotificationTooLarge(f"Notification larger than {settings.WEBSUB_MAX_NOTIFICATION_BYTES} bytes")
+
+        if self._hmac is not None:
+            self._hmac.update(chunk)
+        self._parser.feed(chunk)
+
+    def close(self) -> List[Dict[str, Any]]:
+        """
+        Finish parsing
+
+        Returns:
+            list: Entries as dicts with video_id, channel_id, title, published and updated
+        """
+        self._parser.close()
+        return self.entries
+
+    def signature_valid(self) -> bool:
+        """
+        Whether the body carries a valid signature; always True without WEBSUB_SECRET
+        """
+        if not settings.WEBSUB_SECRET:
+            return True
+        if self._hmac is None:
+            return False
+        return hmac.compare_digest(self._hmac.hexdigest(), self._signature)
+
+class _EntryCollector(TreeBuilder):
+    # Parser target that extracts each Atom entry once its end tag is parsed
+
+    def __init__(self, entries: List[Dict[str, Any]]):
+        super().__init__()
+        self._entries = entries
+
+    def end(self, tag):
+        element = super().end(tag)
+        if tag != f"{ATOM}entry":
+            return element
+
+        video_id = element.findtext(f"{YT}videoId")
+        if video_id:
+            self._entries.append({
+                "video_id": video_id,
+                "channel_id": element.findtext(f"{YT}channelId"),
+                "title": element.findtext(f"{ATOM}title"),
+                "published": element.findtext(f"{ATOM}published"),
+                "updated": element.findtext(f"{ATOM}updated")
+            })
+        element.clear()
+        return element
+
+async def send_request(channel_id: str, mode: str = "subscribe") -> None:
+    """
+    Ask the hub to (un)subscribe our callback to a channel's feed
+
+    The hub confirms asynchronously by calling the callback (see
+    confirm_subscription).
+
+    Args:
+        channel_id: YouTube channel ID
+        mode: "subscribe" or "unsubscribe"
+
+    Raises:
+        WebSubError: The hub refused the request
+    """
+    data = {
+        "hub.callback": settings.WEBSUB_CALLBACK_URL,
+        "hub.topic": topic_url(channel_id),
+        "hub.mode": mode,
+        "hub.verify": "async",
+        "hub.lease_seconds": str(settings.WEBSUB_LEASE_SECONDS)
+    }
+    if settings.WEBSUB_SECRET:
+        data["hub.secret"] = settings.WEBSUB_SECRET
+
+    with external_call("websub", mode) as call:
+        response = await get_http_client().post(settings.WEBSUB_HUB_URL, data=data)
+        if response.status_code not in (202, 204):
+            call.failed(str(response.status_code))
+
+    if response.status_code not in (202, 204):
+        raise WebSubError(f"Hub refused to {mode} {channel_id}: {response.status_code}, {response.text}")
+
+def subscribe(db: Session, channel_id: str) -> bool:
+    """
+    Subscribe to a channel's feed unless its lease is active and not due
+
+    Args:
+        db: Database session
+        channel_id: YouTube channel ID
+
+    Returns:
+        bool: Whether a subscription request was sent
+    """
+    subscription = db.query(WebSubSubscription).filter(WebSubSubscription.yt_channel_id == channel_id).first()
+    if subscription and not _due(subscription, datetime.utcnow()):
+        return False
+
+    # The hub verifies asynchronously, possibly before it answers us: the
+    # request must be on record first
+    previous = _mark_requested(db, channel_id, "subscribe")
+    try:
+        run_async(send_request(channel_id))
+    except Exception:
+        _restore(db, channel_id, previous)
+        raise
+    return True
+
+def renew_leases(db: Session) -> Dict[str, int]:
+    """
+    Keep exactly the subscribed channels subscribed at the hub
+
+    Channels without a subscription, with an unverified one or with a lease
+    ending within WEBSUB_RENEW_BEFORE_SECONDS are (re)subscribed; channels
+    nobody follows anymore are unsubscribed.
+
+    Args:
+        db: Database session
+
+    Returns:
+        dict: Number of channels subscribed, unsubscribed and failed
+    """
+    now = datetime.utcnow()
+    wanted = {row.yt_channel_id for row in db.query(Channel.yt_channel_id).distinct()}
+    subscriptions = {sub.yt_channel_id: sub for sub in db.query(WebSubSubscription).all()}
+
+    due = [
+        channel_id for channel_id in wanted
+        if channel_id not in subscriptions or _due(subscriptions[channel_id], now)
+    ]
+    stale = [channel_id for channel_id in subscriptions if channel_id not in wanted]
+
+    requests = [(channel_id, "subscribe") for channel_id in due] + [(channel_id, "unsubscribe") for channel_id in stale]
+    # Recorded before the hub can verify them, see subscribe()
+    previous = [_mark_requested(db, channel_id, mode) for channel_id, mode in requests]
+    errors = run_async(_send_requests(requests))
+
+    failed = 0
+    for (channel_id, mode), before, error in zip(requests, previous, errors):
+        if error:
+            failed += 1
+            logger.error(str(error))
+            _restore(db, channel_id, before)
+
+    stats = {"subscribed": len(due), "unsubscribed": len(stale), "failed": failed}
+    metrics.increment("websub.subscribe_requests", len(due))
+    metrics.increment("websub.unsubscribe_requests", len(stale))
+    metrics.increment("websub.request_failures", failed)
+    logger.info(f"WebSub leases: {stats['subscribed']} subscribed, {stats['unsubscribed']} unsubscribed, {failed} failed")
+
+    return stats
+
+def confirm_subscription(db: Session, mode: str, channel_id: str, lease_seconds: Optional[int]) -> bool:
+    """
+    Answer the hub's verification of a (un)subscription request
+
+    Only requests we made are confirmed: a subscription we asked for, or an
+    unsubscription we asked for (or of a channel we don't track), whose
+    record is then deleted.
+
+    Args:
+        db: Database session
+        mode: hub.mode, "subscribe" or "unsubscribe"
+        channel_id: YouTube channel ID of hub.topic
+        lease_seconds: hub.lease_seconds granted by the hub
+
+    Returns:
+        bool: Whether to confirm (echo the challenge)
+    """
+    subscription = db.query(WebSubSubscription).filter(WebSubSubscription.yt_channel_id == channel_id).first()
+
+    if mode == "unsubscribe":
+        if subscription is None:
+            return True
+        if subscription.status != "unsubscribing":
+            return False
+        db.delete(subscription)
+        db.commit()
+        return True
+
+    if mode != "subscribe" or subscription is None or subscription.status == "unsubscribing":
+        return False
+
+    now = datetime.utcnow()
+    subscription.status = "active"
+    subscription.verified_at = now
+    subscription.lease_expires_at = now + timedelta(seconds=lease_seconds or settings.WEBSUB_LEASE_SECONDS)
+    db.commit()
+
+    return True
+
+def _due(subscription: WebSubSubscription, now: datetime) -> bool:
+    return (
+        subscription.status != "active"
+        or subscription.lease_expires_at is None
+        or subscription.lease_expires_at < now + timedelta(seconds=settings.WEBSUB_RENEW_BEFORE_SECONDS)
+    )
+
+def _mark_requested(db: Session, channel_id: str, mode: str) -> Optional[dict]:
+    # Returns the previous state of the subscription, for _restore()
+    subscription = db.query(WebSubSubscription).filter(WebSubSubscription.yt_channel_id == channel_id).first()
+    previous = None
+    if subscription is None:
+        subscription = WebSubSubscription(yt_channel_id=channel_id, status="pending")
+        db.add(subscription)
+    else:
+        previous = {"status": subscription.status, "requested_at": subscription.requested_at}
+
+    if mode == "unsubscribe":
+        subscription.status = "unsubscribing"
+    elif subscription.status == "unsubscribing":
+        subscription.status = "pending"
+    # An active subscription stays active until the renewal is verified
+    subscription.requested_at = datetime.utcnow()
+
+    try:
+        db.commit()
+    except IntegrityError:
+        # Requested concurrently by another worker, whose record stays as is
+        db.rollback()
+        subscription = db.query(WebSubSubscription).filter(WebSubSubscription.yt_channel_id == channel_id).one()
+        previous = {"status": subscription.status, "requested_at": subscription.requested_at}
+
+    return previous
+
+def _restore(db: Session, channel_id: str, previous: Optional[dict]) -> None:
+    # The hub refused the request: back to the state before _mark_requested()
+    query = db.query(WebSubSubscription).filter(WebSubSubscription.yt_channel_id == channel_id)
+    if previous is None:
+        query.delete()
+    else:
+        query.update(previous, synchronize_session=False)
+    db.commit()
+
+async def _send_requests(requests: List[tuple]) -> List[Optional[Exception]]:
+    semaphore = asyncio.Semaphore(RENEW_CONCURRENCY)
+
+    async def send(channel_id, mode):
+        async with semaphore:
+            try:
+                await send_request(channel_id, mode)
+            except Exception as e:
+                return e
+            return None
+
+    return await asyncio.gather(*(send(channel_id, mode) for channel_id, mode in requests))
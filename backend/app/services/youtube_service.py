@@ -1,15 +1,22 @@
-import httpx
-from typing import Dict, Optional, Any
+from typing import Dict, Optional, Any, List
 from datetime import datetime
 import re
 import json
 import logging
 
 from ..config import get_settings
+from . import rate_limiter
+from .http_client import get_http_client
+from ..utils.tracing import external_call
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
+# The YouTube Data API accepts at most 50 comma-separated IDs per list call
+MAX_IDS_PER_REQUEST = 50
+
+RATE_LIMIT_REASONS = ("quotaExceeded", "rateLimitExceeded", "userRateLimitExceeded")
+
 async def get_video_info(video_id: str) -> Optional[Dict[str, Any]]:
     """
     Get information about a YouTube video
@@ -19,6 +26,9 @@ async def get_video_info(video_id: str) -> Optional[Dict[str, Any]]:
         
     Returns:
         dict: Video information or None if not found
+        
+    Raises:
+        RateLimitExceeded: The YouTube quota doesn't allow the call right now
     """
     try:
         # Extract video ID from URL if needed
@@ -28,18 +38,22 @@ async def get_video_info(video_id: str) -> Optional[Dict[str, Any]]:
         if not video_id:
             return None
             
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                'https://www.googleapis.com/youtube/v3/videos',
+        await rate_limiter.acquire("youtube", "videos.list")
+        with external_call("youtube", "videos.list") as call:
+            response = await get_http_client().get(
+                f'{settings.YOUTUBE_API_URL}/youtube/v3/videos',
                 params={
                     'part': 'snippet,contentDetails',
                     'id': video_id,
                     'key': settings.YOUTUBE_API_KEY
                 }
             )
+            if response.status_code != 200:
+                call.failed(str(response.status_code))
         
         if response.status_code != 200:
             logger.error(f"YouTube API error: {response.status_code}, {response.text}")
+            await check_rate_limited(response)
             return None
             
         data = response.json()
@@ -48,21 +62,223 @@ async def get_video_info(video_id: str) -> Optional[Dict[str, Any]]:
         if not data.get('items'):
             return None
             
-        video = data['items'][0]
-        snippet = video['snippet']
-        
-        return {
-            'video_id': video_id,
-            'title': snippet['title'],
-            'description': snippet.get('description', ''),
-            'channel_id': snippet['channelId'],
-            'channel_title': snippet['channelTitle'],
-            'published_at': datetime.fromisoformat(snippet['publishedAt'].replace('Z', '+00:00'))
-        }
+        return _video_info_from_item(data['items'][0])
+    except rate_limiter.RateLimitExceeded:
+        raise
     except Exception as e:
         logger.error(f"Error getting video info: {str(e)}")
         return None
 
+async def get_videos_info(video_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Get information about many YouTube videos, 50 IDs per API call
+    
+    Args:
+        video_ids: YouTube video IDs
+        
+    Returns:
+        dict: Video information keyed by video ID; videos that could not be
+        fetched are left out
+        
+    Raises:
+        RateLimitExceeded: The YouTube quota doesn't allow the call right now
+    """
+    videos = {}
+    
+    for start in range(0, len(video_ids), MAX_IDS_PER_REQUEST):
+        videos.update(await get_videos_batch(video_ids[start:start + MAX_IDS_PER_REQUEST]) or {})
+    
+    return videos
+
+async def get_videos_batch(video_ids: List[str]) -> Optional[Dict[str, Dict[str, Any]]]:
+    """
+    Get information about up to MAX_IDS_PER_REQUEST videos in one API call
+    
+    Args:
+        video_ids: YouTube video IDs
+    
+    Returns:
+        dict: Video information keyed by video ID, leaving out videos that
+        don't exist; None if the call failed
+    
+    Raises:
+        RateLimitExceeded: The YouTube quota doesn't allow the call right now
+    """
+    await rate_limiter.acquire("youtube", "videos.list")
+    try:
+        with external_call("youtube", "videos.list") as call:
+            response = await get_http_client().get(
+                f'{settings.YOUTUBE_API_URL}/youtube/v3/videos',
+                params={
+                    'part': 'snippet,contentDetails',
+                    'id': ','.join(video_ids),
+                    'maxResults': MAX_IDS_PER_REQUEST,
+                    'key': settings.YOUTUBE_API_KEY
+                }
+            )
+            if response.status_code != 200:
+                call.failed(str(response.status_code))
+        
+        if response.status_code != 200:
+            logger.error(f"YouTube API error: {response.status_code}, {response.text}")
+            await check_rate_limited(response)
+            return None
+        
+        videos = {}
+        for item in response.json().get('items', []):
+            video = _video_info_from_item(item)
+            videos[video['video_id']] = video
+        return videos
+    except Exception as e:
+        logger.error(f"Error getting videos info: {str(e)}")
+        return None
+
+async def get_channels_info(channel_ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    Get the titles of many YouTube channels, 50 IDs per API call
+    
+    Args:
+        channel_ids: YouTube channel IDs (UC...)
+    
+    Returns:
+        dict: Channel information (id, title) keyed by every requested ID;
+        None for channels that don't exist. IDs of failed calls are left out.
+    
+    Raises:
+        RateLimitExceeded: The YouTube quota doesn't allow the call right now
+    """
+    channels = {}
+    
+    for start in range(0, len(channel_ids), MAX_IDS_PER_REQUEST):
+        batch = channel_ids[start:start + MAX_IDS_PER_REQUEST]
+        await rate_limiter.acquire("youtube", "channels.list")
+        try:
+            with external_call("youtube", "channels.list", {"app.batch_size": len(batch)}) as call:
+                response = await get_http_client().get(
+                    f'{settings.YOUTUBE_API_URL}/youtube/v3/channels',
+                    params={
+                        'part': 'snippet',
+                        'id': ','.join(batch),
+                        'maxResults': MAX_IDS_PER_REQUEST,
+                        'key': settings.YOUTUBE_API_KEY
+                    }
+                )
+                if response.status_code != 200:
+                    call.failed(str(response.status_code))
+            
+            if response.status_code != 200:
+                logger.error(f"YouTube API error: {response.status_code}, {response.text}")
+                await check_rate_limited(response)
+                continue
+            
+            # Unknown IDs are simply missing from the items
+            found = {
+                item['id']: {'id': item['id'], 'title': item['snippet']['title']}
+                for item in response.json().get('items', [])
+            }
+            for channel_id in batch:
+                channels[channel_id] = found.get(channel_id)
+        except Exception as e:
+            logger.error(f"Error getting channels info: {str(e)}")
+    
+    return channels
+
+async def get_recent_uploads(channel_id: str, max_results: int = 10) -> Optional[List[Dict[str, Any]]]:
+    """
+    Get the most recent uploads of a YouTube channel from its uploads playlist
+    
+    Args:
+        channel_id: YouTube channel ID (UC...)
+        max_results: Number of uploads to return, newest first
+        
+    Returns:
+        list: Uploads as dicts with video_id and published_at, or None on error
+        
+    Raises:
+        RateLimitExceeded: The YouTube quota doesn't allow the call right now
+    """
+    await rate_limiter.acquire("youtube", "playlistItems.list")
+    try:
+        with external_call("youtube", "playlistItems.list") as call:
+            response = await get_http_client().get(
+                f'{settings.YOUTUBE_API_URL}/youtube/v3/playlistItems',
+                params={
+                    'part': 'contentDetails',
+                    'playlistId': uploads_playlist_id(channel_id),
+                    'maxResults': max_results,
+                    'key': settings.YOUTUBE_API_KEY
+                }
+            )
+            if response.status_code != 200:
+                call.failed(str(response.status_code))
+        
+        if response.status_code != 200:
+            logger.error(f"YouTube API error for channel {channel_id}: {response.status_code}, {response.text}")
+            await check_rate_limited(response)
+            return None
+            
+        uploads = []
+        for item in response.json().get('items', []):
+            details = item['contentDetails']
+            # Private and deleted videos have no publish date
+            if 'videoPublishedAt' not in details:
+                continue
+            uploads.append({
+                'video_id': details['videoId'],
+                'published_at': parse_timestamp(details['videoPublishedAt'])
+            })
+            
+        return uploads
+    except Exception as e:
+        logger.error(f"Error getting recent uploads: {str(e)}")
+        return None
+
+async def check_rate_limited(response) -> None:
+    """
+    Back off every process when YouTube rejected a call for quota or rate
+    
+    Such errors come back as 429 or as 403 with one of RATE_LIMIT_REASONS.
+    """
+    if response.status_code == 429 or (
+        response.status_code == 403 and any(reason in response.text for reason in RATE_LIMIT_REASONS)
+    ):
+        await rate_limiter.drain("youtube")
+
+def uploads_playlist_id(channel_id: str) -> str:
+    """
+    Get the ID of a channel's uploads playlist
+    
+    The uploads playlist shares the channel ID suffix with a UU prefix, so it
+    can be derived without a channels.list call.
+    
+    Args:
+        channel_id: YouTube channel ID (UC...)
+        
+    Returns:
+        str: Uploads playlist ID (UU...)
+    """
+    return f"UU{channel_id[2:]}"
+
+def parse_timestamp(value: str) -> datetime:
+    """
+    Parse a YouTube API timestamp into a naive UTC datetime, matching the
+    DateTime columns of our models
+    """
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None)
+
+def _video_info_from_item(video: Dict[str, Any]) -> Dict[str, Any]:
+    snippet = video['snippet']
+    
+    return {
+        'video_id': video['id'],
+        'title': snippet['title'],
+        'description': snippet.get('description', ''),
+        'channel_id': snippet['channelId'],
+        'channel_title': snippet['channelTitle'],
+        'live_broadcast_content': snippet.get('liveBroadcastContent', 'none'),
+        'published_at': parse_timestamp(snippet['publishedAt'])
+    }
+
 async def get_video_transcript(video_id: str) -> Optional[str]:
     """
     Get transcript for a YouTube video
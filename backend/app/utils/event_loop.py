@@ -0,0 +1,54 @@
+import asyncio
+import os
+import threading
+from typing import Any, Awaitable, Optional
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_thread: Optional[threading.Thread] = None
+_lock = threading.Lock()
+
+def run_async(coro: Awaitable[Any]) -> Any:
+    """
+    Run a coroutine to completion from synchronous code (e.g. a Celery task)
+    
+    Every call in a process shares one long-lived event loop, so async
+    resources bound to a loop (HTTP connection pools, Redis clients) can be
+    reused across tasks instead of being rebuilt by each asyncio.run(). The
+    loop runs in a thread of its own: calls from many threads at once (the
+    threads pool of I/O workers) each block their caller while the loop
+    keeps all their requests in flight. The caller's context variables,
+    such as the current trace span, carry over to the coroutine.
+    
+    Args:
+        coro: Coroutine to run
+    
+    Returns:
+        The coroutine's result
+    """
+    loop = _get_loop()
+    
+    if threading.current_thread() is _thread:
+        coro.close()
+        raise RuntimeError("run_async() called from a coroutine; await it instead")
+    
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _loop, _thread
+    
+    with _lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            _thread = threading.Thread(target=_loop.run_forever, name="run-async", daemon=True)
+            _thread.start()
+    
+    return _loop
+
+def _reset_after_fork() -> None:
+    # The loop's thread doesn't survive a fork; the child starts its own
+    global _loop, _thread, _lock
+    _loop = None
+    _thread = None
+    _lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,154 @@
+import glob
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
+
+# Metrics are Prometheus counters, gauges and histograms named after the
+# dotted names used in the code ("rate_limiter.youtube.units" is exported as
+# rate_limiter_youtube_units_total). A metric's label names are fixed by its
+# first use.
+#
+# Processes that fork workers (Celery prefork, uvicorn --workers) share their
+# metrics through files when PROMETHEUS_MULTIPROC_DIR is set, as
+# prometheus_client expects.
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+if MULTIPROC_DIR:
+    os.makedirs(MULTIPROC_DIR, exist_ok=True)
+
+# Seconds; covers fast DB and cache calls up to LLM completions
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+_lock = threading.Lock()
+_metrics: Dict[str, object] = {}
+
+def increment(name: str, amount: float = 1, labels: Optional[Dict[str, str]] = None) -> None:
+    """
+    Increment a counter
+
+    Args:
+        name: Dotted counter name, e.g. "artifact_cache.summary.hits"
+        amount: Value to add
+        labels: Label values, e.g. {"provider": "youtube"}
+    """
+    _labeled(_metric(Counter, name, labels), labels).inc(amount)
+
+def set_gauge(name: str, value: float, labels: Optional[Dict[str, str]] = None) -> None:
+    """
+    Set a gauge to its current value
+
+    Args:
+        name: Dotted gauge name, e.g. "mindmap_renderer.queue_depth"
+        value: Current value
+        labels: Label values
+    """
+    _labeled(_metric(Gauge, name, labels), labels).set(value)
+
+def observe(name: str, value: float, labels: Optional[Dict[str, str]] = None) -> None:
+    """
+    Record a value, usually a duration in seconds, in a histogram
+
+    Args:
+        name: Dotted histogram name, e.g. "http.request_duration_seconds"
+        value: Observed value
+        labels: Label values, e.g. {"route": "/api/v1/videos/"}
+    """
+    _labeled(_metric(Histogram, name, labels), labels).observe(value)
+
+def record_pool(name: str, pool) -> None:
+    """
+    Set the usage gauges of a SQLAlchemy connection pool
+
+    Args:
+        name: Engine label, e.g. "async"
+        pool: The engine's pool (QueuePool or AsyncAdaptedQueuePool)
+    """
+    labels = {"engine": name}
+    set_gauge("db.pool_size", pool.size(), labels)
+    set_gauge("db.pool_checked_out", pool.checkedout(), labels)
+    # Negative while the pool itself isn't full
+    set_gauge("db.pool_overflow", max(0, pool.overflow()), labels)
+
+def snapshot() -> Dict[str, float]:
+    """
+    Get the current value of every sample, keyed by its Prometheus name and labels
+    """
+    values = {}
+    for family in _registry().collect():
+        for sample in family.samples:
+            labels = ",".join(f"{key}=\"{value}\"" for key, value in sorted(sample.labels.items()))
+            values[f"{sample.name}{{{labels}}}" if labels else sample.name] = sample.value
+    return values
+
+def render() -> Tuple[bytes, str]:
+    """
+    Render every metric in the Prometheus text format
+
+    Returns:
+        tuple: Response body and its content type
+    """
+    return generate_latest(_registry()), CONTENT_TYPE_LATEST
+
+def start_server(port: int) -> None:
+    """
+    Serve /metrics on a port of its own, for processes without an HTTP API
+    (the Celery worker's main process)
+    """
+    start_http_server(port, registry=_registry())
+
+def clear_multiprocess_dir() -> None:
+    """
+    Remove the metric files of a previous run; call before forking workers
+    """
+    if MULTIPROC_DIR:
+        for path in glob.glob(os.path.join(MULTIPROC_DIR, "*.db")):
+            os.remove(path)
+
+def mark_process_dead(pid: int) -> None:
+    """
+    Drop the live gauges of an exited worker process
+    """
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid, MULTIPROC_DIR)
+
+def _registry() -> CollectorRegistry:
+    if not MULTIPROC_DIR:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=MULTIPROC_DIR)
+    return registry
+
+def _metric(kind, name: str, labels: Optional[Dict[str, str]]):
+    metric = _metrics.get(name)
+    if metric is not None:
+        return metric
+
+    with _lock:
+        if name not in _metrics:
+            options = {}
+            if kind is Histogram:
+                options["buckets"] = LATENCY_BUCKETS
+            elif kind is Gauge:
+                # The latest value set by a live process
+                options["multiprocess_mode"] = "livemostrecent"
+            _metrics[name] = kind(
+                name.replace(".", "_").replace("-", "_"),
+                name,
+                labelnames=sorted(labels or {}),
+                **options
+            )
+        return _metrics[name]
+
+def _labeled(metric, labels: Optional[Dict[str, str]]):
+    return metric.labels(**{key: str(value) for key, value in labels.items()}) if labels else metric
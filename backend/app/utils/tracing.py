@@ -0,0 +1,126 @@
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from opentelemetry import trace
+from opentelemetry.trace import SpanKind, Status, StatusCode
+
+from ..config import get_settings
+from . import metrics
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Spans go to the OTLP endpoint configured through the standard OTEL_*
+# environment variables (e.g. OTEL_EXPORTER_OTLP_ENDPOINT). Until
+# setup_tracing() runs, the tracer is a no-op and spans cost next to nothing.
+tracer = trace.get_tracer("app")
+
+_configured = False
+
+class ExternalCall:
+    """
+    A call to an external service, see external_call()
+    """
+
+    def __init__(self, span):
+        self.span = span
+        self.error: Optional[str] = None
+
+    def failed(self, reason: str) -> None:
+        """
+        Count the call as failed without raising, e.g. on an error status
+        """
+        self.error = reason
+        self.span.set_status(Status(StatusCode.ERROR, reason))
+
+def setup_tracing(service_name: str, app=None) -> None:
+    """
+    Export spans and instrument the libraries the app talks through
+
+    Instruments outgoing httpx requests (YouTube, SendGrid, and the OpenAI
+    and ElevenLabs SDKs), SQLAlchemy queries and Celery, whose instrumentation
+    carries the trace context in task headers from the API to the workers.
+    Call once per process, after fork for prefork workers.
+
+    Args:
+        service_name: service.name of the spans, e.g. "api" or "worker"
+        app: FastAPI app to instrument, if any
+    """
+    global _configured
+
+    if not settings.TRACING_ENABLED or _configured:
+        return
+    _configured = True
+
+    # The SDK and instrumentations are only imported when tracing is on
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    from opentelemetry.instrumentation.celery import CeleryInstrumentor
+    from opentelemetry.instrumentation.httpx import HTTPXClientInstrumentor
+    from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+    from ..database import async_engine, engine
+
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": f"{settings.TRACING_SERVICE_NAME}-{service_name}"}),
+        sampler=ParentBased(TraceIdRatioBased(settings.TRACING_SAMPLE_RATIO))
+    )
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    trace.set_tracer_provider(provider)
+
+    HTTPXClientInstrumentor().instrument()
+    SQLAlchemyInstrumentor().instrument(engines=[engine, async_engine.sync_engine])
+    CeleryInstrumentor().instrument()
+
+    if app is not None:
+        from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+
+        FastAPIInstrumentor.instrument_app(app, excluded_urls="metrics,health")
+
+    logger.info(f"Tracing {service_name} with sample ratio {settings.TRACING_SAMPLE_RATIO}")
+
+def shutdown_tracing() -> None:
+    """
+    Flush the spans still buffered in this process
+    """
+    provider = trace.get_tracer_provider()
+    if hasattr(provider, "shutdown"):
+        provider.shutdown()
+
+@contextmanager
+def external_call(provider: str, endpoint: str, attributes: Dict[str, Any] = None) -> Iterator[ExternalCall]:
+    """
+    Time a call to an external service and trace it as a client span
+
+    Records external_call_duration_seconds and, when the call raises or is
+    marked failed(), external_call_errors_total, both labeled by provider
+    and endpoint.
+
+    Args:
+        provider: Service name, e.g. "youtube"
+        endpoint: Operation, e.g. "videos.list"
+        attributes: Extra span attributes
+    """
+    labels = {"provider": provider, "endpoint": endpoint}
+    started = time.perf_counter()
+
+    with tracer.start_as_current_span(
+        f"{provider} {endpoint}",
+        kind=SpanKind.CLIENT,
+        attributes={"peer.service": provider, "app.endpoint": endpoint, **(attributes or {})}
+    ) as span:
+        call = ExternalCall(span)
+        try:
+            yield call
+        except Exception as e:
+            call.error = type(e).__name__
+            raise
+        finally:
+            metrics.observe("external_call.duration_seconds", time.perf_counter() - started, labels)
+            if call.error:
+                metrics.increment("external_call.errors", labels={**labels, "error": call.error})
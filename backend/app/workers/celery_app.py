@@ -1,5 +1,20 @@
+import os
+import time
+from datetime import datetime
+from typing import Dict, List
+
 from celery import Celery
+from celery.signals import before_task_publish, celeryd_init, task_postrun, task_prerun, worker_process_init, worker_process_shutdown, worker_ready, worker_shutdown
+from kombu import Queue
 from ..config import get_settings
+from ..database import engine
+from ..services import ai_service, job_service, storage_service
+from ..services.http_client import close_http_client, reset_http_client
+from ..services.mindmap_renderer import close_render_pool
+from ..services.redis_client import close_redis, reset_redis
+from ..utils import metrics
+from ..utils.event_loop import run_async
+from ..utils.tracing import setup_tracing, shutdown_tracing
 
 settings = get_settings()
 
@@ -10,6 +25,29 @@ celery_app = Celery(
     include=["app.workers.tasks"]
 )
 
+# Tasks are routed by what they spend their time on. Stages waiting on
+# YouTube, OpenAI, ElevenLabs, S3 or SendGrid run on "io", whose workers use
+# a threads pool: a blocked thread costs little, so one node keeps hundreds
+# of calls in flight. CPU-bound stages run on "cpu", with a process per
+# core, so they neither starve nor get starved by the I/O stages.
+IO_QUEUE = "io"
+CPU_QUEUE = "cpu"
+
+# Tasks not listed run on the I/O queue
+CPU_TASKS = ["render_mindmap"]
+
+# Pool and concurrency of a worker serving a single queue
+WORKER_POOLS = {
+    IO_QUEUE: (settings.CELERY_IO_POOL, settings.CELERY_IO_CONCURRENCY),
+    CPU_QUEUE: (settings.CELERY_CPU_POOL, settings.CELERY_CPU_CONCURRENCY)
+}
+
+# With WebSub pushing new uploads, polling only reconciles missed notifications
+poll_interval = (
+    settings.WEBSUB_RECONCILE_INTERVAL_SECONDS if settings.WEBSUB_ENABLED
+    else settings.YOUTUBE_POLL_INTERVAL_SECONDS
+)
+
 # Configure Celery
 celery_app.conf.update(
     task_serializer="json",
@@ -17,9 +55,156 @@ celery_app.conf.update(
     result_serializer="json",
     timezone="UTC",
     enable_utc=True,
+    task_queues=[Queue(IO_QUEUE), Queue(CPU_QUEUE)],
+    task_default_queue=IO_QUEUE,
+    task_routes={name: {"queue": CPU_QUEUE} for name in CPU_TASKS},
+    # Within a queue, messages are served by priority, 0 first (Redis
+    # broker: one list per level). Pipeline stages carry their job's
+    # priority, see job_service.LANES.
+    broker_transport_options={"priority_steps": list(range(job_service.PRIORITY_LEVELS))},
+    # Retries and tasks sent from a task keep its place in line
+    task_inherit_parent_priority=True,
+    # A worker holding messages it can't start yet would keep more urgent
+    # ones waiting
     worker_prefetch_multiplier=1,
+    # Acknowledged once done, so the messages of a worker that crashed or was
+    # killed are delivered again (after the broker's visibility timeout)
+    # instead of leaving their job hanging; every stage is idempotent
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    # Prefork only; bounds the memory a process can leak
     worker_max_tasks_per_child=50,
+    beat_schedule={
+        "poll-channels": {
+            "task": "poll_channels",
+            "schedule": poll_interval,
+            # A cycle that missed its slot is superseded by the next one
+            "options": {"expires": poll_interval},
+        },
+        "purge-transcripts": {
+            "task": "purge_transcripts",
+            "schedule": settings.TRANSCRIPT_PURGE_INTERVAL_SECONDS,
+            "options": {"expires": settings.TRANSCRIPT_PURGE_INTERVAL_SECONDS},
+        },
+        "expire-stale-jobs": {
+            "task": "expire_stale_jobs",
+            "schedule": settings.PROCESSING_REAP_INTERVAL_SECONDS,
+            "options": {"expires": settings.PROCESSING_REAP_INTERVAL_SECONDS},
+        },
+    },
 )
 
+if settings.WEBSUB_ENABLED:
+    celery_app.conf.beat_schedule["renew-websub-leases"] = {
+        "task": "renew_websub_leases",
+        "schedule": settings.WEBSUB_RENEW_INTERVAL_SECONDS,
+        "options": {"expires": settings.WEBSUB_RENEW_INTERVAL_SECONDS},
+    }
+
+# Start times of the tasks running in this process, by task ID
+_task_started: Dict[str, float] = {}
+
+def queue_names() -> List[str]:
+    """
+    Names of the queues tasks are routed to
+    """
+    if celery_app.conf.task_queues:
+        return [queue.name for queue in celery_app.conf.task_queues]
+    return [celery_app.conf.task_default_queue]
+
+def queue_lengths() -> Dict[str, int]:
+    """
+    Number of messages waiting in every queue, read from the broker
+    """
+    lengths = {}
+    with celery_app.connection_for_read() as connection:
+        for queue in queue_names():
+            try:
+                lengths[queue] = connection.default_channel.queue_declare(queue=queue, passive=True).message_count
+            except connection.channel_errors:
+                # Not declared yet: no worker consumed it and nothing was sent
+                lengths[queue] = 0
+    return lengths
+
+@celeryd_init.connect
+def init_worker(**kwargs):
+    # Before the pool forks: drop metric files left by a previous worker
+    metrics.clear_multiprocess_dir()
+
+@worker_ready.connect
+def start_metrics_server(sender=None, **kwargs):
+    # The main process serves the metrics of every pool process (with
+    # PROMETHEUS_MULTIPROC_DIR set)
+    if settings.WORKER_METRICS_PORT:
+        metrics.start_server(settings.WORKER_METRICS_PORT)
+    
+    # Threads and solo pools run the tasks in this process, which gets no
+    # worker_process_init
+    if not _forks_children(sender):
+        setup_tracing("worker")
+
+@worker_process_init.connect
+def init_worker_process(**kwargs):
+    # Each forked worker process builds its own connection pools
+    reset_http_client()
+    reset_redis()
+    ai_service.reset_clients()
+    storage_service.reset_s3_client()
+    # The span exporter's thread doesn't survive the fork
+    setup_tracing("worker")
+
+@worker_shutdown.connect
+@worker_process_shutdown.connect
+def shutdown_worker_process(**kwargs):
+    run_async(close_http_client())
+    run_async(close_redis())
+    close_render_pool()
+    shutdown_tracing()
+    metrics.mark_process_dead(os.getpid())
+
+@before_task_publish.connect
+def stamp_sent_at(headers=None, **kwargs):
+    # Wall clock: the publisher and the worker are different processes
+    headers["sent_at"] = time.time()
+
+@task_prerun.connect
+def task_started(task_id=None, task=None, **kwargs):
+    _task_started[task_id] = time.perf_counter()
+    _observe_queue_wait(task)
+
+@task_postrun.connect
+def task_finished(task_id=None, task=None, state=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    if started is not None:
+        metrics.observe(
+            "celery.task_duration_seconds",
+            time.perf_counter() - started,
+            {"task": task.name, "state": state or "UNKNOWN"}
+        )
+    metrics.record_pool("sync", engine.pool)
+
+def _observe_queue_wait(task) -> None:
+    request = task.request
+    waiting_since = getattr(request, "sent_at", None)
+    if waiting_since is None:
+        return
+
+    # Countdowns and retries aren't waiting for a worker until they are due
+    if request.eta:
+        waiting_since = max(waiting_since, datetime.fromisoformat(request.eta).timestamp())
+
+    delivery_info = request.delivery_info or {}
+    metrics.observe(
+        "celery.queue_wait_seconds",
+        max(0.0, time.time() - waiting_since),
+        {
+            "queue": delivery_info.get("routing_key") or "unknown",
+            "lane": job_service.lane_of(delivery_info.get("priority")) or "none"
+        }
+    )
+
+def _forks_children(consumer) -> bool:
+    return consumer is not None and type(consumer.pool).__module__ == "celery.concurrency.prefork"
+
 if __name__ == "__main__":
     celery_app.start()
\ No newline at end of file
@@ -1,8 +1,35 @@
+from contextlib import contextmanager
+from datetime import datetime
+
+from celery import chain, group
+
 from .celery_app import celery_app
 from ..config import get_settings
+from ..database import SessionLocal
+from ..models import Channel, Video
+from ..services import ai_service, artifact_cache, email_service, feed_version, job_service, poller_service, processing_lock, transcript_service, websub_service, youtube_service
+from ..services.rate_limiter import RateLimitExceeded
+from ..utils.event_loop import run_async
 
 settings = get_settings()
 
+@contextmanager
+def db_session():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@contextmanager
+def deferred_when_rate_limited(task):
+    # Out of provider budget: run the stage again once the budget is back
+    # instead of failing the job
+    try:
+        yield
+    except RateLimitExceeded as e:
+        raise task.retry(countdown=e.retry_after, max_retries=None)
+
 @celery_app.task(name="test_task")
 def test_task(message: str = None):
     """
@@ -10,23 +37,292 @@ def test_task(message: str = None):
     """
     return f"Celery test task completed successfully: {message}"
 
-# Video processing tasks will be added here
-@celery_app.task(name="process_video")
-def process_video(video_id: str, user_id: str):
+@celery_app.task(name="poll_channels")
+def poll_channels():
+    """
+    Poll every distinct subscribed channel for new uploads and queue
+    processing for each new video once, however many users subscribe
+    """
+    with db_session() as db:
+        stats = poller_service.poll_channels(db)
+        _queue_processing(db, stats["video_ids"])
+
+    return stats
+
+@celery_app.task(name="ingest_pushed_videos", bind=True)
+def ingest_pushed_videos(self, video_ids: list):
+    """
+    Fan out and queue processing for videos announced by a WebSub push
+    """
+    with deferred_when_rate_limited(self), db_session() as db:
+        new_video_ids = poller_service.ingest_videos(db, video_ids)
+        _queue_processing(db, new_video_ids)
+
+    return {"video_ids": new_video_ids}
+
+@celery_app.task(name="subscribe_websub_channel")
+def subscribe_websub_channel(yt_channel_id: str):
+    """
+    Subscribe to push notifications of a newly followed channel
+    """
+    with db_session() as db:
+        return websub_service.subscribe(db, yt_channel_id)
+
+@celery_app.task(name="renew_websub_leases")
+def renew_websub_leases():
+    """
+    Renew expiring WebSub leases and drop channels nobody follows anymore
+    """
+    with db_session() as db:
+        return websub_service.renew_leases(db)
+
+@celery_app.task(name="purge_transcripts")
+def purge_transcripts():
+    """
+    Delete transcripts past the retention period (PRD: 30 days)
+    """
+    with db_session() as db:
+        return transcript_service.purge_expired(db)
+
+@celery_app.task(name="expire_stale_jobs")
+def expire_stale_jobs():
+    """
+    Fail processing jobs abandoned by a lost worker
+    """
+    with db_session() as db:
+        return job_service.expire_stale_jobs(db)
+
+def _queue_processing(db, video_ids):
+    # One job per video, however many subscribers it was fanned out to, and
+    # none when an API request queued the video meanwhile
+    lanes = job_service.background_lanes(db, video_ids)
+    for video_id in video_ids:
+        lane, tenant = lanes.get(video_id, ("backfill", None))
+        with processing_lease(video_id) as fence_token:
+            if job_service.get_active_job(db, video_id):
+                continue
+            try:
+                job = job_service.create_job(db, video_id, fence_token=fence_token, lane=lane, tenant=tenant)
+            except processing_lock.LeaseLost:
+                # A later holder queued it
+                continue
+            start_processing(str(job.id), job.priority)
+
+@contextmanager
+def processing_lease(video_id):
+    # processing_lock.hold() for synchronous code
+    token = run_async(processing_lock.acquire(video_id))
+    try:
+        yield token
+    finally:
+        run_async(processing_lock.release(video_id, token))
+
+def start_processing(job_id: str, priority: int = None):
+    """
+    Queue the processing pipeline for a job
+
+    The pipeline is compiled from job_service.PIPELINE_DAG: stages that only
+    depend on earlier levels run as a Celery group, so the mindmap and the
+    audio are produced concurrently once the summary exists.
+
+    Args:
+        job_id: ID of a ProcessingJob created with job_service.create_job()
+        priority: Broker priority of every stage, the job's priority
+    """
+    return build_pipeline(priority=priority).apply_async(args=({"job_id": job_id},))
+
+def build_pipeline(dag: dict = job_service.PIPELINE_DAG, priority: int = None):
+    """
+    Compile a stage DAG into a Celery canvas
+
+    Each level of concurrently runnable stages becomes a single task or a
+    group; chaining a group into the next level makes Celery wait for the
+    whole group (a chord). Every stage task takes the context returned by
+    the previous level.
+
+    Args:
+        dag: Stage name -> names of the stages it depends on
+        priority: Broker priority of every stage, None for the default
+
+    Returns:
+        celery.canvas.Signature: The pipeline, to be applied with the initial context
+    """
+    # Set on each stage: later stages are sent by the worker finishing the
+    # previous one, and must keep the job's place in line
+    options = {"priority": priority} if priority is not None else {}
+
+    steps = []
+    for level in job_service.stage_levels(dag):
+        signatures = [STAGE_TASKS[stage].s().set(**options) for stage in level]
+        steps.append(signatures[0] if len(signatures) == 1 else group(signatures))
+
+    return chain(*steps)
+
+@celery_app.task(name="fetch_transcript", bind=True)
+def fetch_transcript(self, context: dict):
+    """
+    Pipeline stage: fetch the transcript of the job's video
+    """
+    job_id = _merge(context)["job_id"]
+
+    with deferred_when_rate_limited(self), db_session() as db:
+        video_id = job_service.get_job(db, job_id).video_id
+
+        with job_service.track_stage(db, job_id, "transcript"):
+            # A transcript stored by an earlier run is reused
+            transcript = transcript_service.load(db, video_id)
+
+            if transcript is None:
+                # Release the connection while YouTube answers
+                db.commit()
+                transcript = run_async(youtube_service.get_video_transcript(video_id))
+
+                if not transcript:
+                    raise ValueError("Could not get video transcript")
+
+                transcript_service.store(db, video_id, transcript)
+
+            title = db.query(Video.title).filter(Video.video_id == video_id).limit(1).scalar()
+
+    # The next stage loads the transcript itself; it isn't shipped through
+    # the broker
+    return {
+        "job_id": job_id,
+        "video_id": video_id,
+        "title": title or ""
+    }
+
+@celery_app.task(name="summarize_video", bind=True)
+def summarize_video(self, context: dict):
     """
-    Process a YouTube video to generate a summary
-    This is a placeholder for the actual implementation
+    Pipeline stage: generate (or reuse) the summary of a transcript
     """
-    # In a real implementation, this would:
-    # 1. Fetch video transcript
-    # 2. Generate summary with OpenAI
-    # 3. Create audio with ElevenLabs if needed
-    # 4. Create mind map if needed
-    # 5. Update database with results
-    
+    context = _merge(context)
+    video_id = context["video_id"]
+
+    with deferred_when_rate_limited(self), db_session() as db:
+        with job_service.track_stage(db, context["job_id"], "summary"):
+            transcript = transcript_service.load(db, video_id)
+
+            if transcript is None:
+                raise ValueError("Transcript is no longer stored")
+
+            summary_key = artifact_cache.summary_key(video_id, transcript)
+            summary = artifact_cache.get_or_create(
+                db, summary_key, "summary", video_id,
+                lambda: ai_service.generate_summary(transcript, context["title"])
+            )
+
+            # The placeholder of a failed generation must not be stored or
+            # emailed; failing the job lets the video be processed again
+            if summary.get("error"):
+                raise ValueError("Summary generation failed")
+
     return {
+        "job_id": context["job_id"],
         "video_id": video_id,
-        "user_id": user_id,
-        "status": "processed",
-        "message": "Video processed successfully"
-    }
\ No newline at end of file
+        "summary_key": summary_key,
+        "summary": summary
+    }
+
+@celery_app.task(name="render_mindmap", bind=True)
+def render_mindmap(self, context: dict):
+    """
+    Pipeline stage: render (or reuse) the mind map of a summary
+    """
+    context = _merge(context)
+    with deferred_when_rate_limited(self), db_session() as db:
+        with job_service.track_stage(db, context["job_id"], "mindmap"):
+            mindmap = artifact_cache.get_or_create(
+                db, artifact_cache.mindmap_key(context["summary_key"]), "mindmap", context["video_id"],
+                lambda: _url_payload(ai_service.generate_mindmap(context["summary"]))
+            )
+
+    return {**context, "mindmap_url": mindmap["url"] if mindmap else None}
+
+@celery_app.task(name="synthesize_audio", bind=True)
+def synthesize_audio(self, context: dict):
+    """
+    Pipeline stage: synthesize (or reuse) the audio narration of a summary
+    """
+    context = _merge(context)
+    with deferred_when_rate_limited(self), db_session() as db:
+        with job_service.track_stage(db, context["job_id"], "audio"):
+            audio = artifact_cache.get_or_create(
+                db, artifact_cache.audio_key(context["summary_key"]), "audio", context["video_id"],
+                lambda: _url_payload(ai_service.generate_audio(context["summary"]))
+            )
+
+    return {**context, "mp3_url": audio["url"] if audio else None}
+
+@celery_app.task(name="persist_video_results", bind=True)
+def persist_video_results(self, context: dict):
+    """
+    Pipeline stage: store the results on every unprocessed Video row of the
+    video, so all subscribers get them from a single run
+    """
+    context = _merge(context)
+
+    with deferred_when_rate_limited(self), db_session() as db:
+        with job_service.track_stage(db, context["job_id"], "persist"):
+            # A job superseded by a later one leaves the results to it
+            job_service.check_fence(db, context["job_id"])
+            db.query(Video).filter(
+                Video.video_id == context["video_id"],
+                Video.processed_at.is_(None)
+            ).update({
+                "summary_json": context["summary"],
+                "mindmap_url": context.get("mindmap_url"),
+                "mp3_url": context.get("mp3_url"),
+                "processed_at": datetime.utcnow()
+            }, synchronize_session=False)
+            db.commit()
+
+        # Feeds show processed_at and the asset URLs
+        subscribers = db.query(Channel.user_id).join(Video).filter(Video.video_id == context["video_id"]).all()
+        run_async(feed_version.bump(row.user_id for row in subscribers))
+
+    return {"job_id": context["job_id"], "video_id": context["video_id"]}
+
+@celery_app.task(name="send_digest_email", bind=True)
+def send_digest_email(self, context: dict):
+    """
+    Pipeline stage: email the digest to every subscriber of the video, in
+    batched SendGrid requests
+    """
+    context = _merge(context)
+
+    with deferred_when_rate_limited(self), db_session() as db:
+        with job_service.track_stage(db, context["job_id"], "email"):
+            stats = email_service.send_video_digest(db, context["video_id"])
+
+        job_service.finish_job(db, context["job_id"])
+
+    return {"job_id": context["job_id"], "video_id": context["video_id"], "status": "succeeded", **stats}
+
+# Task run for each stage of job_service.PIPELINE_DAG. Every one of them is
+# wrapped in deferred_when_rate_limited: track_stage() leaves a stage that
+# ran out of budget "deferred", and only a retry moves the job on.
+STAGE_TASKS = {
+    "transcript": fetch_transcript,
+    "summary": summarize_video,
+    "mindmap": render_mindmap,
+    "audio": synthesize_audio,
+    "persist": persist_video_results,
+    "email": send_digest_email
+}
+
+def _merge(context):
+    # A stage after a group receives the list of its members' contexts
+    if isinstance(context, dict):
+        return context
+
+    merged = {}
+    for result in context:
+        merged.update(result)
+    return merged
+
+async def _url_payload(url_coro):
+    # Wrap an uploaded asset URL as a cacheable payload; None marks a failure
+    url = await url_coro
+    return {"url": url} if url else None
@@ -0,0 +1,35 @@
+"""
+Start a Celery worker serving one queue, with the pool suited to its tasks
+
+The "io" worker runs CELERY_IO_CONCURRENCY threads, the "cpu" worker
+CELERY_CPU_CONCURRENCY processes (see WORKER_POOLS). Extra arguments are
+passed on to `celery worker`. A plain `celery -A app.workers.celery_app
+worker` still serves both queues, with a single pool.
+
+Usage (from backend/):
+    python -m app.workers.worker io
+    python -m app.workers.worker cpu --loglevel=debug
+"""
+import sys
+
+from .celery_app import WORKER_POOLS, celery_app
+
+def main(argv):
+    if not argv or argv[0] not in WORKER_POOLS:
+        sys.exit(f"Usage: python -m app.workers.worker {{{'|'.join(WORKER_POOLS)}}} [celery worker options]")
+
+    queue = argv[0]
+    pool, concurrency = WORKER_POOLS[queue]
+
+    celery_app.worker_main([
+        "worker",
+        f"--queues={queue}",
+        f"--pool={pool}",
+        f"--concurrency={concurrency}",
+        f"--hostname={queue}@%h",
+        "--loglevel=info",
+        *argv[1:]
+    ])
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
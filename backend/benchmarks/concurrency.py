@@ -0,0 +1,72 @@
+"""
+Measure API throughput under many concurrent clients.
+
+Starts the API separately (e.g. `make start` without --reload, or uvicorn
+with one worker) and hammers an authenticated endpoint. Run it on two
+checkouts to compare before and after.
+
+Usage (from backend/):
+    python -m benchmarks.concurrency --email you@example.com
+    python -m benchmarks.concurrency --email you@example.com --clients 200 --duration 30 --path /api/v1/videos/
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from app.api.auth import create_access_token
+from .http_client import percentile
+
+async def client_loop(client, path, deadline, latencies, errors):
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            response = await client.get(path)
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+                continue
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+            continue
+        latencies.append((time.perf_counter() - started) * 1000)
+
+async def run(base_url, path, token, clients, duration):
+    latencies, errors = [], []
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+
+    async with httpx.AsyncClient(
+        base_url=base_url,
+        headers={"Authorization": f"Bearer {token}"},
+        limits=limits,
+        timeout=30
+    ) as client:
+        # Warm up connections and caches
+        await client.get(path)
+
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(
+            client_loop(client, path, deadline, latencies, errors)
+            for _ in range(clients)
+        ))
+
+    print(f"{path} with {clients} concurrent clients for {duration}s")
+    print(f"  requests/sec: {len(latencies) / duration:.1f}")
+    if latencies:
+        print(f"  p50={percentile(latencies, 50):.1f}ms  p99={percentile(latencies, 99):.1f}ms")
+    print(f"  errors: {len(errors)}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--path", default="/api/v1/channels/")
+    parser.add_argument("--email", required=True, help="Email of an existing user to authenticate as")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=20)
+    args = parser.parse_args()
+
+    token = create_access_token(data={"sub": args.email})
+    asyncio.run(run(args.base_url, args.path, token, args.clients, args.duration))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Measure delivery of one digest to many subscribers.
+
+Sends a rendered digest to N generated recipients in batches of
+MAX_PERSONALIZATIONS, the way the email stage does, and reports the API
+calls and time taken. Point SENDGRID_API_URL at the fake server first;
+this never talks to the database.
+
+Usage (from backend/):
+    make fake_sendgrid  # in another terminal
+    SENDGRID_API_URL=http://localhost:3030 SENDGRID_API_KEY=fake python -m benchmarks.email_digest --subscribers 10000
+"""
+import argparse
+import asyncio
+import time
+
+from app.services import email_service
+from app.services.http_client import close_http_client, get_http_client
+
+SAMPLE_SUMMARY = {
+    "main_points": [{"point": f"Main point {i}", "explanation": "Brief explanation"} for i in range(1, 6)],
+    "summary": "First paragraph of the summary.\n\nSecond paragraph of the summary.",
+    "key_concepts": [{"concept": f"Concept {i}", "explanation": "Concept explanation"} for i in range(1, 6)]
+}
+
+async def run(subscribers):
+    digest = email_service.render_digest("dQw4w9WgXcQ", "Benchmark video", SAMPLE_SUMMARY)
+    recipients = [{"email": f"user{i}@example.com", "first_name": f"User {i}"} for i in range(subscribers)]
+
+    await get_http_client().delete(f"{email_service.settings.SENDGRID_API_URL}/_fake/requests")
+
+    started = time.perf_counter()
+    api_calls = 0
+    for start in range(0, len(recipients), email_service.MAX_PERSONALIZATIONS):
+        await email_service.send_batch(digest, recipients[start:start + email_service.MAX_PERSONALIZATIONS])
+        api_calls += 1
+    elapsed = time.perf_counter() - started
+
+    received = (await get_http_client().get(f"{email_service.settings.SENDGRID_API_URL}/_fake/requests")).json()
+    delivered = sum(len(request["recipients"]) for request in received)
+
+    print(f"{subscribers} subscribers: {api_calls} API calls in {elapsed:.2f}s, {delivered} recipients received")
+    await close_http_client()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subscribers", type=int, default=10000)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.subscribers))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Compare outbound request latency with a new client per call (the old
+behaviour) against the shared pooled client.
+
+Usage (from backend/):
+    python -m benchmarks.http_client --requests 200
+    python -m benchmarks.http_client --url http://localhost:9000/youtube/v3/videos
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from app.config import get_settings
+from app.services.http_client import close_http_client, get_http_client
+
+settings = get_settings()
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def report(name, samples):
+    print(
+        f"{name:<12} n={len(samples)}  p50={percentile(samples, 50):.1f}ms  "
+        f"p99={percentile(samples, 99):.1f}ms  mean={statistics.mean(samples):.1f}ms"
+    )
+
+async def time_call(send):
+    started = time.perf_counter()
+    await send()
+    return (time.perf_counter() - started) * 1000
+
+async def run(url, params, requests):
+    async def fresh_client():
+        async with httpx.AsyncClient() as client:
+            await client.get(url, params=params)
+
+    async def shared_client():
+        await get_http_client().get(url, params=params)
+
+    report("per-call", [await time_call(fresh_client) for _ in range(requests)])
+    report("shared", [await time_call(shared_client) for _ in range(requests)])
+
+    await close_http_client()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="https://www.googleapis.com/youtube/v3/videos")
+    parser.add_argument("--video-id", default="dQw4w9WgXcQ")
+    parser.add_argument("--requests", type=int, default=100)
+    args = parser.parse_args()
+
+    params = {"part": "snippet", "id": args.video_id, "key": settings.YOUTUBE_API_KEY}
+    asyncio.run(run(args.url, params, args.requests))
+
+if __name__ == "__main__":
+    main()
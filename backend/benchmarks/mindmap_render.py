@@ -0,0 +1,55 @@
+"""
+Measure mind map render throughput of the render pool.
+
+Needs Firefox (geckodriver is fetched by Selenium Manager).
+
+Usage (from backend/):
+    python -m benchmarks.mindmap_render --renders 50 --concurrency 8
+"""
+import argparse
+import asyncio
+import time
+
+from app.services.ai_service import build_mindmap_source
+from app.services.mindmap_renderer import close_render_pool, get_render_pool
+
+SAMPLE_SUMMARY = {
+    "main_points": [
+        {"point": f"Main point {i}", "explanation": "Brief explanation"} for i in range(1, 6)
+    ],
+    "key_concepts": [
+        {"concept": f"Concept {i}", "explanation": "Concept explanation"} for i in range(1, 6)
+    ]
+}
+
+async def run(renders, concurrency):
+    pool = get_render_pool()
+    source = build_mindmap_source(SAMPLE_SUMMARY)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    # The first render per worker starts its browser
+    started = time.perf_counter()
+    await pool.render(source)
+    print(f"first render (cold): {time.perf_counter() - started:.2f}s")
+
+    async def render_one():
+        async with semaphore:
+            await pool.render(source)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(render_one() for _ in range(renders)))
+    elapsed = time.perf_counter() - started
+
+    print(f"{renders} renders in {elapsed:.2f}s: {renders / elapsed:.2f} renders/sec")
+    close_render_pool()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--renders", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.renders, args.concurrency))
+
+if __name__ == "__main__":
+    main()
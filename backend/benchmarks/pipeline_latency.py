@@ -0,0 +1,265 @@
+"""
+Measure end-to-end publish-to-email latency against local fakes.
+
+Boots the fakes of every external service (YouTube, OpenAI, ElevenLabs, S3,
+SendGrid) with injected latency, then the API, the I/O and CPU Celery
+workers and Celery beat pointed at them. S users subscribe to each of N
+channels through the API; every channel then publishes a video at a random
+moment within the publish window, and the run waits until SendGrid has
+received every digest.
+Reports p50/p95/p99 latency from publication to the last subscriber's email
+and the throughput, and exits non-zero when p99 exceeds the SLO (PRD: 5
+minutes), so it can gate a deploy.
+
+Needs Postgres and Redis with the schema created (docker compose up postgres
+redis; make init_db) and the app environment (e.g. backend/.env). The
+workers run with ENVIRONMENT=production, so every stage goes through the
+fakes and the app's rate limits apply; mind maps render in a real headless
+browser when one is installed. Transcripts are still the app's placeholder.
+
+Usage (from backend/):
+    python -m benchmarks.pipeline_latency
+    python -m benchmarks.pipeline_latency --channels 200 --subscribers 5 --openai-latency-ms 8000
+"""
+import argparse
+import asyncio
+import os
+import random
+import secrets
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from app.api.auth import create_access_token
+from app.config import get_settings
+from app.database import SessionLocal
+from app.models import User
+
+settings = get_settings()
+
+# PRD: a new video's digest is emailed within 5 minutes
+SLO_SECONDS = 300
+
+# Port and default injected latency of every fake
+FAKES = {
+    "youtube": (3034, 100),
+    "openai": (3032, 3000),
+    "elevenlabs": (3033, 1000),
+    "s3": (3035, 50),
+    "sendgrid": (3030, 150)
+}
+
+API_PORT = 8000
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def fake_url(name):
+    return f"http://localhost:{FAKES[name][0]}"
+
+def app_environment(args):
+    env = dict(os.environ)
+    env.update({
+        "ENVIRONMENT": "production",
+        "YOUTUBE_API_URL": fake_url("youtube"),
+        "YOUTUBE_API_KEY": "fake",
+        "YOUTUBE_POLL_INTERVAL_SECONDS": str(args.poll_interval),
+        "OPENAI_API_URL": f"{fake_url('openai')}/v1",
+        "OPENAI_API_KEY": "fake",
+        "ELEVENLABS_API_URL": fake_url("elevenlabs"),
+        "ELEVENLABS_API_KEY": "fake",
+        "ELEVENLABS_VOICE_ID": "fake",
+        "AWS_S3_ENDPOINT_URL": fake_url("s3"),
+        "AWS_BUCKET_NAME": "summarizer",
+        "AWS_ACCESS_KEY_ID": "fake",
+        "AWS_SECRET_ACCESS_KEY": "fake",
+        "SENDGRID_API_URL": fake_url("sendgrid"),
+        "SENDGRID_API_KEY": "fake",
+        "WEBSUB_ENABLED": "false"
+    })
+    return env
+
+def start_processes(args, log_dir):
+    processes = []
+
+    def start(name, command, env):
+        log = open(os.path.join(log_dir, f"{name}.log"), "w")
+        processes.append(subprocess.Popen(command, env=env, stdout=log, stderr=subprocess.STDOUT))
+
+    for name, (port, _) in FAKES.items():
+        env = dict(os.environ, FAKE_LATENCY_MS=str(getattr(args, f"{name}_latency_ms")))
+        start(name, [sys.executable, "-m", "uvicorn", f"fakes.{name}:app", "--port", str(port), "--log-level", "warning"], env)
+
+    env = app_environment(args)
+    start("api", [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(API_PORT), "--log-level", "warning"], env)
+    start("worker-io", [sys.executable, "-m", "app.workers.worker", "io"], dict(env, CELERY_IO_CONCURRENCY=str(args.io_concurrency)))
+    # The I/O worker serves the metrics port
+    start("worker-cpu", [sys.executable, "-m", "app.workers.worker", "cpu"], dict(env, WORKER_METRICS_PORT="0"))
+    start("beat", [
+        sys.executable, "-m", "celery", "-A", "app.workers.celery_app", "beat",
+        "--loglevel=info", f"--schedule={os.path.join(log_dir, 'celerybeat-schedule')}"
+    ], env)
+
+    return processes
+
+async def wait_until_up(client, url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if (await client.get(url)).status_code < 500:
+                return
+        except httpx.TransportError:
+            pass
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"{url} did not come up within {timeout}s")
+        await asyncio.sleep(0.5)
+
+def create_users(run_id, count):
+    db = SessionLocal()
+    try:
+        users = [
+            User(email=f"bench-{run_id}-{i}@example.com", first_name=f"Bench {i}")
+            for i in range(count)
+        ]
+        db.add_all(users)
+        db.commit()
+        return [user.email for user in users]
+    finally:
+        db.close()
+
+async def subscribe(client, emails, channel_ids):
+    semaphore = asyncio.Semaphore(20)
+
+    async def add(email, channel_id):
+        async with semaphore:
+            response = await client.post(
+                f"http://localhost:{API_PORT}{settings.API_V1_PREFIX}/channels/",
+                json={"channel_url": channel_id},
+                headers={"Authorization": f"Bearer {create_access_token({'sub': email})}"}
+            )
+            response.raise_for_status()
+
+    await asyncio.gather(*(add(email, channel_id) for email in emails for channel_id in channel_ids))
+
+async def publish(client, channel_ids, window):
+    published = {}
+
+    async def upload(channel_id):
+        await asyncio.sleep(random.uniform(0, window))
+        video_id = secrets.token_hex(6)[:11]
+        response = await client.post(
+            f"{fake_url('youtube')}/_fake/publish",
+            json={"channel_id": channel_id, "video_id": video_id, "title": f"Benchmark {video_id}"}
+        )
+        published[video_id] = response.json()["published_at"]
+
+    await asyncio.gather(*(upload(channel_id) for channel_id in channel_ids))
+    return published
+
+async def wait_for_emails(client, published, subscribers, timeout):
+    # Video ID -> time its last subscriber's email reached SendGrid
+    delivered = {}
+    deadline = time.monotonic() + timeout
+
+    while len(delivered) < len(published) and time.monotonic() < deadline:
+        await asyncio.sleep(1)
+        requests = (await client.get(f"{fake_url('sendgrid')}/_fake/requests")).json()
+
+        recipients = {}
+        last_received = {}
+        for request in requests:
+            video_id = request["subject"].rsplit(" ", 1)[-1]
+            if video_id in published:
+                recipients[video_id] = recipients.get(video_id, 0) + len(request["recipients"])
+                last_received[video_id] = max(last_received.get(video_id, 0), request["received_at"])
+
+        delivered = {
+            video_id: received_at for video_id, received_at in last_received.items()
+            if recipients[video_id] >= subscribers
+        }
+
+    return delivered
+
+async def run(args):
+    run_id = secrets.token_hex(4)
+    # 24-character channel IDs (UC + 22) that only this run subscribes to
+    channel_ids = [f"UC{run_id}{i:014d}" for i in range(args.channels)]
+
+    async with httpx.AsyncClient(timeout=30) as client:
+        for name in FAKES:
+            await wait_until_up(client, f"{fake_url(name)}/docs")
+        await wait_until_up(client, f"http://localhost:{API_PORT}/")
+        await client.delete(f"{fake_url('sendgrid')}/_fake/requests")
+
+        emails = create_users(run_id, args.subscribers)
+        started = time.perf_counter()
+        await subscribe(client, emails, channel_ids)
+        print(f"Subscribed {len(emails)} users to {len(channel_ids)} channels in {time.perf_counter() - started:.1f}s")
+
+        published = await publish(client, channel_ids, args.publish_window)
+        first_published = min(published.values())
+        delivered = await wait_for_emails(
+            client, published, args.subscribers, args.timeout or 2 * args.slo_seconds + args.publish_window
+        )
+
+    latencies = [delivered[video_id] - published[video_id] for video_id in delivered]
+    missing = len(published) - len(delivered)
+
+    if not latencies:
+        print(f"No digest delivered for any of {len(published)} videos")
+        return False
+
+    elapsed = max(delivered.values()) - first_published
+    print(
+        f"{len(delivered)}/{len(published)} videos emailed to {args.subscribers} subscribers each; "
+        f"publish-to-email p50={percentile(latencies, 50):.1f}s p95={percentile(latencies, 95):.1f}s "
+        f"p99={percentile(latencies, 99):.1f}s max={max(latencies):.1f}s mean={statistics.mean(latencies):.1f}s"
+    )
+    print(
+        f"Throughput: {len(delivered) / elapsed * 60:.1f} videos/min, "
+        f"{len(delivered) * args.subscribers / elapsed:.1f} emails/s over {elapsed:.0f}s"
+    )
+
+    # Videos never emailed count as over the SLO
+    within = not missing and percentile(latencies, 99) <= args.slo_seconds
+    print(f"SLO {args.slo_seconds}s at p99: {'OK' if within else 'MISSED'}")
+    return within
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--channels", type=int, default=20, help="Channels publishing a video each")
+    parser.add_argument("--subscribers", type=int, default=3, help="Users subscribed to every channel")
+    parser.add_argument("--publish-window", type=float, default=60, help="Seconds over which the videos are published")
+    parser.add_argument("--poll-interval", type=int, default=settings.YOUTUBE_POLL_INTERVAL_SECONDS)
+    parser.add_argument("--io-concurrency", type=int, default=settings.CELERY_IO_CONCURRENCY, help="Threads of the I/O worker")
+    parser.add_argument("--slo-seconds", type=float, default=SLO_SECONDS)
+    parser.add_argument("--timeout", type=float, help="Seconds to wait for the emails (default: twice the SLO plus the publish window)")
+    for name, (_, latency_ms) in FAKES.items():
+        parser.add_argument(f"--{name}-latency-ms", type=float, default=latency_ms)
+    args = parser.parse_args()
+
+    log_dir = tempfile.mkdtemp(prefix="pipeline-latency-")
+    print(f"Process logs in {log_dir}")
+    processes = start_processes(args, log_dir)
+
+    try:
+        within = asyncio.run(run(args))
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    sys.exit(0 if within else 1)
+
+if __name__ == "__main__":
+    main()
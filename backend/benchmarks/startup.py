@@ -0,0 +1,92 @@
+"""
+Measure cold-start time of the API and the Celery workers against a budget.
+
+Every sample runs in a fresh interpreter, so nothing is cached in
+sys.modules. The API is timed until its lifespan startup has run (the point
+uvicorn starts accepting requests); a worker is timed until its tasks are
+imported. Exits non-zero when a median exceeds its budget, so it can gate CI.
+
+Needs the same environment as the app (e.g. backend/.env); nothing connects
+to the database or Redis.
+
+Usage (from backend/):
+    python -m benchmarks.startup
+    python -m benchmarks.startup --runs 10 --api-budget-ms 1200 --top 15
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+# Median cold start allowed per process type, in milliseconds
+API_BUDGET_MS = 1500
+WORKER_BUDGET_MS = 1500
+
+API_STARTUP = """
+import asyncio, time
+started = time.perf_counter()
+from app.main import app
+async def boot():
+    async with app.router.lifespan_context(app):
+        print((time.perf_counter() - started) * 1000)
+asyncio.run(boot())
+"""
+
+WORKER_STARTUP = """
+import time
+started = time.perf_counter()
+import app.workers.tasks
+print((time.perf_counter() - started) * 1000)
+"""
+
+def sample(code: str) -> float:
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+def slowest_imports(module: str, top: int):
+    # -X importtime lines: "import time: self [us] | cumulative | imported package"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((int(parts[1]) / 1000, parts[2].rstrip()))
+
+    for cumulative_ms, name in sorted(rows, reverse=True)[:top]:
+        print(f"    {cumulative_ms:8.1f} ms {name}")
+
+def measure(label: str, code: str, module: str, runs: int, budget_ms: float, top: int) -> bool:
+    samples = [sample(code) for _ in range(runs)]
+    median = statistics.median(samples)
+    within = median <= budget_ms
+
+    print(
+        f"{label}: median {median:.0f} ms, min {min(samples):.0f} ms, max {max(samples):.0f} ms "
+        f"(budget {budget_ms:.0f} ms) {'OK' if within else 'OVER BUDGET'}"
+    )
+    if top:
+        print(f"  slowest imports of {module}:")
+        slowest_imports(module, top)
+
+    return within
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--api-budget-ms", type=float, default=API_BUDGET_MS)
+    parser.add_argument("--worker-budget-ms", type=float, default=WORKER_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=10, help="List the N slowest imports (0 to skip)")
+    args = parser.parse_args()
+
+    results = [
+        measure("api", API_STARTUP, "app.main", args.runs, args.api_budget_ms, args.top),
+        measure("worker", WORKER_STARTUP, "app.workers.tasks", args.runs, args.worker_budget_ms, args.top)
+    ]
+
+    sys.exit(0 if all(results) else 1)
+
+if __name__ == "__main__":
+    main()
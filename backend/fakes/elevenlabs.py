@@ -0,0 +1,53 @@
+"""
+Local stand-in for the ElevenLabs streaming text-to-speech API.
+
+Streams a fake MP3 sized like real speech (BYTES_PER_CHARACTER per input
+character) in small chunks, after the injected latency, so the app's
+streaming upload is exercised as in production.
+
+Usage (from backend/):
+    uvicorn fakes.elevenlabs:app --port 3033
+    ELEVENLABS_API_URL=http://localhost:3033 ELEVENLABS_API_KEY=fake ENVIRONMENT=production make worker
+"""
+import asyncio
+import os
+import time
+
+from fastapi import FastAPI, Header, HTTPException, status
+from fastapi.responses import StreamingResponse
+
+app = FastAPI(title="Fake ElevenLabs")
+
+# Simulated time to the first audio chunk
+LATENCY_MS = float(os.getenv("FAKE_LATENCY_MS", "0"))
+
+# About 128 kbps MP3 at 15 characters of speech per second
+BYTES_PER_CHARACTER = 1000
+CHUNK_SIZE = 64 * 1024
+
+requests = []
+
+@app.post("/v1/text-to-speech/{voice_id}/stream")
+async def text_to_speech_stream(voice_id: str, request: dict, xi_api_key: str = Header(None)):
+    if not xi_api_key:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing API key")
+    text = request.get("text") or ""
+    if not text:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="text is required")
+
+    requests.append({"received_at": time.time(), "voice_id": voice_id, "characters": len(text)})
+
+    async def audio():
+        if LATENCY_MS:
+            await asyncio.sleep(LATENCY_MS / 1000)
+        remaining = len(text) * BYTES_PER_CHARACTER
+        while remaining > 0:
+            size = min(CHUNK_SIZE, remaining)
+            remaining -= size
+            yield b"\xff" * size
+
+    return StreamingResponse(audio(), media_type="audio/mpeg")
+
+@app.get("/_fake/requests")
+async def recorded_requests():
+    return requests
@@ -0,0 +1,72 @@
+"""
+Local stand-in for the OpenAI chat completions API.
+
+Answers every completion with a summary in the JSON structure the
+summarizer asks for, and records the prompt sizes it was sent.
+
+Usage (from backend/):
+    uvicorn fakes.openai:app --port 3032
+    OPENAI_API_URL=http://localhost:3032/v1 OPENAI_API_KEY=fake ENVIRONMENT=production make worker
+"""
+import asyncio
+import json
+import os
+import time
+import uuid
+
+from fastapi import FastAPI, Header, HTTPException, status
+
+app = FastAPI(title="Fake OpenAI")
+
+# Simulated response time of the real API
+LATENCY_MS = float(os.getenv("FAKE_LATENCY_MS", "0"))
+
+SUMMARY = {
+    "main_points": [
+        {"point": f"Main point {i}", "explanation": f"Explanation of main point {i}"} for i in range(1, 4)
+    ],
+    "summary": "First paragraph of the summary.\n\nSecond paragraph of the summary.",
+    "key_concepts": [
+        {"concept": f"Concept {i}", "explanation": f"Explanation of concept {i}"} for i in range(1, 4)
+    ]
+}
+
+requests = []
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: dict, authorization: str = Header(None)):
+    if not authorization or not authorization.startswith("Bearer "):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing API key")
+    if not request.get("model") or not request.get("messages"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="model and messages are required")
+
+    if LATENCY_MS:
+        await asyncio.sleep(LATENCY_MS / 1000)
+
+    content = json.dumps(SUMMARY)
+    # About 4 characters per token, as the app estimates
+    prompt_tokens = sum(len(message.get("content") or "") for message in request["messages"]) // 4
+    completion_tokens = len(content) // 4
+
+    requests.append({"received_at": time.time(), "prompt_tokens": prompt_tokens})
+
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": request["model"],
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop"
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+    }
+
+@app.get("/_fake/requests")
+async def recorded_requests():
+    return requests
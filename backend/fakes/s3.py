@@ -0,0 +1,109 @@
+"""
+Local stand-in for the S3 object API used by storage_service.
+
+Supports path-style PutObject and multipart uploads (create, upload part,
+complete, abort). Object bodies are counted and discarded; only keys and
+sizes are kept.
+
+Usage (from backend/):
+    uvicorn fakes.s3:app --port 3035
+    AWS_S3_ENDPOINT_URL=http://localhost:3035 AWS_BUCKET_NAME=summarizer \\
+        AWS_ACCESS_KEY_ID=fake AWS_SECRET_ACCESS_KEY=fake make worker
+"""
+import asyncio
+import hashlib
+import os
+import time
+import uuid
+from typing import Optional
+from xml.sax.saxutils import escape
+
+from fastapi import FastAPI, HTTPException, Request, Response, status
+
+app = FastAPI(title="Fake S3")
+
+# Simulated response time of the real API, per request
+LATENCY_MS = float(os.getenv("FAKE_LATENCY_MS", "0"))
+
+XMLNS = "http://s3.amazonaws.com/doc/2006-03-01/"
+
+objects = {}
+# Upload ID -> {"bucket", "key", "parts": {number: size}}
+uploads = {}
+
+@app.put("/{bucket}/{key:path}")
+async def put(bucket: str, key: str, request: Request, partNumber: Optional[int] = None, uploadId: Optional[str] = None):
+    size, etag = await _consume(request)
+
+    if uploadId is not None:
+        upload = _upload(uploadId)
+        upload["parts"][partNumber] = size
+    else:
+        objects[f"{bucket}/{key}"] = {"size": size, "stored_at": time.time()}
+
+    return Response(status_code=status.HTTP_200_OK, headers={"ETag": f"\"{etag}\""})
+
+@app.post("/{bucket}/{key:path}")
+async def post(bucket: str, key: str, request: Request, uploadId: Optional[str] = None):
+    await _consume(request)
+
+    if uploadId is None:
+        # CreateMultipartUpload (?uploads)
+        if "uploads" not in request.query_params:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unsupported operation")
+        upload_id = uuid.uuid4().hex
+        uploads[upload_id] = {"bucket": bucket, "key": key, "parts": {}}
+        return _xml(
+            "InitiateMultipartUploadResult",
+            f"<Bucket>{escape(bucket)}</Bucket><Key>{escape(key)}</Key><UploadId>{upload_id}</UploadId>"
+        )
+
+    # CompleteMultipartUpload
+    upload = uploads.pop(uploadId, None)
+    if upload is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="NoSuchUpload")
+    objects[f"{bucket}/{key}"] = {"size": sum(upload["parts"].values()), "stored_at": time.time()}
+
+    return _xml(
+        "CompleteMultipartUploadResult",
+        f"<Bucket>{escape(bucket)}</Bucket><Key>{escape(key)}</Key><ETag>\"{uuid.uuid4().hex}\"</ETag>"
+    )
+
+@app.delete("/{bucket}/{key:path}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete(bucket: str, key: str, uploadId: Optional[str] = None):
+    if LATENCY_MS:
+        await asyncio.sleep(LATENCY_MS / 1000)
+
+    if uploadId is not None:
+        uploads.pop(uploadId, None)
+    else:
+        objects.pop(f"{bucket}/{key}", None)
+
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+@app.get("/_fake/objects")
+async def stored_objects():
+    return objects
+
+def _upload(upload_id: str) -> dict:
+    if upload_id not in uploads:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="NoSuchUpload")
+    return uploads[upload_id]
+
+async def _consume(request: Request):
+    if LATENCY_MS:
+        await asyncio.sleep(LATENCY_MS / 1000)
+
+    size = 0
+    digest = hashlib.md5()
+    async for chunk in request.stream():
+        size += len(chunk)
+        digest.update(chunk)
+
+    return size, digest.hexdigest()
+
+def _xml(root: str, body: str) -> Response:
+    return Response(
+        content=f"<?xml version=\"1.0\" encoding=\"UTF-8\"?><{root} xmlns=\"{XMLNS}\">{body}</{root}>",
+        media_type="application/xml"
+    )
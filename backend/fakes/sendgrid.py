@@ -0,0 +1,60 @@
+"""
+Local stand-in for the SendGrid v3 mail/send API.
+
+Accepts mail/send requests the way SendGrid validates them (auth header,
+1-1000 personalizations, sender, subject and content) and records them
+instead of delivering anything. Tests and benchmarks read the recorded
+requests back from /_fake/requests.
+
+Usage (from backend/):
+    uvicorn fakes.sendgrid:app --port 3030
+    SENDGRID_API_URL=http://localhost:3030 SENDGRID_API_KEY=fake make worker
+"""
+import asyncio
+import os
+import time
+
+from fastapi import FastAPI, Header, HTTPException, Response, status
+
+app = FastAPI(title="Fake SendGrid")
+
+MAX_PERSONALIZATIONS = 1000
+
+# Simulated response time of the real API
+LATENCY_MS = float(os.getenv("FAKE_LATENCY_MS", "0"))
+
+requests = []
+
+@app.post("/v3/mail/send", status_code=status.HTTP_202_ACCEPTED)
+async def mail_send(message: dict, authorization: str = Header(None)):
+    if not authorization or not authorization.startswith("Bearer "):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing API key")
+
+    personalizations = message.get("personalizations") or []
+    if not 1 <= len(personalizations) <= MAX_PERSONALIZATIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"personalizations must contain 1 to {MAX_PERSONALIZATIONS} items"
+        )
+    if not (message.get("from") or {}).get("email") or not message.get("subject") or not message.get("content"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="from, subject and content are required")
+
+    if LATENCY_MS:
+        await asyncio.sleep(LATENCY_MS / 1000)
+
+    requests.append({
+        "received_at": time.time(),
+        "subject": message["subject"],
+        "recipients": [to["email"] for personalization in personalizations for to in personalization.get("to", [])],
+        "personalizations": len(personalizations)
+    })
+
+    return Response(status_code=status.HTTP_202_ACCEPTED)
+
+@app.get("/_fake/requests")
+async def recorded_requests():
+    return requests
+
+@app.delete("/_fake/requests", status_code=status.HTTP_204_NO_CONTENT)
+async def clear_requests():
+    requests.clear()
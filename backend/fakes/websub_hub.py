@@ -0,0 +1,149 @@
+"""
+Local stand-in for YouTube's WebSub hub (pubsubhubbub.appspot.com).
+
+Accepts (un)subscription requests, verifies them asynchronously against the
+callback with a challenge, and pushes signed Atom notifications to verified
+subscribers when told to publish a video through /_fake/publish.
+
+Usage (from backend/):
+    uvicorn fakes.websub_hub:app --port 3031
+    WEBSUB_ENABLED=true WEBSUB_HUB_URL=http://localhost:3031/subscribe \\
+        WEBSUB_CALLBACK_URL=http://localhost:8000/api/v1/websub/callback make worker
+    curl -X POST localhost:3031/_fake/publish -H 'Content-Type: application/json' \\
+        -d '{"channel_id": "UC...", "video_id": "dQw4w9WgXcQ"}'
+"""
+import asyncio
+import hashlib
+import hmac
+import os
+import secrets
+import time
+from datetime import datetime, timezone
+from typing import Optional
+from xml.sax.saxutils import escape
+
+import httpx
+from fastapi import FastAPI, Form, HTTPException, Response, status
+from pydantic import BaseModel
+
+app = FastAPI(title="Fake WebSub hub")
+
+# Simulated delay before the hub verifies a request or delivers a notification
+LATENCY_MS = float(os.getenv("FAKE_LATENCY_MS", "0"))
+
+# (callback, topic) -> subscription
+subscriptions = {}
+verifications = []
+
+FEED = """<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns:yt="http://www.youtube.com/xml/schemas/2015" xmlns="http://www.w3.org/2005/Atom">
+  <link rel="hub" href="https://pubsubhubbub.appspot.com"/>
+  <link rel="self" href="{topic}"/>
+  <title>YouTube video feed</title>
+  <updated>{updated}</updated>
+  <entry>
+    <id>yt:video:{video_id}</id>
+    <yt:videoId>{video_id}</yt:videoId>
+    <yt:channelId>{channel_id}</yt:channelId>
+    <title>{title}</title>
+    <link rel="alternate" href="https://www.youtube.com/watch?v={video_id}"/>
+    <author>
+      <name>{channel_id}</name>
+      <uri>https://www.youtube.com/channel/{channel_id}</uri>
+    </author>
+    <published>{published}</published>
+    <updated>{updated}</updated>
+  </entry>
+</feed>
+"""
+
+class Publication(BaseModel):
+    channel_id: str
+    video_id: str
+    title: str = "Fake video"
+    published: Optional[datetime] = None
+
+@app.post("/subscribe", status_code=status.HTTP_202_ACCEPTED)
+async def subscribe(
+    callback: str = Form(..., alias="hub.callback"),
+    topic: str = Form(..., alias="hub.topic"),
+    mode: str = Form(..., alias="hub.mode"),
+    lease_seconds: int = Form(432000, alias="hub.lease_seconds"),
+    secret: Optional[str] = Form(None, alias="hub.secret")
+):
+    if mode not in ("subscribe", "unsubscribe"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid hub.mode")
+
+    asyncio.create_task(_verify(callback, topic, mode, lease_seconds, secret))
+
+    return Response(status_code=status.HTTP_202_ACCEPTED)
+
+@app.post("/_fake/publish")
+async def publish(publication: Publication):
+    topic = f"https://www.youtube.com/xml/feeds/videos.xml?channel_id={publication.channel_id}"
+    now = datetime.now(timezone.utc).isoformat()
+    body = FEED.format(
+        topic=escape(topic),
+        video_id=escape(publication.video_id),
+        channel_id=escape(publication.channel_id),
+        title=escape(publication.title),
+        published=(publication.published or datetime.now(timezone.utc)).isoformat(),
+        updated=now
+    ).encode("utf-8")
+
+    if LATENCY_MS:
+        await asyncio.sleep(LATENCY_MS / 1000)
+
+    delivered = []
+    async with httpx.AsyncClient() as client:
+        for subscription in list(subscriptions.values()):
+            if subscription["topic"] != topic or subscription["expires_at"] < time.time():
+                continue
+
+            headers = {"Content-Type": "application/atom+xml"}
+            if subscription["secret"]:
+                digest = hmac.new(subscription["secret"].encode("utf-8"), body, hashlib.sha1).hexdigest()
+                headers["X-Hub-Signature"] = f"sha1={digest}"
+
+            response = await client.post(subscription["callback"], content=body, headers=headers)
+            delivered.append({"callback": subscription["callback"], "status": response.status_code})
+
+    return {"delivered": delivered}
+
+@app.get("/_fake/subscriptions")
+async def list_subscriptions():
+    return list(subscriptions.values())
+
+@app.get("/_fake/verifications")
+async def list_verifications():
+    return verifications
+
+async def _verify(callback: str, topic: str, mode: str, lease_seconds: int, secret: Optional[str]):
+    if LATENCY_MS:
+        await asyncio.sleep(LATENCY_MS / 1000)
+
+    challenge = secrets.token_urlsafe(16)
+    params = {"hub.mode": mode, "hub.topic": topic, "hub.challenge": challenge}
+    if mode == "subscribe":
+        params["hub.lease_seconds"] = str(lease_seconds)
+
+    try:
+        async with httpx.AsyncClient() as client:
+            response = await client.get(callback, params=params)
+        confirmed = response.is_success and response.text == challenge
+    except httpx.HTTPError:
+        confirmed = False
+
+    verifications.append({"callback": callback, "topic": topic, "mode": mode, "confirmed": confirmed})
+    if not confirmed:
+        return
+
+    if mode == "subscribe":
+        subscriptions[(callback, topic)] = {
+            "callback": callback,
+            "topic": topic,
+            "secret": secret,
+            "expires_at": time.time() + lease_seconds
+        }
+    else:
+        subscriptions.pop((callback, topic), None)
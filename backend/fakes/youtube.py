@@ -0,0 +1,116 @@
+"""
+Local stand-in for the YouTube Data API v3.
+
+Serves channels.list, playlistItems.list (uploads playlists) and videos.list
+for synthetic channels: any UC + 22 character ID exists. Videos are
+"uploaded" through /_fake/publish, so benchmarks control exactly when new
+videos appear to the poller.
+
+Usage (from backend/):
+    uvicorn fakes.youtube:app --port 3034
+    YOUTUBE_API_URL=http://localhost:3034 make worker
+"""
+import asyncio
+import os
+import re
+import secrets
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import FastAPI, HTTPException, Query, status
+from pydantic import BaseModel
+
+app = FastAPI(title="Fake YouTube Data API")
+
+# Simulated response time of the real API
+LATENCY_MS = float(os.getenv("FAKE_LATENCY_MS", "0"))
+
+CHANNEL_ID = re.compile(r"^UC[\w-]{22}$")
+
+# Channel ID -> its uploads, newest first
+uploads = defaultdict(list)
+videos = {}
+calls = defaultdict(int)
+
+class Publication(BaseModel):
+    channel_id: str
+    video_id: Optional[str] = None
+    title: Optional[str] = None
+    description: str = ""
+
+@app.get("/youtube/v3/channels")
+async def channels_list(id: Optional[str] = None, forHandle: Optional[str] = None, forUsername: Optional[str] = None):
+    await _call("channels.list")
+
+    # Up to 50 comma-separated IDs, or a single handle or username
+    channel_ids = id.split(",") if id else [forHandle or forUsername or ""]
+
+    return {
+        "kind": "youtube#channelListResponse",
+        "items": [
+            {"id": channel_id, "snippet": {"title": f"Channel {channel_id}"}}
+            for channel_id in channel_ids[:50]
+            if CHANNEL_ID.match(channel_id)
+        ]
+    }
+
+@app.get("/youtube/v3/playlistItems")
+async def playlist_items_list(playlistId: str, maxResults: int = Query(5, ge=0, le=50)):
+    await _call("playlistItems.list")
+
+    if not playlistId.startswith("UU"):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="playlistNotFound")
+
+    channel_id = f"UC{playlistId[2:]}"
+    return {
+        "kind": "youtube#playlistItemListResponse",
+        "items": [
+            {"contentDetails": {"videoId": video["id"], "videoPublishedAt": video["snippet"]["publishedAt"]}}
+            for video in uploads[channel_id][:maxResults]
+        ]
+    }
+
+@app.get("/youtube/v3/videos")
+async def videos_list(id: str, maxResults: int = Query(5, ge=1, le=50)):
+    await _call("videos.list")
+
+    ids = id.split(",")
+    if len(ids) > 50:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Too many video IDs")
+
+    return {
+        "kind": "youtube#videoListResponse",
+        "items": [videos[video_id] for video_id in ids if video_id in videos]
+    }
+
+@app.post("/_fake/publish")
+async def publish(publication: Publication):
+    video_id = publication.video_id or secrets.token_urlsafe(8)[:11]
+    published_at = datetime.now(timezone.utc)
+
+    videos[video_id] = {
+        "kind": "youtube#video",
+        "id": video_id,
+        "snippet": {
+            "publishedAt": published_at.isoformat().replace("+00:00", "Z"),
+            "channelId": publication.channel_id,
+            "channelTitle": f"Channel {publication.channel_id}",
+            "title": publication.title or f"Video {video_id}",
+            "description": publication.description,
+            "liveBroadcastContent": "none"
+        },
+        "contentDetails": {"duration": "PT10M"}
+    }
+    uploads[publication.channel_id].insert(0, videos[video_id])
+
+    return {"video_id": video_id, "published_at": published_at.timestamp()}
+
+@app.get("/_fake/calls")
+async def recorded_calls():
+    return calls
+
+async def _call(endpoint: str):
+    calls[endpoint] += 1
+    if LATENCY_MS:
+        await asyncio.sleep(LATENCY_MS / 1000)